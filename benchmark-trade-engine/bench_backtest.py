@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pykka
+from sqlalchemy import create_engine, StaticPool
+
+from benchutils.data import synthetic_market_data, synthetic_target_weights
+from benchutils.runner import benchmark
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.backtest import Backtest, BacktestStrategy
+from tradeengine.comparison import BacktestComparison
+from tradeengine.runtime import SyncRuntime, start_actor
+from tradeengine.storage import FrameCache
+
+
+def synthetic_backtest(assets, bars) -> Backtest:
+    market_data = synthetic_market_data(assets, bars)
+    md = pd.concat(market_data.values(), axis=1, keys=market_data.keys())
+    position_values = md.xs("Close", axis=1, level=1)
+    weights = position_values / position_values.sum(axis=1).values[:, None]
+    performance = pd.DataFrame({"value": position_values.sum(axis=1)})
+    performance["return"] = performance["value"].pct_change().fillna(0)
+    performance["performance"] = (performance["return"] + 1).cumprod()
+
+    return Backtest(md, pd.DataFrame({}), pd.DataFrame({"asset": list(market_data.keys())}), position_values, weights, performance)
+
+
+@benchmark("backtest.run", assets=[5, 20], bars=[250], runtime=['threading', 'sync'], large=dict(assets=[100], bars=[2500]))
+def run_backtest(bench, assets, bars, runtime):
+    market_data = synthetic_market_data(assets, bars)
+    weights = synthetic_target_weights(market_data)
+    runtime = SyncRuntime() if runtime == 'sync' else None
+    portfolio_actor = start_actor(MemPortfolioActor, funding=100_000, runtime=runtime)
+    orderbook_actor = start_actor(
+        SQLOrderbookActor,
+        portfolio_actor, create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool),
+        runtime=runtime
+    )
+
+    try:
+        with bench.measure(ops=assets * bars):
+            BacktestStrategy(orderbook_actor, portfolio_actor, market_data).run_backtest(weights)
+    finally:
+        pykka.ActorRegistry.stop_all()
+
+
+@benchmark("backtest.save", assets=[10, 100], bars=[2500], large=dict(assets=[3000]))
+def save(bench, assets, bars):
+    backtest = synthetic_backtest(assets, bars)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with bench.measure(ops=assets * bars):
+            backtest.save(Path(tmp).joinpath("backtest"))
+
+
+@benchmark("backtest.load", assets=[10, 100], bars=[2500], touch=['performance', 'all'], large=dict(assets=[3000]))
+def load(bench, assets, bars, touch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp).joinpath("backtest")
+        synthetic_backtest(assets, bars).save(path)
+
+        with bench.measure(ops=assets * bars):
+            backtest = Backtest.load(path)
+            if touch == 'performance':
+                _ = backtest.porfolio_performance
+            else:
+                _ = [backtest.market_data, backtest.position_values, backtest.position_weights, backtest.porfolio_performance]
+
+
+@benchmark("backtest.compare", runs=[20], assets=[10, 100], bars=[2500], large=dict(runs=[50], assets=[1000]))
+def compare(bench, runs, assets, bars):
+    # summary of a sweep of stored backtests and the drill down into one of them
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_backtest(assets, bars).save(Path(tmp).joinpath("run0"))
+        for i in range(1, runs):
+            shutil.copytree(Path(tmp).joinpath("run0"), Path(tmp).joinpath(f"run{i}"))
+
+        cache = FrameCache()
+        with bench.measure(ops=runs):
+            comparison = BacktestComparison([tmp], cache=cache)
+            comparison.summary()
+
+        bench.extra["summary_cache_bytes"] = cache.nbytes
+        _ = comparison.backtest("run1").position_values
+        bench.extra["drill_down_cache_bytes"] = cache.nbytes
+
+
+@benchmark("backtest.compact", assets=[10, 100], bars=[2500], large=dict(assets=[3000]))
+def compact(bench, assets, bars):
+    backtest = synthetic_backtest(assets, bars)
+
+    with bench.measure(ops=assets * bars):
+        report = backtest.compaction_report()
+
+    bench.extra["bytes"] = int(report.loc["total", "bytes"])
+    bench.extra["compact_bytes"] = int(report.loc["total", "compact_bytes"])
+    bench.extra["saved"] = float(report.loc["total", "saved"])
+    bench.extra["max_relative_error"] = float(report.loc["total", "max_relative_error"])
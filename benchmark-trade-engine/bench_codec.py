@@ -0,0 +1,64 @@
+import json
+from dataclasses import asdict
+
+from bench_journal import bar_messages
+from benchutils.runner import benchmark
+from tradeengine.dto import QuantityOrder, Order
+from tradeengine.messages import NewOrderMessage
+from tradeengine.messages.codec import MessageCodec
+
+
+def order_messages(bar_messages):
+    return [NewOrderMessage(QuantityOrder(m.asset, 10, m.as_of, limit=m.low, id=i)) for i, m in enumerate(bar_messages)]
+
+
+def bar_to_json(message) -> str:
+    return json.dumps(asdict(message), default=str)
+
+
+@benchmark("codec.bars", assets=[100], bars=[250], format=['batch', 'single', 'json'], large=dict(assets=[1000]))
+def bars(bench, assets, bars, format):
+    messages = bar_messages(assets, bars)
+    codec = MessageCodec()
+
+    with bench.measure(ops=len(messages)):
+        match format:
+            case 'json':
+                encoded = [bar_to_json(m) for m in messages]
+                decoded = [json.loads(e) for e in encoded]
+                nr_of_bytes = sum(len(e) for e in encoded)
+            case 'single':
+                encoded = [codec.encode(m) for m in messages]
+                decoded = [codec.decode(e) for e in encoded]
+                nr_of_bytes = sum(len(e) for e in encoded)
+            case 'batch':
+                encoded = codec.encode_batch(messages)
+                decoded = codec.decode_batch(encoded)
+                nr_of_bytes = len(encoded)
+
+    assert len(decoded) == len(messages)
+    bench.extra["bytes_per_message"] = nr_of_bytes / len(messages)
+
+
+@benchmark("codec.orders", assets=[100], bars=[250], format=['batch', 'single', 'json'], large=dict(assets=[1000]))
+def orders(bench, assets, bars, format):
+    messages = order_messages(bar_messages(assets, bars))
+    codec = MessageCodec()
+
+    with bench.measure(ops=len(messages)):
+        match format:
+            case 'json':
+                encoded = [m.order.to_json() for m in messages]
+                decoded = [NewOrderMessage(Order.from_json(e)) for e in encoded]
+                nr_of_bytes = sum(len(e) for e in encoded)
+            case 'single':
+                encoded = [codec.encode(m) for m in messages]
+                decoded = [codec.decode(e) for e in encoded]
+                nr_of_bytes = sum(len(e) for e in encoded)
+            case 'batch':
+                encoded = codec.encode_batch(messages)
+                decoded = codec.decode_batch(encoded)
+                nr_of_bytes = len(encoded)
+
+    assert len(decoded) == len(messages)
+    bench.extra["bytes_per_message"] = nr_of_bytes / len(messages)
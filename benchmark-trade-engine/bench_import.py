@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchutils.runner import benchmark
+
+# optional dependencies which should only be loaded by the code paths needing them
+HEAVY_MODULES = ('dash', 'dash_bootstrap_components', 'plotly', 'datashader', 'quantstats', 'yfinance', 'sqlalchemy', 'pykka', 'tqdm', 'matplotlib')
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps(dict(seconds=time.perf_counter() - start, loaded=[m for m in {heavy} if m in sys.modules])))
+"""
+
+
+@benchmark(
+    "import",
+    module=['tradeengine', 'tradeengine.backtest', 'tradeengine.render', 'tradeengine.report', 'tradeengine.comparison', 'tradeengine.storage', 'tradeengine.plot.plot_backtest', 'tradeengine.dashboard.backtest', 'tradeengine.live'],
+)
+def import_module(bench, module):
+    # every import runs in a fresh interpreter, the measured time includes the interpreter startup like any cli call
+    script = IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+    with bench.measure(ops=1):
+        out = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True, env=env).stdout
+
+    result = json.loads(out.strip().splitlines()[-1])
+    bench.extra["import_seconds"] = result["seconds"]
+    bench.extra["heavy_modules"] = result["loaded"]
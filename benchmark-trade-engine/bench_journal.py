@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from benchutils.data import synthetic_market_data
+from benchutils.runner import benchmark
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.dto import Asset
+from tradeengine.messages import NewBarMarketData
+from tradeengine.messages.journal import JournalWriter, JournalReader
+
+
+def bar_messages(assets, bars):
+    return [
+        NewBarMarketData(Asset(s), tst, *row)
+            for s, df in synthetic_market_data(assets, bars).items()
+            for tst, row in zip(df.index.to_pydatetime(), df[["Open", "High", "Low", "Close"]].values.tolist())
+    ]
+
+
+@benchmark("journal.write", assets=[100], bars=[1000], large=dict(assets=[1000]))
+def write(bench, assets, bars):
+    messages = bar_messages(assets, bars)
+    actor = MemPortfolioActor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalWriter(os.path.join(tmp, "journal.bin"))
+        with bench.measure(ops=len(messages)):
+            for message in messages:
+                journal.record(actor, message)
+            journal.close()
+
+        bench.extra["bytes_per_message"] = os.path.getsize(journal.path) / len(messages)
+
+
+@benchmark("journal.read", assets=[100], bars=[1000], large=dict(assets=[1000]))
+def read(bench, assets, bars):
+    messages = bar_messages(assets, bars)
+    actor = MemPortfolioActor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JournalWriter(os.path.join(tmp, "journal.bin"))
+        for message in messages:
+            journal.record(actor, message)
+        journal.close()
+
+        with bench.measure(ops=len(messages)):
+            nr_of_messages = sum(1 for _ in JournalReader(journal.path))
+
+        assert nr_of_messages == len(messages)
@@ -0,0 +1,26 @@
+import pykka
+
+from benchutils.runner import benchmark
+from tradeengine.live import simulated_runtime, load_test
+
+
+@benchmark("live.throughput", assets=[200, 10], rate=[50000, 5000], duration=[2], large=dict(assets=[1000], duration=[10]))
+def throughput(bench, assets, rate, duration):
+    # the simulated feed ticks at `rate` wall clock, the measured ops are the ticks read from the feed
+    runtime = simulated_runtime(assets, rate, duration, seed=1)
+    try:
+        with bench.measure(ops=len(runtime.source)):
+            metrics = load_test(runtime, orders_per_second=10, seed=1)
+    finally:
+        pykka.ActorRegistry.stop_all()
+
+    stages = metrics["stages"]
+    bench.extra["quotes_traded"] = metrics["quotes_traded"]
+    bench.extra["coalesced"] = stages["feed"]["coalesced"]
+    bench.extra["feed_lag_s"] = runtime.source.lag_s
+    bench.extra["feed_blocked_p99_us"] = stages["feed"]["latency"]["p99_us"]
+    bench.extra["queue_wait_p99_us"] = stages["portfolio"]["queue_wait"]["p99_us"]
+    bench.extra["portfolio_p99_us"] = stages["portfolio"]["latency"]["p99_us"]
+    bench.extra["orderbook_p99_us"] = stages["orderbook"]["latency"]["p99_us"]
+    bench.extra["tick_to_trade_p99_us"] = stages["tick_to_trade"]["latency"]["p99_us"]
+    bench.extra["slas_met"] = metrics["slas_met"]
@@ -0,0 +1,99 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, StaticPool
+
+from benchutils.data import synthetic_assets
+from benchutils.mocks import PortfolioStub
+from benchutils.runner import benchmark
+from tradeengine.actors.sharded import ShardedOrderbookActor, sqlite_orderbook_factory
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.dto import QuantityOrder
+from tradeengine.messages import NewBarMarketData
+
+T0 = datetime(2000, 1, 3)
+
+
+def orderbook(backend: str, directory: str):
+    # the memory backend is an in memory sqlite database the file backend a sqlite file
+    if backend == 'memory':
+        engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(f'sqlite:///{os.path.join(directory, "orderbook.db")}')
+
+    return SQLOrderbookActor(PortfolioStub(), engine)
+
+
+def orders(assets, nr_of_orders, valid_until=None):
+    return [QuantityOrder(assets[i % len(assets)], 10, T0, valid_until=valid_until) for i in range(nr_of_orders)]
+
+
+@benchmark("orderbook.place", backend=['memory', 'file'], orders=[1000, 10000], bulk=[True, False], large=dict(orders=[100_000]))
+def place(bench, backend, orders: int, bulk: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        ob = orderbook(backend, tmp)
+        new_orders = globals()["orders"](synthetic_assets(100), orders)
+
+        with bench.measure(ops=orders):
+            if bulk:
+                ob.place_orders(new_orders)
+            else:
+                for o in new_orders: ob.place_order(o)
+
+        ob.on_stop()
+
+
+@benchmark("orderbook.evict", backend=['memory', 'file'], orders=[1000, 10000], large=dict(orders=[100_000]))
+def evict(bench, backend, orders: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = synthetic_assets(100)
+        ob = orderbook(backend, tmp)
+        ob.place_orders(globals()["orders"](assets, orders, valid_until=T0 + timedelta(days=1)))
+
+        with bench.measure(ops=orders):
+            ob._evict_orders(assets[0], T0 + timedelta(days=2))
+
+        ob.on_stop()
+
+
+@benchmark("orderbook.execute", backend=['memory', 'file'], assets=[100, 1000], large=dict(assets=[10_000]))
+def execute(bench, backend, assets: int):
+    # one executable order per asset, every market data update executes one order
+    with tempfile.TemporaryDirectory() as tmp:
+        universe = synthetic_assets(assets)
+        ob = orderbook(backend, tmp)
+        ob.place_orders(orders(universe, assets, valid_until=T0 + timedelta(days=1)))
+
+        as_of = T0 + timedelta(hours=12)
+        with bench.measure(ops=assets):
+            for asset in universe:
+                ob.new_market_data(asset, as_of, 10, 10, 10, 10, 10, 10)
+
+        assert ob.portfolio_actor.told == assets
+        ob.on_stop()
+
+
+@benchmark("orderbook.sharded_execute", shards=[0, 1, 4], assets=[1000], resting=[20], large=dict(assets=[10_000]))
+def sharded_execute(bench, shards: int, assets: int, resting: int):
+    # many resting (never matching limit) orders per asset plus one executable order per asset, all quotes of one
+    # timestamp as one batch like a replay sends them. 0 shards is the unsharded SQLOrderbookActor as baseline
+    universe = synthetic_assets(assets)
+    if shards > 0:
+        ob = ShardedOrderbookActor(PortfolioStub(), sqlite_orderbook_factory(), nr_of_shards=shards)
+    else:
+        ob = orderbook('memory', None)
+
+    ob.place_orders(
+        [QuantityOrder(a, 10, T0, limit=100.0, valid_until=T0 + timedelta(days=1)) for a in universe for _ in range(resting)]
+        + orders(universe, assets, valid_until=T0 + timedelta(days=1))
+    )
+
+    as_of = T0 + timedelta(hours=12)
+    batch = [NewBarMarketData(asset, as_of, 10, 10, 10, 10) for asset in universe]
+    with bench.measure(ops=assets):
+        ob.new_market_data_batch(batch)
+
+    # every quote and every fill
+    assert ob.portfolio_actor.told == 2 * assets
+    ob.on_stop()
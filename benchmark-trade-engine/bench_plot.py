@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from bench_backtest import synthetic_backtest
+from benchutils.runner import benchmark
+from tradeengine.backtest import Backtest
+from tradeengine.plot.plot_backtest import PlotBacktest
+from tradeengine.signals import SIGNAL_COLUMNS
+
+ORDER_TYPES = np.array(["QuantityOrder", "CloseOrder", "PercentOrder", "TargetQuantityOrder", "TargetWeightOrder"])
+
+
+def synthetic_signals(market_data: pd.DataFrame, nr_of_signals: int, seed: int = 42) -> pd.DataFrame:
+    rnd = np.random.default_rng(seed)
+    assets = market_data.columns.get_level_values(0).unique().values
+    time = market_data.index[np.sort(rnd.integers(0, len(market_data), nr_of_signals))]
+
+    df = pd.DataFrame(np.nan, index=range(nr_of_signals), columns=SIGNAL_COLUMNS)
+    df["time"] = df["valid_from"] = time
+    df["valid_until"] = pd.NaT
+    df["asset"] = rnd.choice(assets, nr_of_signals)
+    df["order_type"] = rnd.choice(ORDER_TYPES, nr_of_signals)
+    df["size"] = rnd.normal(0, 1, nr_of_signals)
+    df["order_id"] = pd.array(range(nr_of_signals), dtype="Int64")
+    return df
+
+
+def signal_backtest(assets, bars, signals) -> Backtest:
+    backtest = synthetic_backtest(assets, bars)
+    position_values = backtest.position_values.copy()
+    position_values["$$$"] = 0.0
+    orders = pd.DataFrame({"asset": [], "status": [], "execute_time": pd.to_datetime([]), "execute_value": []})
+
+    return Backtest(
+        backtest.market_data, synthetic_signals(backtest.market_data, signals), orders, position_values,
+        backtest.position_weights, backtest.porfolio_performance
+    )
+
+
+@benchmark("plot.figure", assets=[10, 50], bars=[2500], signals=[10_000, 100_000], large=dict(assets=[500], signals=[1_000_000]))
+def figure(bench, assets, bars, signals):
+    backtest = signal_backtest(assets, bars, signals)
+
+    with bench.measure(ops=signals):
+        fig = PlotBacktest(backtest, render='vector').plot_performance()
+
+    bench.extra["markers"] = sum(len(t.x) for t in fig.data if getattr(t, 'mode', None) == 'markers')
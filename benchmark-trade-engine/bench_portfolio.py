@@ -0,0 +1,124 @@
+import gc
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, StaticPool
+
+from benchutils.data import synthetic_assets
+from benchutils.runner import benchmark
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLPortfolioActor
+from tradeengine.messages.messages import NewBarMarketData
+
+T0 = datetime(2000, 1, 3)
+
+
+def portfolio(backend: str, assets):
+    if backend in ('memory', 'compact', 'delta'):
+        port = MemPortfolioActor(funding=1_000_000, compact=backend == 'compact', delta_history=backend == 'delta')
+    else:
+        port = SQLPortfolioActor(create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool), funding=1_000_000)
+
+    for a in assets:
+        port.add_new_position(a, T0, 10, 100, 0)
+
+    return port
+
+
+def evaluate(port, assets, bars):
+    for i in range(1, bars + 1):
+        as_of = T0 + timedelta(days=i)
+        for a in assets:
+            port.update_position_value(a, as_of, 100 + i * 0.01, 100 + i * 0.01)
+
+
+@benchmark("portfolio.update", backend=['memory', 'compact', 'delta', 'sql'], assets=[10, 100], bars=[250], large=dict(assets=[1000], bars=[2500]))
+def update(bench, backend, assets, bars):
+    universe = synthetic_assets(assets)
+    port = portfolio(backend, universe)
+
+    with bench.measure(ops=assets * bars):
+        evaluate(port, universe, bars)
+
+    if backend != 'sql':
+        # rows and bytes in memory, a delta history also holds its price series and evaluation timestamps
+        delta = backend == 'delta'
+        bench.extra["history_rows"] = len(port.portfolio_history) + (len(port.price_history) + len(port.ticks) if delta else 0)
+        bench.extra["history_bytes"] = port.portfolio_history.nbytes + (port.price_history.nbytes + port.ticks.nbytes if delta else 0)
+
+    port.on_stop()
+
+
+@benchmark("portfolio.performance_history", backend=['memory', 'delta', 'sql'], assets=[10, 100], bars=[250, 1000], large=dict(assets=[1000], bars=[2500]))
+def performance_history(bench, backend, assets, bars):
+    universe = synthetic_assets(assets)
+    port = portfolio(backend, universe)
+    evaluate(port, universe, bars)
+
+    with bench.measure(ops=assets * bars):
+        port.get_performance_history()
+
+    port.on_stop()
+
+
+def spilling_portfolio(budget_mb, assets, bars):
+    universe = synthetic_assets(assets)
+    port = MemPortfolioActor(funding=1_000_000, memory_budget=None if budget_mb is None else budget_mb << 20)
+    for a in universe:
+        port.add_new_position(a, T0, 10, 100, 0)
+
+    evaluate(port, universe, bars)
+    port.get_performance_history()
+    return port
+
+
+def reset_peak_rss() -> int | None:
+    # linux only: resets the peak resident set size of this process and returns the current one (bytes)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return rss("VmRSS")
+    except OSError:
+        return None
+
+
+def rss(field: str = "VmHWM") -> int:
+    # the resident set size (VmRSS) or its peak (VmHWM) in bytes, this includes the arrow memory pool and all
+    # native allocations which tracemalloc does not see
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith(field))
+
+
+@benchmark("portfolio.spill", budget_mb=[None, 1], assets=[100], bars=[1000, 4000], large=dict(bars=[20000]))
+def spill(bench, budget_mb, assets, bars):
+    gc.collect()
+    baseline = reset_peak_rss()
+    with bench.measure(ops=assets * bars):
+        port = spilling_portfolio(budget_mb, assets, bars)
+
+    if baseline is not None:
+        bench.extra["peak_rss_growth_bytes"] = rss() - baseline
+    bench.extra["history_bytes"] = port.portfolio_history.nbytes
+    bench.extra["spilled_bytes"] = port.portfolio_history.spilled_bytes
+    port.on_stop()
+
+
+@benchmark("portfolio.feed", feed=[False, True], assets=[100], bars=[250], large=dict(bars=[2500]))
+def feed(bench, feed, assets, bars):
+    # bar messages through the actor with and without publishing the position values to a live feed
+    universe = synthetic_assets(assets)
+    with tempfile.TemporaryDirectory() as tmp:
+        port = MemPortfolioActor(funding=1_000_000, feed=os.path.join(tmp, "feed") if feed else None)
+        for a in universe:
+            port.add_new_position(a, T0, 10, 100, 0)
+
+        messages = [NewBarMarketData(a, T0 + timedelta(days=i), 1, 1, 1, 100 + i * 0.01) for i in range(1, bars + 1) for a in universe]
+        with bench.measure(ops=len(messages)):
+            for message in messages:
+                port.on_receive(message)
+
+        if feed:
+            bench.extra["feed_bytes"] = os.path.getsize(os.path.join(tmp, "feed"))
+
+        port.on_stop()
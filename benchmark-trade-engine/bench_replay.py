@@ -0,0 +1,25 @@
+import pykka
+from sqlalchemy import create_engine, StaticPool
+
+from benchutils.data import synthetic_market_data
+from benchutils.runner import benchmark
+from tradeengine.actors.memory import MemPortfolioActor, PandasQuoteProviderActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.dto import Asset
+
+
+@benchmark("replay", assets=[10, 100], bars=[250, 1000], large=dict(assets=[1000, 3000]))
+def replay(bench, assets, bars):
+    # replay through the started actor system to include the messaging costs
+    market_data = {Asset(s): df for s, df in synthetic_market_data(assets, bars).items()}
+    portfolio_actor = MemPortfolioActor.start(funding=100)
+    orderbook_actor = SQLOrderbookActor.start(
+        portfolio_actor, create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    )
+
+    try:
+        quote_provider = PandasQuoteProviderActor(portfolio_actor, orderbook_actor, market_data, ["Open", "High", "Low", "Close"])
+        with bench.measure(ops=assets * bars):
+            quote_provider.replay_all_market_data()
+    finally:
+        pykka.ActorRegistry.stop_all()
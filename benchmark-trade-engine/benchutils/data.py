@@ -0,0 +1,47 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from tradeengine.dto import Asset
+
+
+def synthetic_symbols(nr_of_assets: int):
+    return [f"A{i:05d}" for i in range(nr_of_assets)]
+
+
+def synthetic_market_data(nr_of_assets: int, nr_of_bars: int, freq: str = 'B', seed: int = 42) -> Dict[str, pd.DataFrame]:
+    """
+    Generates OHLC bars of a geometric brownian motion for many assets at once.
+    """
+    rnd = np.random.default_rng(seed)
+    index = pd.date_range("2000-01-03", periods=nr_of_bars, freq=freq, name="Date")
+
+    returns = rnd.normal(0.0002, 0.02, size=(nr_of_bars, nr_of_assets))
+    close = 100 * np.exp(np.cumsum(returns, axis=0))
+    open = close * np.exp(rnd.normal(0, 0.005, size=close.shape))
+    high = np.maximum(open, close) * np.exp(np.abs(rnd.normal(0, 0.005, size=close.shape)))
+    low = np.minimum(open, close) * np.exp(-np.abs(rnd.normal(0, 0.005, size=close.shape)))
+
+    return {
+        symbol: pd.DataFrame({"Open": open[:, i], "High": high[:, i], "Low": low[:, i], "Close": close[:, i]}, index=index)
+        for i, symbol in enumerate(synthetic_symbols(nr_of_assets))
+    }
+
+
+def synthetic_target_weights(market_data: Dict[str, pd.DataFrame], rebalance_every: int = 20, seed: int = 42) -> pd.DataFrame:
+    """
+    Generates a wide target weight matrix which rebalances into random long only weights every n bars.
+    """
+    rnd = np.random.default_rng(seed)
+    index = next(iter(market_data.values())).index
+    weights = pd.DataFrame(np.nan, index=index, columns=list(market_data.keys()))
+
+    rebalance = index[::rebalance_every]
+    w = rnd.random((len(rebalance), len(market_data)))
+    weights.loc[rebalance] = 0.98 * w / w.sum(axis=1, keepdims=True)
+    return weights
+
+
+def synthetic_assets(nr_of_assets: int):
+    return [Asset(s) for s in synthetic_symbols(nr_of_assets)]
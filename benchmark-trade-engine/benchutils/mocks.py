@@ -0,0 +1,14 @@
+from tradeengine.dto.portfolio import PortfolioValue
+
+
+class PortfolioStub():
+
+    def __init__(self, portfolio_value: PortfolioValue = PortfolioValue(1_000_000, {})):
+        self.portfolio_value = portfolio_value
+        self.told = 0
+
+    def ask(self, *args, **kwargs):
+        return self.portfolio_value
+
+    def tell(self, *args, **kwargs):
+        self.told += 1
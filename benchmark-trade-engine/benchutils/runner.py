@@ -0,0 +1,163 @@
+import gc
+import importlib
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Any
+
+BENCHMARKS: List['Benchmark'] = []
+PRESETS = ('quick', 'default', 'large')
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable
+    params: Dict[str, List[Any]]
+    large: Dict[str, List[Any]] | None = None
+
+    def grid(self, preset: str) -> List[Dict[str, Any]]:
+        match preset:
+            case 'quick':
+                params = {k: v[:1] for k, v in self.params.items()}
+            case 'large':
+                params = {**self.params, **(self.large or {})}
+            case _:
+                params = self.params
+
+        return [dict(zip(params.keys(), values)) for values in itertools.product(*params.values())]
+
+
+def benchmark(name: str, large: Dict[str, List[Any]] = None, **params: List[Any]):
+    """
+    Registers a benchmark function `func(bench: Measurement, **params)`. The function does its setup and wraps the
+    code to measure in `with bench.measure(ops=...)`. Each parameter is a list of values, the quick preset only uses
+    the first value of each parameter while the large preset replaces the given parameters by the `large` ones.
+    """
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, func, params, large))
+        return func
+
+    return decorator
+
+
+@dataclass
+class Measurement:
+    trace_memory: bool = False
+    seconds: float = 0
+    ops: int = 0
+    peak_memory_bytes: int | None = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @contextmanager
+    def measure(self, ops: int = 1):
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.ops += ops
+
+            if self.trace_memory:
+                self.peak_memory_bytes = max(self.peak_memory_bytes or 0, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+
+@dataclass
+class Result:
+    name: str
+    params: Dict[str, Any]
+    seconds: float
+    ops: int
+    ops_per_sec: float
+    peak_memory_bytes: int | None
+    extra: Dict[str, Any]
+
+    @property
+    def key(self):
+        return f"{self.name}[{', '.join(f'{k}={v}' for k, v in self.params.items())}]"
+
+
+def discover(directory: Path):
+    for file in sorted(directory.glob("bench_*.py")):
+        importlib.import_module(file.stem)
+
+
+def run(preset: str = 'default', repeat: int = 3, memory: bool = True, name_filter: str | None = None) -> List[Result]:
+    results = []
+    for bm in BENCHMARKS:
+        if name_filter is not None and name_filter not in bm.name: continue
+
+        for params in bm.grid(preset):
+            # timing runs are never traced as tracemalloc slows down everything
+            timings = []
+            for _ in range(repeat):
+                m = Measurement()
+                bm.func(m, **params)
+                timings.append(m)
+
+            best = min(timings, key=lambda m: m.seconds)
+            peak = None
+            if memory:
+                m = Measurement(trace_memory=True)
+                bm.func(m, **params)
+                peak = m.peak_memory_bytes
+
+            result = Result(bm.name, params, best.seconds, best.ops, best.ops / best.seconds if best.seconds > 0 else float('nan'), peak, best.extra)
+            print(f"{result.key:<70} {result.seconds:10.4f}s {result.ops_per_sec:14.1f} ops/s {_mb(peak):>10}", file=sys.stderr)
+            results.append(result)
+
+    return results
+
+
+def save(results: List[Result], file: str, preset: str):
+    with open(file, 'w') as f:
+        json.dump(dict(meta=_meta(preset), results=[asdict(r) for r in results]), f, indent=1)
+
+
+def compare(results: List[Result], baseline_file: str):
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    base = {Result(**r).key: Result(**r) for r in baseline["results"]}
+    print(f"\ncompared to {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'benchmark':<70} {'base s':>10} {'new s':>10} {'speedup':>8} {'base mem':>10} {'new mem':>10}")
+    for r in results:
+        b = base.get(r.key)
+        if b is None:
+            print(f"{r.key:<70} {'-':>10} {r.seconds:10.4f}")
+            continue
+
+        speedup = b.seconds / r.seconds if r.seconds > 0 else float('nan')
+        print(f"{r.key:<70} {b.seconds:10.4f} {r.seconds:10.4f} {speedup:7.2f}x {_mb(b.peak_memory_bytes):>10} {_mb(r.peak_memory_bytes):>10}")
+
+
+def _mb(nr_of_bytes):
+    return '-' if nr_of_bytes is None else f"{nr_of_bytes / 1024 ** 2:.1f}MB"
+
+
+def _meta(preset: str):
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        commit = None
+
+    return dict(
+        commit=commit,
+        preset=preset,
+        timestamp=datetime.now().isoformat(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+    )
@@ -0,0 +1,33 @@
+import os
+import warnings
+from pathlib import Path
+
+import click
+
+# the replay progress bar and pandas warnings only distort the measurements
+os.environ.setdefault("TQDM_DISABLE", "1")
+warnings.filterwarnings("ignore")
+
+from benchutils import runner
+
+
+@click.command()
+@click.option('-p', '--preset', type=click.Choice(runner.PRESETS), default='default', help="universe sizes and history lengths to run")
+@click.option('-k', '--filter', 'name_filter', type=str, default=None, help="only run benchmarks containing this string")
+@click.option('-r', '--repeat', type=int, default=3, help="number of timing runs (the fastest is reported)")
+@click.option('--no-memory', is_flag=True, default=False, help="skip the (slow) traced run measuring peak memory")
+@click.option('-o', '--out', type=str, default=None, help="write the results as json to this file")
+@click.option('-c', '--compare', type=str, default=None, help="compare the results to a json file of a previous run")
+def cli(preset, name_filter, repeat, no_memory, out, compare):
+    runner.discover(Path(__file__).parent)
+    results = runner.run(preset, repeat, not no_memory, name_filter)
+
+    if out is not None:
+        runner.save(results, out, preset)
+
+    if compare is not None:
+        runner.compare(results, compare)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from datetime import datetime
+from unittest import TestCase
+
+import pykka
+
+from testutils.data import AAPL, AAPL_MSFT_MD_FRAMES
+from testutils.database import get_sqlite_engine
+from testutils.trading import sample_strategy
+from tradeengine.actors.market_data_actor import AbstractQuoteProviderActor
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.backtest import BacktestStrategy
+from tradeengine.dto import QuantityOrder
+from tradeengine.messages import NewOrderMessage, NewBarMarketData, PortfolioValueMessage, AllExecutedOrderHistory
+from tradeengine.runtime import AsyncRuntime, start_actor
+
+
+class SlowStartingActor(pykka.ThreadingActor):
+
+    def __init__(self, stopped: list):
+        super().__init__()
+        time.sleep(0.2)
+        self.stopped = stopped
+
+    def on_start(self):
+        time.sleep(0.2)
+
+    def on_stop(self):
+        self.stopped.append(self)
+
+
+class SleepingActor(pykka.ThreadingActor):
+
+    def on_receive(self, message):
+        time.sleep(message)
+        return message
+
+
+async def bars(days):
+    for day in days:
+        await asyncio.sleep(0)
+        yield NewBarMarketData(AAPL, datetime(2020, 1, day), 10, 11, 9, 10.5)
+
+
+class TestAsyncRuntime(TestCase):
+
+    def test_live_trading_flow(self):
+        async def main():
+            runtime = AsyncRuntime()
+            portfolio = await start_actor(MemPortfolioActor, funding=100, runtime=runtime)
+            orderbook = await start_actor(SQLOrderbookActor, portfolio, get_sqlite_engine(False), runtime=runtime)
+            quotes = await start_actor(AbstractQuoteProviderActor, portfolio, orderbook, runtime=runtime)
+
+            try:
+                await orderbook.ask_async(NewOrderMessage(QuantityOrder(AAPL, 5, datetime(2020, 1, 1))))
+
+                # the blocking api still works from other threads
+                full_orderbook = await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: orderbook.proxy().get_full_orderbook().get()
+                )
+
+                self.assertEqual(await runtime.feed(bars(range(2, 6)), quotes), 4)
+
+                executed = await orderbook.ask_async(AllExecutedOrderHistory())
+                return full_orderbook, executed, await portfolio.ask_async(PortfolioValueMessage())
+            finally:
+                await runtime.stop_all()
+
+        full_orderbook, executed, portfolio_value = asyncio.run(main())
+        self.assertEqual(len(full_orderbook), 1)
+        self.assertEqual(len(executed), 1)
+        self.assertEqual(portfolio_value.positions[AAPL].qty, 5)
+        self.assertAlmostEqual(portfolio_value.cash, 100 - 5 * 10.5)
+
+    def test_timeout_keeps_loop_responsive(self):
+        async def main():
+            runtime = AsyncRuntime()
+            actor = await runtime.start(SleepingActor)
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.create_task(tick())
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await actor.ask_async(0.3, timeout=0.05)
+
+                # the actor is still alive and answers once the sleep is over
+                self.assertEqual(await actor.ask_async(0), 0)
+                return ticks
+            finally:
+                ticker.cancel()
+                await runtime.stop_all()
+
+        self.assertGreater(asyncio.run(main()), 10)
+
+    def test_stop_all(self):
+        async def main():
+            runtime = AsyncRuntime()
+            portfolio = await runtime.start(MemPortfolioActor, funding=100)
+            await runtime.stop_all()
+
+            self.assertFalse(portfolio.is_alive())
+            with self.assertRaises(pykka.ActorDeadError):
+                await portfolio.ask_async(PortfolioValueMessage())
+
+        asyncio.run(main())
+
+    def test_start_keeps_loop_responsive(self):
+        async def main():
+            runtime = AsyncRuntime()
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.create_task(tick())
+            try:
+                # the constructor and on_start run on the actor thread
+                await runtime.start(SlowStartingActor, [])
+                return ticks
+            finally:
+                ticker.cancel()
+                await runtime.stop_all()
+
+        self.assertGreater(asyncio.run(main()), 10)
+
+    def test_registry_stops_async_actors(self):
+        async def main():
+            runtime = AsyncRuntime()
+            stopped = []
+            actor = await runtime.start(SlowStartingActor, stopped)
+
+            # a strategy running in another thread shuts the actors down like threading actors
+            await asyncio.get_running_loop().run_in_executor(None, pykka.ActorRegistry.stop_all)
+            await runtime.stop_all()
+            return actor, stopped
+
+        actor, stopped = asyncio.run(main())
+        self.assertFalse(actor.is_alive())
+        self.assertEqual(len(stopped), 1)
+
+    def test_backtest_in_executor(self):
+        frames = {k: v.iloc[-100:] for k, v in AAPL_MSFT_MD_FRAMES.items()}
+        signal = {k: v["order"] for k, v in sample_strategy(frames, 'swing', slow=10, fast=3, signal_only=False).items()}
+
+        async def main():
+            runtime = AsyncRuntime()
+            portfolio = await runtime.start(MemPortfolioActor, funding=100)
+            orderbook = await runtime.start(SQLOrderbookActor, portfolio, get_sqlite_engine(False))
+
+            try:
+                strategy = BacktestStrategy(orderbook, portfolio, frames)
+                backtest = await asyncio.get_running_loop().run_in_executor(None, strategy.run_backtest, signal)
+
+                # shut down by the backtest through the actor registry, including the quote provider it started
+                return backtest, [a.is_alive() for a in runtime.actor_refs]
+            finally:
+                await runtime.stop_all()
+
+        backtest, alive = asyncio.run(main())
+        self.assertGreater(len(backtest.orders), 0)
+        self.assertEqual(alive, [False, False, False])
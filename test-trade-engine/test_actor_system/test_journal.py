@@ -0,0 +1,82 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import TestCase
+
+import pandas as pd
+import pykka
+
+from testutils.data import AAPL_MSFT_MD_FRAMES, AAPL, MSFT
+from testutils.database import get_sqlite_engine
+from testutils.trading import swing_backtest
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.dto import QuantityOrder
+from tradeengine.messages import NewBarMarketData, NewBidAskMarketData, NewPositionMessage, NewOrderMessage, \
+    AllExecutedOrderHistory, PortfolioPerformanceMessage
+from tradeengine.messages.journal import JournalWriter, JournalReader, replay_journal, start_journal, stop_journal
+from tradeengine.runtime import SyncRuntime
+
+
+class TestJournal(TestCase):
+
+    def tearDown(self) -> None:
+        stop_journal()
+        pykka.ActorRegistry.stop_all()
+
+    def test_round_trip(self):
+        portfolio = MemPortfolioActor(funding=100)
+        orderbook = SQLOrderbookActor(None, get_sqlite_engine(False))
+        messages = [
+            (portfolio, NewBarMarketData(AAPL, datetime(2020, 1, 2, 15, 30, 0, 123), 10.0, 11.0, 9.0, 10.5)),
+            (orderbook, NewBidAskMarketData(MSFT, datetime(2020, 1, 2), 1.5, 1.6)),
+            (portfolio, NewPositionMessage(AAPL, datetime(2020, 1, 3), 10, 10.5, 0.1)),
+            (orderbook, NewOrderMessage(QuantityOrder(MSFT, 10, datetime(2020, 1, 1)))),
+            (portfolio, NewBidAskMarketData(AAPL, datetime(2020, 1, 2, tzinfo=timezone.utc), 1.5, 1.6)),
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.bin")
+            journal = JournalWriter(path)
+            for actor, message in messages:
+                journal.record(actor, message)
+            journal.close()
+
+            entries = list(JournalReader(path))
+            self.assertListEqual([m for _, m in messages], [e.message for e in entries])
+            self.assertListEqual(["portfolio", "orderbook", "portfolio", "orderbook", "portfolio"], [e.actor for e in entries])
+
+            # a crashed process leaves an incomplete last record which is ignored
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - 3)
+
+            self.assertEqual(len(list(JournalReader(path))), len(messages) - 1)
+
+    def test_record_after_close(self):
+        # an actor may still hold the journal when it gets stopped concurrently
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.bin")
+            journal = JournalWriter(path)
+            journal.record(MemPortfolioActor(funding=100), NewBidAskMarketData(MSFT, datetime(2020, 1, 2), 1.5, 1.6))
+            journal.close()
+
+            journal.record(MemPortfolioActor(funding=100), NewBidAskMarketData(MSFT, datetime(2020, 1, 3), 1.5, 1.6))
+            journal.flush()
+            self.assertEqual(len(list(JournalReader(path))), 1)
+
+    def test_replay_backtest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.bin")
+            start_journal(path)
+            backtest = swing_backtest(runtime=SyncRuntime(), stop=False)
+            stop_journal()
+
+            # replay the recorded stream into fresh actors
+            runtime = SyncRuntime()
+            portfolio_actor = runtime.start(MemPortfolioActor, funding=100)
+            orderbook_actor = runtime.start(SQLOrderbookActor, portfolio_actor, get_sqlite_engine(False))
+            replayed = replay_journal(path, dict(portfolio=portfolio_actor, orderbook=orderbook_actor))
+
+            self.assertGreater(replayed, 2 * len(AAPL_MSFT_MD_FRAMES["AAPL"]))
+            pd.testing.assert_frame_equal(orderbook_actor.ask(AllExecutedOrderHistory(include_evicted=True)), backtest.orders)
+            pd.testing.assert_frame_equal(portfolio_actor.ask(PortfolioPerformanceMessage(resample_rule='D'))[-1], backtest.porfolio_performance)
@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import pykka
+
+from testutils.data import AAPL, MSFT
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.dto import QuantityOrder
+from tradeengine.live import CoalescingQueue, LatencySLA, LiveRuntime, SimulatedExchangeActor, SimulatedFeed, \
+    StageMetrics, simulated_runtime, STAGES
+from tradeengine.messages import NewBidAskMarketData, NewBarMarketData, AllExecutedOrderHistory, PortfolioValueMessage
+
+
+def quote(asset, second, price=10.0):
+    return NewBidAskMarketData(asset, datetime(2020, 1, 1, 0, 0, second), price, price + 0.1)
+
+
+class TestCoalescingQueue(TestCase):
+
+    def test_coalesce_stale_quotes(self):
+        inbox = CoalescingQueue(10)
+        inbox.put(quote(AAPL, 1))
+        inbox.put(quote(MSFT, 2))
+        inbox.put(quote(AAPL, 3, 11))
+        inbox.put(quote(AAPL, 0, 9))  # out of order, older than the pending quote
+        inbox.put(NewBarMarketData(AAPL, datetime(2020, 1, 1), 1, 2, 0.5, 1.5))
+        inbox.put(NewBarMarketData(AAPL, datetime(2020, 1, 2), 1, 2, 0.5, 1.5))
+        inbox.close()
+
+        messages = []
+        while (item := inbox.get()) is not None:
+            messages.append(item[2])
+
+        # the latest quote of AAPL at the position of its arrival, bars are never coalesced
+        self.assertEqual([m.asset for m in messages], [MSFT, AAPL, AAPL, AAPL])
+        self.assertEqual(messages[1], quote(AAPL, 3, 11))
+        self.assertEqual(inbox.coalesced, 2)
+
+    def test_drop_oldest(self):
+        inbox = CoalescingQueue(2, 'drop_oldest')
+        for second, asset in enumerate((AAPL, MSFT, AAPL, "TLT")):
+            inbox.put(quote(asset, second))
+
+        self.assertEqual(len(inbox), 2)
+        self.assertEqual((inbox.coalesced, inbox.dropped), (1, 1))
+        self.assertEqual(inbox.get()[2], quote(AAPL, 2))
+
+    def test_backpressure(self):
+        inbox = CoalescingQueue(1)
+        inbox.put(quote(AAPL, 1))
+        producer = threading.Thread(target=inbox.put, args=(quote(MSFT, 2),))
+        producer.start()
+
+        # the producer blocks until the consumer made room
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(inbox.get()[2], quote(AAPL, 1))
+        producer.join(1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(inbox.get()[2], quote(MSFT, 2))
+        self.assertGreater(inbox.blocked_ns, 0)
+
+        # closing releases blocked producers
+        inbox.put(quote(AAPL, 3))
+        producer = threading.Thread(target=inbox.put, args=(quote(MSFT, 4),))
+        producer.start()
+        inbox.close()
+        producer.join(1)
+        self.assertFalse(producer.is_alive())
+        self.assertFalse(inbox.put(quote(MSFT, 5)))
+
+
+class TestStageMetrics(TestCase):
+
+    def test_queue_wait_budget(self):
+        metrics = StageMetrics('portfolio', LatencySLA(10, quantile=0.5, queue_wait_us=100))
+        metrics.record(5_000, 50_000)
+        metrics.record(5_000, 500_000)
+        self.assertTrue(metrics.snapshot()['sla']['met'])
+
+        # the latency is within its budget but the quotes waited too long in the inbox
+        metrics.record(5_000, 500_000)
+        sla = metrics.snapshot()['sla']
+        self.assertEqual((sla['violations'], sla['queue_wait_violations']), (0, 2))
+        self.assertFalse(sla['met'])
+
+
+class TestLiveRuntime(TestCase):
+
+    def tearDown(self) -> None:
+        pykka.ActorRegistry.stop_all()
+
+    def test_simulated_session(self):
+        runtime = simulated_runtime(5, ticks_per_second=2000, duration=0.5, funding=1000, seed=1)
+        runtime.place_orders([QuantityOrder(runtime.source.assets[0], 2, datetime.now() - timedelta(seconds=1))])
+        metrics = runtime.run()
+
+        self.assertEqual(metrics["ticks"], len(runtime.source))
+        self.assertEqual(metrics["quotes_traded"] + metrics["stages"]["feed"]["coalesced"], metrics["ticks"])
+        self.assertEqual(metrics["stages"]["portfolio"]["latency"]["count"], metrics["quotes_traded"])
+        self.assertTrue(all(metrics["stages"][name]["sla"] is not None for name in STAGES))
+        self.assertIsNotNone(metrics["stages"]["portfolio"]["sla"]["queue_wait_us"])
+
+        executed = runtime.orderbook_actor.ask(AllExecutedOrderHistory())
+        portfolio_value = runtime.portfolio_actor.ask(PortfolioValueMessage())
+        self.assertEqual(len(executed), 1)
+        self.assertEqual(portfolio_value.positions[runtime.source.assets[0]].qty, 2)
+
+    def test_in_order_feed_under_load(self):
+        # a few assets at a high rate coalesce most of the quotes, an in order feed is dispatched in order
+        runtime = simulated_runtime(3, ticks_per_second=20000, duration=0.5, funding=1000, seed=1)
+        metrics = runtime.run()
+
+        self.assertGreater(metrics["stages"]["feed"]["coalesced"], 0)
+        self.assertEqual(metrics["restamped"], 0)
+
+    def test_out_of_order_quotes(self):
+        portfolio = MemPortfolioActor.start(funding=100, funding_date=datetime(2019, 1, 1))
+        orderbook = SimulatedExchangeActor.start(portfolio)
+        runtime = LiveRuntime(portfolio, orderbook, [quote(AAPL, 2), quote(MSFT, 1)], slas={'portfolio': LatencySLA(0)})
+        runtime.place_orders([QuantityOrder(MSFT, 1, datetime(2020, 1, 1)), QuantityOrder(AAPL, 1, datetime(2020, 1, 1))])
+        metrics = runtime.run()
+
+        # the quote of MSFT is dated at the AAPL quote dispatched before, the portfolio never gets backdated
+        self.assertEqual(metrics["restamped"], 1)
+        self.assertEqual(metrics["quotes_traded"], 2)
+        self.assertFalse(metrics["slas_met"])
+        self.assertEqual(len(runtime.orderbook_actor.ask(AllExecutedOrderHistory())), 2)
+        self.assertTrue(portfolio.is_alive())
+
+    def test_stops_if_an_actor_dies(self):
+        portfolio = MemPortfolioActor.start(funding=100)
+        orderbook = SimulatedExchangeActor.start(portfolio)
+        runtime = LiveRuntime(portfolio, orderbook, SimulatedFeed(2, ticks_per_second=1000, duration=60), inbox_size=4)
+        runtime.start()
+        time.sleep(0.1)
+        portfolio.stop()
+
+        self.assertTrue(runtime.join(5))
+        self.assertLess(runtime.ticks, 60_000)
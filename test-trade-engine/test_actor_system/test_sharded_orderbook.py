@@ -0,0 +1,54 @@
+from datetime import datetime
+from unittest import TestCase
+
+import pandas as pd
+import pykka
+
+from testutils.data import AAPL_MSFT_TLT_MD_FRAMES, AAPL, MSFT
+from testutils.trading import swing_backtest
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sharded import ShardedOrderbookActor, sqlite_orderbook_factory
+from tradeengine.dto import QuantityOrder
+from tradeengine.messages import NewOrdersMessage, AllExecutedOrderHistory, NewBarMarketData
+
+
+class TestShardedOrderbook(TestCase):
+
+    def tearDown(self) -> None:
+        pykka.ActorRegistry.stop_all()
+
+    def test_place_orders(self):
+        portfolio = MemPortfolioActor.start(funding=100)
+        orderbook = ShardedOrderbookActor.start(portfolio, sqlite_orderbook_factory(), nr_of_shards=3)
+
+        orders = [QuantityOrder(asset, 1, datetime(2020, 1, day)) for day in range(1, 5) for asset in [AAPL, MSFT]]
+        placed = orderbook.ask(NewOrdersMessage(orders))
+
+        self.assertListEqual([o.asset for o in placed], [o.asset for o in orders])
+        self.assertEqual(len(set(o.id for o in placed)), len(orders))
+        self.assertEqual(len(orderbook.proxy().get_full_orderbook().get()), len(orders))
+        self.assertEqual(len(orderbook.ask(AllExecutedOrderHistory())), 0)
+
+        # the executed orders carry the ids of the placed orders
+        for day in (2, 3):
+            orderbook.ask(NewBarMarketData(AAPL, datetime(2020, 1, day), 10, 11, 9, 10.5))
+            orderbook.ask(NewBarMarketData(MSFT, datetime(2020, 1, day), 10, 11, 9, 10.5))
+
+        executed = orderbook.ask(AllExecutedOrderHistory())
+        ids = {o.id: (str(o.asset), o.valid_from) for o in placed}
+        self.assertEqual(len(executed), 6)
+        self.assertListEqual([ids[i] for i in executed["order_id"]], list(zip(executed["asset"], executed["valid_from"])))
+
+    def test_same_as_single_orderbook(self):
+        single = swing_backtest(AAPL_MSFT_TLT_MD_FRAMES)
+        sharded = swing_backtest(AAPL_MSFT_TLT_MD_FRAMES, orderbook=lambda p: ShardedOrderbookActor.start(p, sqlite_orderbook_factory(), nr_of_shards=2))
+
+        # relative (target weight) orders need to see the very same portfolio values
+        pd.testing.assert_frame_equal(sharded.orders.drop(["id", "order_id"], axis=1), single.orders.drop(["id", "order_id"], axis=1))
+        pd.testing.assert_frame_equal(sharded.signals.drop("order_id", axis=1), single.signals.drop("order_id", axis=1))
+        pd.testing.assert_frame_equal(sharded.position_values, single.position_values)
+
+        linked = sharded.signals.merge(sharded.orders, on="order_id", suffixes=("_signal", "_order"))
+        self.assertEqual(len(linked), len(sharded.signals))
+        self.assertListEqual(linked["asset_signal"].tolist(), linked["asset_order"].tolist())
+        pd.testing.assert_frame_equal(sharded.porfolio_performance, single.porfolio_performance)
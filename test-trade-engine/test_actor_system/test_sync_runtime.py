@@ -0,0 +1,73 @@
+from datetime import datetime
+from unittest import TestCase
+
+import pandas as pd
+import pykka
+
+from testutils.data import AAPL
+from testutils.database import get_sqlite_engine
+from testutils.trading import swing_backtest
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.dto import QuantityOrder
+from tradeengine.messages import NewOrderMessage, NewBarMarketData, PortfolioValueMessage
+from tradeengine.runtime import SyncRuntime, SyncActorRef, start_actor
+
+
+class RecordingActor(pykka.ThreadingActor):
+
+    def __init__(self, log, forward_to=None):
+        super().__init__()
+        self.log = log
+        self.forward_to = forward_to
+
+    def on_receive(self, message):
+        self.log.append((self.forward_to is None, message))
+        if self.forward_to is not None:
+            self.forward_to.tell(message)
+            self.forward_to.tell(message + 1)
+
+        return message
+
+
+class TestSyncRuntime(TestCase):
+
+    def tearDown(self) -> None:
+        pykka.ActorRegistry.stop_all()
+
+    def test_tell_order(self):
+        runtime, log = SyncRuntime(), []
+        sink = runtime.start(RecordingActor, log)
+        source = runtime.start(RecordingActor, log, sink)
+
+        source.tell(1)
+        source.tell(10)
+        self.assertEqual(source.ask(100), 100)
+        self.assertListEqual(
+            [(False, 1), (True, 1), (True, 2), (False, 10), (True, 10), (True, 11), (False, 100), (True, 100), (True, 101)],
+            log
+        )
+
+    def test_proxy_and_stop(self):
+        runtime = SyncRuntime()
+        portfolio = runtime.start(MemPortfolioActor, funding=100)
+        orderbook = start_actor(SQLOrderbookActor, portfolio, get_sqlite_engine(False), runtime=runtime)
+        self.assertIsInstance(orderbook, SyncActorRef)
+
+        orderbook.ask(NewOrderMessage(QuantityOrder(AAPL, 10, datetime(2020, 1, 1))))
+        self.assertEqual(len(orderbook.proxy().get_full_orderbook().get()), 1)
+
+        orderbook.ask(NewBarMarketData(AAPL, datetime(2020, 1, 2), 10, 11, 9, 10.5))
+        self.assertEqual(portfolio.ask(PortfolioValueMessage()).positions[AAPL].qty, 10)
+
+        pykka.ActorRegistry.stop_all()
+        self.assertFalse(orderbook.is_alive())
+        self.assertFalse(portfolio.is_alive())
+        self.assertRaises(pykka.ActorDeadError, portfolio.ask, PortfolioValueMessage())
+
+    def test_backtest_same_as_threading(self):
+        threaded, synchronous = swing_backtest(), swing_backtest(runtime=SyncRuntime())
+        pd.testing.assert_frame_equal(synchronous.signals, threaded.signals)
+        pd.testing.assert_frame_equal(synchronous.orders, threaded.orders)
+        pd.testing.assert_frame_equal(synchronous.position_values, threaded.position_values)
+        pd.testing.assert_frame_equal(synchronous.porfolio_performance, threaded.porfolio_performance)
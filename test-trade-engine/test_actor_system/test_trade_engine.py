@@ -33,7 +33,7 @@ class TestActorTradeEngine(TestCase):
             market_data_extra_data=sma_signal_info
         ).run_backtest(signal)
 
-        file = TEST_ROOT.joinpath('../notebooks/strategy-long-aapl.hdf5')
+        file = TEST_ROOT.joinpath('../notebooks/strategy-long-aapl')
         backtest.save(file)
 
         expected_backtest = Backtest.load(Path(__file__).parent.joinpath("strategy-long-aapl.hdf5"))
@@ -61,7 +61,7 @@ class TestActorTradeEngine(TestCase):
             market_data_extra_data=sma_signal_info
         ).run_backtest(signal)
 
-        file = TEST_ROOT.joinpath('../notebooks/strategy-swing-aapl.hdf5')
+        file = TEST_ROOT.joinpath('../notebooks/strategy-swing-aapl')
         backtest.save(file)
 
         expected_backtest = Backtest.load(Path(__file__).parent.joinpath("strategy-swing-aapl.hdf5"))
@@ -89,7 +89,7 @@ class TestActorTradeEngine(TestCase):
             market_data_extra_data=sma_signal_info
         ).run_backtest(signal)
 
-        file = TEST_ROOT.joinpath('../notebooks/strategy-swing-all.hdf5')
+        file = TEST_ROOT.joinpath('../notebooks/strategy-swing-all')
         backtest.save(file)
 
         expected_backtest = Backtest.load(Path(__file__).parent.joinpath("strategy-swing-all.hdf5"))
@@ -114,7 +114,7 @@ class TestActorTradeEngine(TestCase):
             frames,
         ).run_backtest(signal)
 
-        file = TEST_ROOT.joinpath('../notebooks/strategy-long-1oN.hdf5')
+        file = TEST_ROOT.joinpath('../notebooks/strategy-long-1oN')
         backtest.save(file)
 
         expected_backtest = Backtest.load(Path(__file__).parent.joinpath("strategy-long-1oN.hdf5"))
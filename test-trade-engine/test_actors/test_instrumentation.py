@@ -0,0 +1,73 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+import pykka
+
+from testutils.data import AAPL
+from testutils.database import get_sqlite_engine
+from tradeengine.actors.instrumentation import enable_instrumentation, LatencyHistogram
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.dto import QuantityOrder
+from tradeengine.messages.messages import ActorMetricsMessage, NewOrderMessage, NewBarMarketData
+
+
+class TestInstrumentation(TestCase):
+
+    def tearDown(self) -> None:
+        enable_instrumentation(False)
+        pykka.ActorRegistry.stop_all()
+
+    def test_disabled_by_default(self):
+        portfolio = MemPortfolioActor.start()
+        self.assertIsNone(portfolio.ask(ActorMetricsMessage()))
+
+    def test_actor_metrics(self):
+        enable_instrumentation()
+        portfolio = MemPortfolioActor.start()
+        orderbook = SQLOrderbookActor.start(portfolio, get_sqlite_engine(False))
+
+        orderbook.ask(NewOrderMessage(QuantityOrder(AAPL, 10, datetime(2020, 1, 1))))
+        for day in range(2, 5):
+            bar = NewBarMarketData(AAPL, datetime(2020, 1, day), 10, 11, 9, 10.5)
+            portfolio.ask(bar)
+            orderbook.ask(bar)
+
+        metrics = orderbook.ask(ActorMetricsMessage())
+        self.assertEqual(metrics["messages"]["NewOrderMessage"]["count"], 1)
+        self.assertEqual(metrics["messages"]["NewBarMarketData"]["count"], 3)
+        self.assertIsNotNone(metrics["messages"]["NewBarMarketData"]["queue_wait"])
+        self.assertIn("sql.INSERT", metrics["backend"])
+        self.assertIn("sql.SELECT", metrics["backend"])
+
+        metrics = portfolio.ask(ActorMetricsMessage())
+        self.assertEqual(metrics["messages"]["NewBarMarketData"]["count"], 3)
+        self.assertEqual(metrics["messages"]["NewPositionMessage"]["count"], 1)
+        self.assertGreater(metrics["backend"]["history_append"]["count"], 3)
+
+    def test_dump_on_stop(self):
+        enable_instrumentation()
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ["TRADEENGINE_METRICS_DIR"] = directory
+            try:
+                portfolio = MemPortfolioActor.start()
+                portfolio.ask(NewBarMarketData(AAPL, datetime(2020, 1, 2), 10, 11, 9, 10.5))
+                portfolio.stop()
+            finally:
+                del os.environ["TRADEENGINE_METRICS_DIR"]
+
+            files = os.listdir(directory)
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith("MemPortfolioActor-"))
+
+    def test_histogram_percentiles(self):
+        h = LatencyHistogram()
+        for ns in [100] * 98 + [10_000, 1_000_000]:
+            h.record(ns)
+
+        self.assertEqual(h.count, 100)
+        self.assertEqual(h.percentile(0.5), 128)
+        self.assertEqual(h.percentile(1.0), 1_000_000)
+        self.assertEqual(h.to_dict()["min_us"], 0.1)
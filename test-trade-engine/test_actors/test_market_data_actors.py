@@ -6,7 +6,8 @@ import pandas.testing
 
 from testutils.mocks import MockActor
 from tradeengine.actors.memory.market_data_actor import PandasQuoteProviderActor
-from tradeengine.dto import Asset
+from tradeengine.dto import ASSETS, Asset
+from tradeengine.messages.codec import to_ns
 
 
 class TestMarketDataActors(TestCase):
@@ -24,3 +25,6 @@ class TestMarketDataActors(TestCase):
         df = pd.DataFrame(pa.received)
         self.assertListEqual(df["as_of"].to_list(), df["as_of"].sort_values().to_list())
 
+        # the asset ids and timestamps are converted once and carried through the messages
+        self.assertListEqual([m.asset_id for m in pa.received], [ASSETS.id_of(m.asset) for m in pa.received])
+        self.assertListEqual([m.as_of_ns for m in pa.received], [to_ns(m.as_of) for m in pa.received])
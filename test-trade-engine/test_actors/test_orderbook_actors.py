@@ -1,3 +1,5 @@
+import os
+import tempfile
 from datetime import datetime, timedelta
 from functools import partial
 from unittest import TestCase
@@ -51,6 +53,33 @@ class TestOrderBookActors(TestCase):
 
         ob.on_stop()
 
+    def test_open_order_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'orderbook.db')}")
+            self.assertFalse(SQLOrderbookActor(None, engine).indexed)
+
+            ob = SQLOrderbookActor(None, engine, exclusive=True)
+            ob.place_orders([QuantityOrder(AAPL, 12, datetime(2020, 1, 1)), QuantityOrder(AAPL, 1, datetime(2020, 1, 1), valid_until=datetime(2020, 1, 5))])
+
+            self.assertEqual(ob.open_orders[ob.assets.id_of(AAPL)], 2)
+            self.assertEqual(ob._get_orders_for_execution(Asset("MSFT"), datetime(2020, 1, 1), 2, 2, 2, 2, 2, 2), [])
+            self.assertEqual(ob._evict_orders(AAPL, datetime(2020, 1, 2)), 0)
+            self.assertEqual(ob._evict_orders(AAPL, datetime(2020, 1, 2, 1)), 1)
+            self.assertEqual(ob.open_orders[ob.assets.id_of(AAPL)], 1)
+
+            # the index needs to own the store exclusively
+            self.assertRaises(ValueError, lambda: SQLOrderbookActor(None, engine, exclusive=True))
+
+            # a new orderbook on the same store picks up the open orders
+            ob.on_stop()
+            ob = SQLOrderbookActor(None, engine, exclusive=True)
+            self.assertEqual(ob.open_orders[ob.assets.id_of(AAPL)], 1)
+            self.assertEqual(ob._evict_orders(AAPL, datetime(2020, 1, 5)), 0)
+            self.assertEqual(len(ob._get_orders_for_execution(AAPL, datetime(2020, 1, 3), 2, 2, 2, 2, 2, 2)), 1)
+            self.assertEqual(ob._evict_orders(AAPL, datetime(2020, 1, 6)), 1)
+            self.assertEqual(ob._get_orders_for_execution(AAPL, datetime(2020, 1, 6), 2, 2, 2, 2, 2, 2), [])
+            ob.on_stop()
+
     def test_market_order(self):
         pass
 
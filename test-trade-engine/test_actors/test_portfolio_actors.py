@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import numpy as np
+import pandas as pd
 import pytest
 from numpy import testing as nt
 from sqlalchemy import create_engine
@@ -9,7 +10,10 @@ from testutils.data import AAPL, MSFT
 from testutils.database import get_sqlite_engine
 from tradeengine.actors.memory import MemPortfolioActor
 from tradeengine.actors.sql.sql_portfolio import SQLPortfolioActor
+from tradeengine.actors.portfolio_actor import expand_position_changes
 from tradeengine.dto.asset import CASH
+from tradeengine.messages.feed import PortfolioFeedReader
+from tradeengine.messages.messages import NewPositionMessage, NewBarMarketData
 
 
 @pytest.mark.parametrize(
@@ -161,8 +165,95 @@ class TestPortfolioActor:
         port.add_new_position(MSFT, time, 10, 10, 0)
 
 
+    def test_portfolio_timeseries(self, actor):
+        port = actor(100)
+
+        port.add_new_position(AAPL, datetime(2020, 1, 2), 10, 2, 0)
+        port.update_position_value(AAPL, datetime(2020, 1, 3), 3, 3)
+        port.update_position_value(AAPL, datetime(2020, 1, 4), 4, 4)
+
+        df = port.get_portfolio_timeseries().sort_values(["time", "asset"])
+        assert df["asset"].tolist() == ["$$$", "$$$", "AAPL", "AAPL", "AAPL"]
+        assert df["time"].tolist() == [datetime(2020, 1, 1)] + [datetime(2020, 1, 2)] * 2 + [datetime(2020, 1, 3), datetime(2020, 1, 4)]
+        nt.assert_array_almost_equal(df["value"].values.astype(float), np.array([100, 80, 20, 30, 40]))
+
+        assert port.get_portfolio_timeseries(datetime(2020, 1, 3))["time"].max() == datetime(2020, 1, 3)
+
+        # finalize
+        port.on_stop()
+
     def test_proceed_with_portfolio(self, actor):
         port = actor(1)
 
         # TODO ...
         pass
+
+
+@pytest.mark.parametrize(
+    "actor",
+    [
+        lambda f, d: SQLPortfolioActor(get_sqlite_engine(False), funding=f, delta_history=d),
+        lambda f, d: MemPortfolioActor(funding=f, delta_history=d),
+    ]
+)
+def test_delta_history(actor):
+    full, delta = actor(100, False), actor(100, True)
+    for port in (full, delta):
+        port.add_new_position(AAPL, datetime(2020, 1, 2), 10, 2, 0)
+        port.add_new_position(MSFT, datetime(2020, 1, 2), 5, 4, 0)
+        for day in range(3, 20):
+            port.update_position_value(AAPL, datetime(2020, 1, day), 2 + day % 3, 2 + day % 3)
+            port.update_position_value(MSFT, datetime(2020, 1, day), 4, 4)
+        port.add_new_position(MSFT, datetime(2020, 1, 19), -5, 5, 0)
+        port.update_position_value(MSFT, datetime(2020, 1, 20), 6, 6)
+        port.update_position_value(AAPL, datetime(2020, 1, 20), 3, 3)
+
+    for expected, actual in zip(full.get_performance_history(), delta.get_performance_history()):
+        pd.testing.assert_frame_equal(actual, expected)
+
+    pd.testing.assert_frame_equal(
+        delta.get_performance_history(datetime(2020, 1, 10))[-1],
+        full.get_performance_history(datetime(2020, 1, 10))[-1]
+    )
+
+    if isinstance(delta, MemPortfolioActor):
+        # flat MSFT prices and the closed MSFT position are not recorded
+        assert len(delta.portfolio_history) + len(delta.price_history) < len(full.portfolio_history) * 0.7
+        assert delta.portfolio_history.nbytes + delta.price_history.nbytes < full.portfolio_history.nbytes / 2
+
+    full.on_stop()
+    delta.on_stop()
+
+
+def test_expand_flat_positions():
+    # a position without any recorded price is flat and has no value, like in the full history
+    states = pd.DataFrame({"asset": ["AAPL", "MSFT"], "time": [datetime(2020, 1, 2)] * 2, "quantity": [0.0, 2.0], "cost_basis": [0.0, 1.0], "pnl": [0.0, 0.0]})
+    prices = pd.DataFrame({"asset": ["MSFT"], "time": [datetime(2020, 1, 2)], "price": [3.0]})
+
+    df = expand_position_changes(states, prices, [datetime(2020, 1, 2), datetime(2020, 1, 3)])
+    assert df["value"].tolist() == [0.0, 6.0, 0.0, 6.0]
+
+
+@pytest.mark.parametrize(
+    "actor",
+    [
+        lambda f, feed: SQLPortfolioActor(get_sqlite_engine(False), funding=f, feed=feed),
+        lambda f, feed: MemPortfolioActor(funding=f, feed=feed),
+    ]
+)
+def test_feed(actor, tmp_path):
+    path = str(tmp_path / "feed")
+    port = actor(100, path)
+    port.on_receive(NewPositionMessage(AAPL, datetime(2020, 1, 2), 10, 2, 0))
+    for day in range(3, 10):
+        port.on_receive(NewBarMarketData(AAPL, datetime(2020, 1, day), 1, 1, 1, 2 + day % 3))
+        port.on_receive(NewBarMarketData(MSFT, datetime(2020, 1, day), 1, 1, 1, 4))
+
+    port.feed.flush()
+    records = PortfolioFeedReader(path).poll()
+
+    # MSFT is not in the portfolio, every trade publishes the asset and the cash position
+    position_values = port.get_performance_history()[0].iloc[1:]
+    assert set(records["asset"]) == {str(AAPL), str(CASH)}
+    nt.assert_array_almost_equal(records.pivot_table(index="time", columns="asset", values="value").ffill().values, position_values.values)
+    port.on_stop()
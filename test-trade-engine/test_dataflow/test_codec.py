@@ -0,0 +1,57 @@
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+
+from testutils.data import AAPL, MSFT
+from tradeengine.dto import AssetRegistry, QuantityOrder, CloseOrder, PercentOrder, TargetQuantityOrder, \
+    TargetWeightOrder
+from tradeengine.messages import NewBarMarketData, NewBidAskMarketData, NewPositionMessage, NewOrderMessage
+from tradeengine.messages.codec import MessageCodec, datetimes_to_ns, ns_to_datetimes, NONE_TIME, MAX_TIME
+
+
+class TestCodec(TestCase):
+
+    def test_asset_registry(self):
+        registry = AssetRegistry([AAPL])
+        self.assertEqual(registry.id_of(AAPL), 0)
+        self.assertEqual(registry.id_of(MSFT), 1)
+        self.assertListEqual(registry.ids_of([MSFT, AAPL, MSFT]).tolist(), [1, 0, 1])
+        self.assertListEqual(registry.lookup(np.array([1, 0])).tolist(), [MSFT, AAPL])
+        self.assertIn(MSFT, registry)
+        self.assertEqual(len(registry), 2)
+
+    def test_timestamps(self):
+        values = [datetime(2020, 1, 2, 15, 30, 0, 123), None, datetime.max]
+        ns = datetimes_to_ns(values)
+
+        self.assertListEqual(ns[1:].tolist(), [NONE_TIME, MAX_TIME])
+        self.assertListEqual(ns_to_datetimes(ns).tolist(), values)
+
+    def test_round_trip(self):
+        codec = MessageCodec()
+        messages = [
+            [NewBarMarketData(AAPL, datetime(2020, 1, 2, 15, 30), 10.0, 11.0, 9.0, 10.5),
+             NewBarMarketData(MSFT, datetime(2020, 1, 3), 1.0, 1.1, 0.9, 1.05)],
+            [NewBidAskMarketData(MSFT, datetime(2020, 1, 2), 1.5, 1.6)],
+            [NewPositionMessage(AAPL, datetime(2020, 1, 3), 10, 10.5, 0.1)],
+            [NewOrderMessage(QuantityOrder(MSFT, 10, datetime(2020, 1, 1), limit=10.2, id=12)),
+             NewOrderMessage(CloseOrder(AAPL, None, datetime(2020, 1, 1), valid_until=datetime(2020, 1, 5))),
+             NewOrderMessage(PercentOrder(AAPL, 0.5, datetime(2020, 1, 1), stop_limit=9.0)),
+             NewOrderMessage(TargetQuantityOrder(MSFT, -3, datetime(2020, 1, 1))),
+             NewOrderMessage(TargetWeightOrder(AAPL, 0.25, datetime(2020, 1, 1), id=0))],
+        ]
+
+        for batch in messages:
+            self.assertListEqual([codec.decode(codec.encode(m)) for m in batch], batch)
+            self.assertListEqual(codec.decode_batch(codec.encode_batch(batch)), batch)
+
+        self.assertListEqual(codec.decode_batch(codec.encode_batch([])), [])
+
+    def test_shared_registry(self):
+        registry = AssetRegistry()
+        message = NewBarMarketData(MSFT, datetime(2020, 1, 2), 10.0, 11.0, 9.0, 10.5)
+        data = MessageCodec(registry).encode(message)
+
+        self.assertEqual(MessageCodec(registry).decode(data), message)
+        self.assertEqual(len(data), 1 + 4 + 8 + 4 * 8)
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# heavy optional dependencies a module must not load at import time
+LAZY = {
+    'tradeengine': ('pandas', 'yfinance', 'pykka'),
+    'tradeengine.backtest': ('pykka', 'tqdm', 'sqlalchemy', 'yfinance', 'plotly', 'dash'),
+    'tradeengine.comparison': ('pykka', 'sqlalchemy', 'plotly', 'dash'),
+    'tradeengine.report': ('pykka', 'sqlalchemy', 'plotly', 'dash', 'quantstats', 'matplotlib'),
+    'tradeengine.render': ('pandas', 'plotly', 'dash', 'dash_bootstrap_components'),
+    'tradeengine.plot.plot_backtest': ('dash', 'datashader', 'pykka'),
+    'tradeengine.actors.memory': ('sqlalchemy', 'tqdm'),
+    'tradeengine.live': ('tqdm', 'yfinance', 'plotly', 'dash', 'quantstats'),
+}
+
+
+@pytest.mark.parametrize("module", list(LAZY.keys()))
+def test_lazy_imports(module):
+    script = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    loaded = set(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    assert loaded.isdisjoint(LAZY[module]), f"{module} imports {sorted(loaded.intersection(LAZY[module]))}"
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import pandas as pd
+
+from testutils.data import AAPL, MSFT, AAPL_MSFT_TLT_MD_FRAMES
+from testutils.trading import one_over_n, swing_backtest
+from tradeengine.dto import PercentOrder, CloseOrder, QuantityOrder
+from tradeengine.signals import signal_frame, nested_signals, generate_orders, signal_markers, SIGNAL_COLUMNS
+
+
+class TestDataFlowSignals(TestCase):
+
+    def test_signal_frame(self):
+        t1, t2 = datetime(2020, 1, 2), datetime(2020, 1, 3)
+        signals = signal_frame([
+            (t2, QuantityOrder(MSFT, -10, t2, limit=12.5, id=3)),
+            (t1, PercentOrder(AAPL, 0.5, t1, valid_until=t2, id=1)),
+            (t1, CloseOrder(MSFT, None, t1, id=2)),
+            (t1, None),
+        ])
+
+        self.assertListEqual(signals.columns.tolist(), SIGNAL_COLUMNS)
+        self.assertListEqual(signals["order_id"].tolist(), [1, 2, 3])
+        self.assertListEqual(signals["order_type"].tolist(), ["PercentOrder", "CloseOrder", "QuantityOrder"])
+        self.assertEqual(signals["limit"].iloc[2], 12.5)
+
+        nested = nested_signals(signals)
+        self.assertListEqual(nested.index.tolist(), [t1, t2])
+        self.assertListEqual([o["id"] for o in nested.loc[t1, "AAPL"]], [1])
+        self.assertListEqual(nested.loc[t2, "AAPL"], [])
+        self.assertEqual(nested.loc[t2, "MSFT"][0]["marker"], "triangle-down")
+        self.assertEqual(nested.loc[t1, "AAPL"][0]["valid_until"], t2)
+
+    def test_signals_link_executed_orders(self):
+        backtest = swing_backtest()
+        linked = backtest.signals.merge(backtest.orders, on="order_id", suffixes=("_signal", "_order"))
+        self.assertEqual(len(linked), len(backtest.signals))
+        self.assertListEqual(linked["asset_signal"].tolist(), linked["asset_order"].tolist())
+        self.assertTrue((linked["valid_from_signal"] == linked["valid_from_order"].dt.tz_localize(None)).all())
+
+    def test_signal_markers(self):
+        t1, t2 = datetime(2020, 1, 2), datetime(2020, 1, 3)
+        signals = signal_frame([
+            (t1, QuantityOrder(MSFT, -10, t1)),
+            (t1, QuantityOrder(AAPL, 5, t1)),
+            (t2, PercentOrder(AAPL, 0.5, t2)),
+            (t2, CloseOrder(MSFT, None, t2)),
+        ])
+
+        expected = [(t1, "MSFT", "triangle-down"), (t1, "AAPL", "triangle-up"), (t2, "AAPL", "triangle-up-dot"), (t2, "MSFT", "circle")]
+        markers = signal_markers(signals)
+        self.assertListEqual(list(markers.itertuples(index=False, name=None)), expected)
+
+        legacy = signal_markers(nested_signals(signals))
+        self.assertListEqual(sorted(legacy.itertuples(index=False, name=None)), sorted(expected))
+
+    def test_generate_orders(self):
+        calendar = pd.DatetimeIndex(["2020-01-02", "2020-01-03", "2020-01-06"])
+        signals = {"AAPL": pd.Series([{"PercentOrder": dict(size=0.5)}, None, {CloseOrder: {}}], index=calendar)}
+        orders = generate_orders(signals, {"AAPL": calendar}, timedelta(seconds=1))
+
+        self.assertListEqual([type(o) for _, o in orders], [PercentOrder, CloseOrder])
+        self.assertListEqual([o.valid_from for _, o in orders], [datetime(2020, 1, 2, 0, 0, 1), datetime(2020, 1, 6, 0, 0, 1)])
+        self.assertListEqual([o.valid_until for _, o in orders], [datetime(2020, 1, 3), datetime.max])
+        self.assertListEqual([tst for tst, _ in orders], [datetime(2020, 1, 2), datetime(2020, 1, 6)])
+
+    def test_target_weight_matrix(self):
+        frames = AAPL_MSFT_TLT_MD_FRAMES
+        calendars = {h: df.index for h, df in frames.items()}
+        weights = pd.DataFrame({h: 0.98 / len(frames) for h in frames.keys()}, index=frames["AAPL"].index)
+
+        self.assertListEqual(
+            generate_orders(weights, calendars, timedelta(seconds=1)),
+            generate_orders(one_over_n(frames), calendars, timedelta(seconds=1)),
+        )
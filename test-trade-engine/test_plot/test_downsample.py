@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from tradeengine.plot.downsample import aggregate_buckets, bucket_starts, lttb, minmax_buckets, ohlc_buckets
+
+
+class TestDownsample(TestCase):
+
+    def setUp(self):
+        index = pd.date_range("2020-01-01", periods=100_000, freq="min")
+        self.series = pd.Series(np.cumsum(np.random.default_rng(0).standard_normal(len(index))), index=index)
+
+    def test_bucket_starts(self):
+        index = pd.DatetimeIndex(["2020-01-01", "2020-01-02", "2020-01-03", "2020-01-10"])
+        self.assertListEqual(bucket_starts(index, 3).tolist(), [0, 3])
+        self.assertListEqual(bucket_starts(index, 10).tolist(), [0, 1, 2, 3])
+
+    def test_aggregate_buckets(self):
+        df = pd.DataFrame({"a": [1., 2., np.nan, 4., 5., 6.]}, index=pd.date_range("2020-01-01", periods=6))
+        self.assertListEqual(aggregate_buckets(df, 3, 'sum')["a"].tolist(), [3., 4., 11.])
+        self.assertListEqual(aggregate_buckets(df, 3, 'max')["a"].tolist(), [2., 4., 6.])
+        self.assertListEqual(aggregate_buckets(df, 3, 'last')["a"].tolist(), [2., 4., 6.])
+        self.assertIs(aggregate_buckets(df, 10), df)
+
+    def test_ohlc_buckets(self):
+        s = self.series
+        bars = ohlc_buckets(pd.DataFrame({"open": s, "high": s + 1, "low": s - 1, "close": s}), 500)
+
+        self.assertLessEqual(len(bars), 500)
+        self.assertEqual(bars["high"].max(), s.max() + 1)
+        self.assertEqual(bars["low"].min(), s.min() - 1)
+        self.assertEqual(bars["open"].iloc[0], s.iloc[0])
+        self.assertEqual(bars["close"].iloc[-1], s.iloc[-1])
+
+    def test_minmax_buckets(self):
+        line = minmax_buckets(self.series, 500)
+
+        self.assertLessEqual(len(line), 1000)
+        self.assertEqual(line.max(), self.series.max())
+        self.assertEqual(line.min(), self.series.min())
+        self.assertTrue(line.index.is_monotonic_increasing)
+
+    def test_lttb(self):
+        line = lttb(self.series, 500)
+
+        self.assertEqual(len(line), 500)
+        self.assertEqual(line.index[0], self.series.index[0])
+        self.assertEqual(line.index[-1], self.series.index[-1])
+        self.assertTrue(line.index.is_monotonic_increasing)
+        pd.testing.assert_series_equal(lttb(self.series.iloc[:10], 500), self.series.iloc[:10])
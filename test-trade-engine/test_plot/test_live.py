@@ -0,0 +1,64 @@
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest import TestCase
+
+import dash
+
+from testutils.data import AAPL, MSFT
+from tradeengine.dashboard.live import LivePortfolio, extend_data, live_layout
+from tradeengine.dto.asset import CASH
+from tradeengine.messages.feed import PortfolioFeedReader, PortfolioFeedWriter
+
+
+class TestLivePortfolio(TestCase):
+
+    def test_append_only_updates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp).joinpath("feed"))
+            writer = PortfolioFeedWriter(path, flush_interval=0)
+            live = LivePortfolio(PortfolioFeedReader(path))
+            self.assertEqual(live.update(), 0)
+
+            writer.publish(CASH, datetime(2020, 1, 1), 80)
+            writer.publish(AAPL, datetime(2020, 1, 1), 20)
+            writer.publish(AAPL, datetime(2020, 1, 2), 30)
+
+            # the newest timestamp is held back until a later one shows up or nothing new arrived
+            self.assertEqual(live.update(), 1)
+            self.assertEqual(live.window(0)["performance"].tolist(), [1.0])
+            self.assertEqual(live.update(), 1)
+            self.assertEqual(live.window(1)["performance"].tolist(), [1.1])
+
+            # an incomplete record stays in the file until it got completed
+            writer.publish(MSFT, datetime(2020, 1, 3), 10)
+            writer.publish(CASH, datetime(2020, 1, 4), 70)
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path, 'wb') as f:
+                f.write(data[:-5])
+
+            self.assertEqual(live.update(), 0)
+            self.assertEqual(live.update(), 1)
+            self.assertListEqual(LivePortfolio.assets_of(live.window(2)), ["$$$", "AAPL", "MSFT"])
+            self.assertListEqual(live.window(2).iloc[-1].tolist(), [80, 30, 10, 120, 1.2])
+
+            with open(path, 'ab') as f:
+                f.write(data[-5:])
+
+            self.assertEqual(live.update(), 0)
+            self.assertEqual(live.update(), 1)
+            self.assertEqual(live.rows, 4)
+
+            rows = live.window(2)
+            self.assertListEqual(rows["value"].tolist(), [120, 110])
+
+            (update, traces, max_points) = extend_data(rows, 100)
+            self.assertListEqual(traces, [0, 1, 2, 3])
+            self.assertListEqual(update["y"][0], [1.2, 1.1])
+            writer.close()
+
+    def test_layout(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            live = LivePortfolio(PortfolioFeedReader(str(Path(tmp).joinpath("feed"))))
+            self.assertIsNotNone(live_layout(dash.Dash(__name__), live))
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+import pandas as pd
+
+from tradeengine.dto.order import OrderTypes
+from tradeengine.plot.orders_table import OrdersTable, parse_filter_part
+
+
+class TestOrdersTable(TestCase):
+
+    def setUp(self):
+        self.orders = pd.DataFrame({
+            "id": range(6),
+            "order_type": [OrderTypes.CLOSE, OrderTypes.QUANTITY, OrderTypes.CLOSE, OrderTypes.PERCENT, OrderTypes.QUANTITY, OrderTypes.CLOSE],
+            "asset": ["AAPL", "MSFT", "MSFT", "TLT", "AAPL", "MSFT"],
+            "limit": [None, 10.0, None, None, 11.0, None],
+            "size": [1.0, -2.0, 3.0, 0.5, 4.0, -1.0],
+            "execute_time": pd.to_datetime(["2020-01-02", "2020-01-03", "2020-02-03", "2020-02-04", "2020-03-01", "2020-03-02"]),
+        })
+        self.table = OrdersTable(self.orders)
+
+    def test_paging(self):
+        data, rows = self.table.query(page_current=1, page_size=4)
+        self.assertEqual(rows, 6)
+        self.assertListEqual([r["id"] for r in data], [4, 5])
+        self.assertEqual(data[0]["order_type"], str(OrderTypes.QUANTITY))
+        self.assertEqual(self.table.page_count(rows, 4), 2)
+        self.assertEqual(self.table.page_count(0, 4), 1)
+
+    def test_sorting(self):
+        data, _ = self.table.query(page_size=10, sort_by=[{'column_id': 'size', 'direction': 'desc'}])
+        self.assertListEqual([r["id"] for r in data], [4, 2, 0, 3, 5, 1])
+
+        data, _ = self.table.query(page_size=10, sort_by=[{'column_id': 'asset', 'direction': 'asc'}, {'column_id': 'execute_time', 'direction': 'desc'}])
+        self.assertListEqual([r["id"] for r in data], [4, 0, 5, 2, 1, 3])
+
+        data, _ = self.table.query(page_size=10, sort_by=[{'column_id': 'order_type', 'direction': 'asc'}, {'column_id': 'id', 'direction': 'asc'}])
+        self.assertListEqual([r["id"] for r in data], [0, 2, 5, 3, 1, 4])
+
+        # unknown columns are skipped
+        data, _ = self.table.query(page_size=10, sort_by=[{'column_id': 'foo', 'direction': 'asc'}, {'column_id': 'size', 'direction': 'desc'}])
+        self.assertListEqual([r["id"] for r in data], [4, 2, 0, 3, 5, 1])
+
+    def test_filtering(self):
+        def ids(filter_query, **kwargs):
+            data, rows = self.table.query(page_size=10, filter_query=filter_query, **kwargs)
+            self.assertEqual(rows, len(data))
+            return [r["id"] for r in data]
+
+        self.assertListEqual(ids("{asset} contains 'MS'"), [1, 2, 5])
+        self.assertListEqual(ids("{asset} eq MSFT && {size} s> 0"), [2])
+        self.assertListEqual(ids("{size} <= 0.5"), [1, 3, 5])
+        self.assertListEqual(ids("{execute_time} datestartswith 2020-02"), [2, 3])
+        self.assertListEqual(ids("{execute_time} ge 2020-02-04", sort_by=[{'column_id': 'size', 'direction': 'asc'}]), [5, 3, 4])
+        self.assertListEqual(ids("{limit} = None"), [0, 2, 3, 5])
+
+        # prefixes other than a year, month or day match the string representation of the dates
+        self.assertListEqual(ids("{execute_time} datestartswith 2020-03-02 00"), [5])
+
+        # unsupported parts of the user typed query are ignored
+        self.assertListEqual(ids("{asset} eq MSFT && {size} ~ 0"), [1, 2, 5])
+        self.assertListEqual(ids("{asset} eq MSFT && {execute_time} ge tomorrow"), [1, 2, 5])
+        self.assertListEqual(ids("{asset} eq MSFT && {foo} eq 1"), [1, 2, 5])
+
+    def test_parse_filter_part(self):
+        self.assertEqual(parse_filter_part("{size} s>= 10"), ("size", "ge", "10"))
+        self.assertEqual(parse_filter_part('{asset} eq "AAPL"'), ("asset", "eq", "AAPL"))
+        self.assertEqual(parse_filter_part("{asset} contains 'A A'"), ("asset", "contains", "A A"))
+        self.assertRaises(ValueError, parse_filter_part, "size > 10")
+        self.assertRaises(ValueError, parse_filter_part, "{size} between 10")
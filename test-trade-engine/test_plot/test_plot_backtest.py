@@ -0,0 +1,72 @@
+from unittest import TestCase, skipUnless
+
+import numpy as np
+import pandas as pd
+
+from testutils.trading import swing_backtest
+from tradeengine.dashboard.backtest import timeseries_figure, visible_range, FULL_RANGE
+from tradeengine.plot.plot_backtest import PlotBacktest
+from tradeengine.plot.raster import datashader_available
+
+
+class TestPlotBacktest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backtest = swing_backtest()
+
+    def test_small_selection_is_vector(self):
+        plot = PlotBacktest(self.backtest, render='auto')
+        self.assertFalse(plot.rasterize(self.backtest.assets))
+
+        fig = plot.plot_performance()
+        self.assertEqual(len(fig.layout.images), 0)
+        self.assertIn("Ohlc", {type(t).__name__ for t in fig.data})
+
+    def test_selection(self):
+        start = pd.Timestamp("2020-03-01")
+        fig = PlotBacktest(self.backtest, render='vector').plot_performance(assets=["AAPL"], time_range=(start, None))
+
+        ohlc = [t for t in fig.data if type(t).__name__ == "Ohlc"]
+        self.assertListEqual([t.name for t in ohlc], ["AAPL"])
+        self.assertGreaterEqual(pd.Timestamp(ohlc[0].x[0]), start)
+
+    def test_zoom(self):
+        plot = PlotBacktest(self.backtest, render='vector')
+        window = visible_range({'xaxis3.range[0]': '2020-03-01 00:00:00', 'xaxis3.range[1]': '2020-04-01 00:00:00'})
+        self.assertEqual(window, (pd.Timestamp("2020-03-01"), pd.Timestamp("2020-04-01")))
+        self.assertIs(visible_range({'xaxis.autorange': True}), FULL_RANGE)
+        self.assertIs(visible_range({'autosize': True}), ...)
+
+        full = timeseries_figure(plot, FULL_RANGE, max_points=50)
+        zoomed = timeseries_figure(plot, window, max_points=50)
+
+        for fig in (full, zoomed):
+            self.assertLessEqual(max(len(t.x) for t in fig.data), 50)
+
+        ohlc = [t for t in zoomed.data if type(t).__name__ == "Ohlc"]
+        self.assertTrue(all(window[0] <= pd.Timestamp(x) <= window[1] for t in ohlc for x in t.x))
+        self.assertEqual(tuple(zoomed.layout.xaxis.range), window)
+
+    def test_position_pies(self):
+        plot = PlotBacktest(self.backtest)
+        values = self.backtest.position_values
+        tst = values.index[len(values) // 2]
+
+        fig = plot.position_pies().figure(str(tst))
+        self.assertIs(plot.position_pies().figure(tst), fig)
+        self.assertListEqual(fig["data"][1]["labels"], [str(c) for c in values.columns])
+        np.testing.assert_array_almost_equal(fig["data"][1]["values"], values.loc[tst].abs().fillna(0).values, 4)
+
+        # clicks between two rows show the previous row, the default is the last row
+        self.assertIs(plot.position_pies().figure(tst + pd.Timedelta(seconds=1)), fig)
+        self.assertListEqual(list(plot.plot_positions().data[1]["values"]), plot.position_pies().values.row(len(values) - 1))
+
+    @skipUnless(datashader_available(), "datashader is not usable")
+    def test_raster(self):
+        plot = PlotBacktest(self.backtest, render='auto', max_vector_points=10)
+        self.assertTrue(plot.rasterize(self.backtest.assets))
+
+        fig = plot.plot_performance()
+        self.assertEqual(len(fig.layout.images), 3)
+        self.assertNotIn("Ohlc", {type(t).__name__ for t in fig.data})
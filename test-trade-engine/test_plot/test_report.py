@@ -0,0 +1,49 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from testutils.data import AAPL_MSFT_MD_FRAMES
+from testutils.trading import swing_backtest
+from tradeengine.report import benchmark_returns, render_reports
+
+
+class TestReport(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backtest = swing_backtest()
+
+    def test_benchmark_returns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("run")
+            self.backtest.save(path)
+
+            returns = benchmark_returns("MSFT", {"run": str(path)})
+            close = AAPL_MSFT_MD_FRAMES["MSFT"]["Close"]
+            pd.testing.assert_series_equal(returns, close.pct_change().dropna().rename("MSFT"), check_names=False, check_freq=False)
+
+            close.to_csv(Path(tmp).joinpath("msft.csv"))
+            self.assertEqual(len(benchmark_returns(str(Path(tmp).joinpath("msft.csv")), {})), len(returns))
+
+    def test_render_reports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = {}
+            for name in ("run0", "run1"):
+                runs[name] = str(Path(tmp).joinpath("runs", name))
+                self.backtest.save(runs[name])
+
+            out = Path(tmp).joinpath("report")
+            summary = render_reports(runs, str(out), benchmark="MSFT", workers=2, max_points=200)
+
+            self.assertListEqual(summary["orders"].tolist(), [len(self.backtest.orders)] * 2)
+            for name in runs:
+                self.assertTrue(out.joinpath(f"{name}.html").exists())
+                self.assertTrue(out.joinpath(f"{name}.figure.html").exists())
+                self.assertIn(f'<a href="{name}.html">', out.joinpath("index.html").read_text())
+
+            # all figures refer to the one plotly bundle
+            self.assertTrue(out.joinpath("plotly.min.js").exists())
+            self.assertLess(os.path.getsize(out.joinpath("run0.figure.html")), os.path.getsize(out.joinpath("plotly.min.js")))
@@ -0,0 +1,64 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from testutils.data import AAPL_MSFT_MD_FRAMES
+from tradeengine.backtest import Backtest
+from tradeengine.dto import OrderTypes
+from tradeengine.storage import LazyFrame
+
+
+def sample_backtest():
+    market_data = pd.concat(AAPL_MSFT_MD_FRAMES.values(), axis=1, keys=AAPL_MSFT_MD_FRAMES.keys())
+    position_values = market_data.xs("Close", axis=1, level=1)
+    orders = pd.DataFrame({
+        "order_type": [OrderTypes.TARGET_WEIGHT, OrderTypes.CLOSE],
+        "asset": ["AAPL", "MSFT"],
+        "limit": [None, None],
+        "size": [0.5, np.nan],
+        "valid_from": market_data.index[:2],
+    })
+
+    return Backtest(
+        market_data,
+        pd.DataFrame({}),
+        orders,
+        position_values,
+        position_values / position_values.sum(axis=1).values[:, None],
+        pd.DataFrame({"performance": position_values.sum(axis=1)}),
+    )
+
+
+class TestBacktestArtifact(TestCase):
+
+    def test_save_load(self):
+        backtest = sample_backtest()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("backtest")
+            backtest.save(path)
+            loaded = Backtest.load(path)
+
+            # nothing is read until we touch it
+            self.assertIsInstance(loaded.frame("market_data"), LazyFrame)
+            self.assertSetEqual(loaded.assets, {"AAPL", "MSFT"})
+            self.assertIsInstance(loaded.frame("market_data"), LazyFrame)
+
+            pd.testing.assert_frame_equal(loaded.porfolio_performance, backtest.porfolio_performance)
+            pd.testing.assert_frame_equal(loaded.orders, backtest.orders)
+            pd.testing.assert_frame_equal(loaded.market_data, backtest.market_data)
+            self.assertIsInstance(loaded.frame("market_data"), pd.DataFrame)
+
+    def test_read_columns_only(self):
+        backtest = sample_backtest()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("backtest")
+            backtest.save(path)
+            market_data = Backtest.load(path).frame("market_data")
+
+            pd.testing.assert_frame_equal(market_data["MSFT"], backtest.market_data["MSFT"])
+            self.assertListEqual(market_data.load([("AAPL", "Close")]).columns.tolist(), [("AAPL", "Close")])
@@ -0,0 +1,122 @@
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from test_storage.test_artifact import sample_backtest
+from testutils.data import AAPL_MSFT_MD_FRAMES
+from testutils.trading import swing_backtest
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.memory.history import PositionHistory
+from tradeengine.backtest import Backtest
+from tradeengine.dto import Asset
+from tradeengine.storage import compact_frame
+
+
+class TestCompactStorage(TestCase):
+
+    def test_compact_frame(self):
+        backtest = sample_backtest()
+        orders = compact_frame(backtest.orders)
+
+        self.assertEqual(orders["size"].dtype, np.float32)
+        self.assertEqual(orders["asset"].dtype, "category")
+        self.assertEqual(orders["order_type"].dtype, object)
+        self.assertEqual(orders["valid_from"].dtype, backtest.orders["valid_from"].dtype)
+
+        report = backtest.compaction_report()
+        self.assertGreater(report.loc["market_data", "saved"], 0.3)
+        self.assertGreater(report.loc["total", "bytes"], report.loc["total", "compact_bytes"])
+        self.assertLess(report.loc["total", "max_relative_error"], 1e-7)
+
+    def test_save_compact(self):
+        backtest = sample_backtest()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("backtest")
+            backtest.save(path, compact=True)
+            loaded = Backtest.load(path)
+
+            pd.testing.assert_frame_equal(loaded.market_data, compact_frame(backtest.market_data))
+            pd.testing.assert_frame_equal(loaded.orders, compact_frame(backtest.orders))
+            pd.testing.assert_index_equal(loaded.porfolio_performance.index, backtest.porfolio_performance.index)
+
+    def test_compact_history(self):
+        full, compact = PositionHistory(chunk_size=100), PositionHistory(compact=True, chunk_size=100)
+        t0 = int(pd.Timestamp("2020-01-02 09:30").value)
+        for i in range(300):
+            row = (i % 3, t0 + i // 3 * 60_000_000_000, 10.0, 1.5, 100 + i * 0.01, 0.0)
+            full.append(row)
+            compact.append(row)
+
+        expected, actual = full.to_array(), compact.to_array()
+        np.testing.assert_array_equal(actual["asset"], expected["asset"])
+        np.testing.assert_array_equal(actual["time"], expected["time"])
+        np.testing.assert_allclose(actual["value"], expected["value"], rtol=1e-6)
+        self.assertLess(compact.nbytes, full.nbytes * 0.6)
+
+    def test_spill_history(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            full = PositionHistory(chunk_size=100)
+            spilled = PositionHistory(compact=True, chunk_size=100, memory_budget=2_000, spill_dir=tmp)
+            t0 = int(pd.Timestamp("2020-01-02 09:30").value)
+            for i in range(1050):
+                row = (i % 3, t0 + i // 3 * 60_000_000_000, 10.0, 1.5, 100 + i * 0.25, 0.0)
+                full.append(row)
+                spilled.append(row)
+
+            self.assertEqual(len(spilled.chunks), 0)
+            self.assertGreater(spilled.spilled_bytes, 0)
+            self.assertLess(spilled.nbytes, full.nbytes / 2)
+            self.assertEqual(len(list(Path(tmp).iterdir())), 1)
+
+            as_of = t0 + 200 * 60_000_000_000
+            np.testing.assert_array_equal(spilled.to_array(), full.to_array())
+            np.testing.assert_array_equal(spilled.to_array(as_of), full.to_array(as_of))
+
+            spilled.close()
+            self.assertEqual(len(list(Path(tmp).iterdir())), 0)
+
+    def test_spill_portfolio(self):
+        full, spilled = MemPortfolioActor(funding=100), MemPortfolioActor(funding=100, memory_budget=0)
+        spilled_delta = MemPortfolioActor(funding=100, delta_history=True, memory_budget=0)
+        for port in (spilled, spilled_delta):
+            port.portfolio_history.chunk_size = port.ticks.chunk_size = 64
+
+        for port in (full, spilled, spilled_delta):
+            for asset, quantity in zip(AAPL_MSFT_MD_FRAMES.keys(), (10, 5)):
+                port.add_new_position(Asset(asset), datetime(2020, 1, 2), quantity, 2, 0)
+
+            for day in range(1, 300):
+                for asset in AAPL_MSFT_MD_FRAMES.keys():
+                    port.update_position_value(Asset(asset), datetime(2020, 1, 2) + timedelta(days=day), 2 + day % 7, 2 + day % 7)
+
+        self.assertGreater(spilled.portfolio_history.spilled_bytes, 0)
+        self.assertGreater(spilled_delta.price_history.spilled_bytes, 0)
+        self.assertGreater(spilled_delta.ticks.spilled_bytes, 0)
+        for port in (spilled, spilled_delta):
+            for expected, actual in zip(full.get_performance_history(), port.get_performance_history()):
+                pd.testing.assert_frame_equal(actual, expected)
+
+            pd.testing.assert_frame_equal(
+                port.get_performance_history(datetime(2020, 3, 1))[0],
+                full.get_performance_history(datetime(2020, 3, 1))[0]
+            )
+
+        for port in (spilled, spilled_delta):
+            port.on_stop()
+            self.assertIsNone(port.portfolio_history.spill)
+            self.assertIsNone(port.price_history.spill)
+
+    def test_precision_against_float64(self):
+        def backtest(compact):
+            return swing_backtest(portfolio=lambda: MemPortfolioActor.start(funding=100, compact=compact), compact=compact)
+
+        full, compact = backtest(False), backtest(True)
+
+        self.assertEqual(compact.market_data.dtypes.iloc[0], np.float32)
+        self.assertEqual(len(compact.orders), len(full.orders))
+        np.testing.assert_allclose(compact.porfolio_performance["performance"], full.porfolio_performance["performance"], rtol=1e-5)
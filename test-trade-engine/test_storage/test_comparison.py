@@ -0,0 +1,87 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import dash
+import numpy as np
+import pandas as pd
+from dash.exceptions import PreventUpdate
+
+from test_storage.test_artifact import sample_backtest
+from testutils.trading import swing_backtest
+from tradeengine.backtest import Backtest
+from tradeengine.comparison import BacktestComparison, summary_statistics
+from tradeengine.dashboard.comparison import comparison_layout, summary_records
+from tradeengine.storage import FrameCache, LazyFrame, memory_usage
+
+
+class TestBacktestComparison(TestCase):
+
+    def test_frame_cache_eviction(self):
+        frames = {i: pd.DataFrame({"a": np.arange(1000, dtype=float)}) for i in range(3)}
+        cache = FrameCache(max_bytes=memory_usage(frames[0]) * 2)
+
+        for i in range(3):
+            self.assertIs(cache.get(i, lambda: frames[i]), frames[i])
+
+        self.assertListEqual(cache.keys(), [1, 2])
+        self.assertIs(cache.get(1, lambda: None), frames[1])
+        cache.get(0, lambda: frames[0])
+        self.assertListEqual(cache.keys(), [1, 0])
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+    def test_summary_statistics(self):
+        performance = pd.DataFrame({"performance": [1.0, 1.1, 0.99, 1.2]}, index=pd.date_range("2020-01-01", periods=4))
+        stats = summary_statistics(performance)
+
+        self.assertAlmostEqual(stats["total_return"], 0.2)
+        self.assertAlmostEqual(stats["max_drawdown"], 0.99 / 1.1 - 1)
+        self.assertEqual(stats["end"], pd.Timestamp("2020-01-04"))
+
+    def test_lazy_comparison(self):
+        backtest = sample_backtest()
+        cache = FrameCache()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                scaled = Backtest(*[backtest.market_data, backtest.signals, backtest.orders, backtest.position_values,
+                                    backtest.position_weights, backtest.porfolio_performance * (i + 1)])
+                scaled.save(Path(tmp).joinpath(f"run{i}"))
+
+            comparison = BacktestComparison([tmp], cache=cache)
+            self.assertListEqual(comparison.names, ["run0", "run1", "run2"])
+
+            # the summary only reads the performance frames
+            summary = comparison.summary()
+            self.assertListEqual(summary["orders"].tolist(), [2, 2, 2])
+            self.assertTrue(all(key[1] == "porfolio_performance.parquet" for key in cache.keys()))
+            self.assertEqual(len(cache), 3)
+
+            drilled = comparison.backtest("run1")
+            self.assertIsInstance(drilled.frame("market_data"), LazyFrame)
+            pd.testing.assert_frame_equal(drilled.orders, backtest.orders)
+            self.assertIs(comparison.backtest("run1").orders, drilled.orders)
+
+            layout = comparison_layout(dash.Dash(__name__), comparison, max_points=100)
+            self.assertIsNotNone(layout)
+
+    def test_drill_down_zoom(self):
+        backtest = swing_backtest()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(2):
+                backtest.save(Path(tmp).joinpath(f"run{i}"))
+
+            comparison = BacktestComparison([tmp])
+            app = dash.Dash(__name__)
+            comparison_layout(app, comparison, max_points=100)
+            callbacks = {k: v['callback'].__wrapped__ for k, v in app.callback_map.items()}
+            drill_down = callbacks['comparison-drilldown.children']
+            zoom = callbacks['{"index":["MATCH"],"type":"comparison-timeseries"}.figure']
+
+            # the drilled down run is re-queried for the zoomed window
+            graph = drill_down(summary_records(comparison.summary()), [1])[1]
+            self.assertEqual(graph.id, {'type': 'comparison-timeseries', 'index': 'run1'})
+            figure = zoom({'xaxis.range[0]': '2020-03-01', 'xaxis.range[1]': '2020-04-01'}, graph.id)
+            self.assertListEqual(list(figure['layout']['xaxis']['range']), [pd.Timestamp('2020-03-01'), pd.Timestamp('2020-04-01')])
+            self.assertRaises(PreventUpdate, zoom, {'width': 100}, graph.id)
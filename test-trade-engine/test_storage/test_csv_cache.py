@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+import pandas as pd
+
+from tradeengine.storage import read_csv_files
+from tradeengine.storage.csv_cache import cache_file
+
+TEST_ROOT = Path(__file__).parents[1]
+
+
+class TestCsvCache(TestCase):
+
+    def test_cached_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = [Path(shutil.copy(TEST_ROOT.joinpath(f"{t}.csv"), tmp)) for t in ["aapl", "msft", "tlt"]]
+
+            frames = read_csv_files(files, max_workers=2, parse_dates=True, index_col="Date")
+            self.assertListEqual(list(frames.keys()), ["aapl.csv", "msft.csv", "tlt.csv"])
+            self.assertTrue(all(cache_file(f).exists() for f in files))
+
+            # the second read only uses the cache
+            cache_mtime = os.stat(cache_file(files[0])).st_mtime_ns
+            cached_frames = read_csv_files(files, max_workers=2, parse_dates=True, index_col="Date")
+            self.assertEqual(os.stat(cache_file(files[0])).st_mtime_ns, cache_mtime)
+            for name, df in frames.items():
+                pd.testing.assert_frame_equal(cached_frames[name], df)
+                pd.testing.assert_frame_equal(df, pd.read_csv(Path(tmp).joinpath(name), parse_dates=True, index_col="Date"))
+
+            # changing the file invalidates the cache
+            with open(files[0], "a") as f:
+                f.write("2022-09-13,1,1,1,1,1,0,0\n")
+
+            self.assertEqual(len(read_csv_files(files, parse_dates=True, index_col="Date")["aapl.csv"]), len(frames["aapl.csv"]) + 1)
+
+            # other read arguments invalidate the cache as well
+            self.assertNotIn("Date", read_csv_files(files[1:2])["msft.csv"].index.names)
+
+    def test_rewritten_while_parsing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file = Path(shutil.copy(TEST_ROOT.joinpath("aapl.csv"), tmp))
+            read_csv = pd.read_csv
+
+            def read_and_rewrite(*args, **kwargs):
+                df = read_csv(*args, **kwargs)
+                with open(file, "a") as f:
+                    f.write("2022-09-13,1,1,1,1,1,0,0\n")
+                return df
+
+            with patch("tradeengine.storage.csv_cache.pd.read_csv", read_and_rewrite):
+                stale = read_csv_files([file], parse_dates=True, index_col="Date")["aapl.csv"]
+
+            # the stale parse is never served for the rewritten file
+            self.assertEqual(len(read_csv_files([file], parse_dates=True, index_col="Date")["aapl.csv"]), len(stale) + 1)
@@ -1,10 +1,16 @@
-from typing import Dict, Literal
+from typing import Callable, Dict, Literal
 
 import numpy as np
 import pandas as pd
+import pykka
 
 from testutils.data import AAPL_MSFT_MD_FRAMES
+from testutils.database import get_sqlite_engine
+from tradeengine.actors.memory import MemPortfolioActor
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.backtest import Backtest, BacktestStrategy
 from tradeengine.dto import Asset, CloseOrder, PercentOrder, TargetWeightOrder
+from tradeengine.runtime import start_actor
 
 
 def sample_strategy(frames: Dict[Asset, pd.DataFrame], stragegy: Literal['long', 'short', 'swing'] = 'swing', signal_only=True, slow=90, fast=20) -> Dict[Asset, pd.Series | pd.DataFrame]:
@@ -38,3 +44,25 @@ def one_over_n(frames: Dict[Asset, pd.DataFrame],) -> Dict[Asset, pd.Series | pd
         result[a] = pd.Series(size, index=f.index).apply(lambda x: {TargetWeightOrder: dict(size=x)})
 
     return result
+
+
+def swing_backtest(
+        frames: Dict[Asset, pd.DataFrame] = AAPL_MSFT_MD_FRAMES,
+        portfolio: Callable[[], pykka.ActorRef] | None = None,
+        orderbook: Callable[[pykka.ActorRef], pykka.ActorRef] | None = None,
+        runtime=None,
+        stop: bool = True,
+        **kwargs,
+) -> Backtest:
+    # backtests the swing sample strategy, by default with a memory portfolio and an in memory sql orderbook
+    frames = frames.copy()
+    signal = {k: v["order"] for k, v in sample_strategy(frames, 'swing', slow=30, fast=10, signal_only=False).items()}
+    portfolio_actor = portfolio() if portfolio is not None else start_actor(MemPortfolioActor, funding=100, runtime=runtime)
+    orderbook_actor = orderbook(portfolio_actor) if orderbook is not None else \
+        start_actor(SQLOrderbookActor, portfolio_actor, get_sqlite_engine(False), runtime=runtime)
+
+    try:
+        return BacktestStrategy(orderbook_actor, portfolio_actor, frames, **kwargs).run_backtest(signal)
+    finally:
+        if stop:
+            pykka.ActorRegistry.stop_all()
@@ -1 +1,10 @@
-from tradeengine._obsolete.components import *
\ No newline at end of file
+# the (obsolete) components pull in yfinance, they are only imported once they are used
+_OBSOLETE_COMPONENTS = ('Account', 'PandasBarBacktester', 'YfBacktester')
+
+
+def __getattr__(name):
+    if name in _OBSOLETE_COMPONENTS:
+        from tradeengine._obsolete import components
+        return getattr(components, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Dict, Any, List, TYPE_CHECKING
+
+from tradeengine.messages.journal import active_journal
+from tradeengine.messages.messages import ActorMetricsMessage, Message
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+LOG = logging.getLogger(__name__)
+NULL_TIMER = nullcontext()
+NR_OF_BUCKETS = 48
+
+_enabled = os.environ.get("TRADEENGINE_INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
+_current = threading.local()
+
+
+def enable_instrumentation(enabled: bool = True):
+    """
+    Instrumentation is opt-in and has to be enabled before the actors get created, either by calling this function
+    or by setting the environment variable TRADEENGINE_INSTRUMENTATION=1. Set TRADEENGINE_METRICS_DIR to a directory
+    to get a json dump of the metrics of each actor when it stops.
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def is_instrumentation_enabled() -> bool:
+    return _enabled
+
+
+class LatencyHistogram(object):
+    """
+    A histogram of nanosecond latencies using power of 2 buckets.
+    """
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * NR_OF_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        self.buckets[min(max(ns, 1).bit_length() - 1, NR_OF_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        self.min_ns = ns if self.min_ns is None else min(self.min_ns, ns)
+        self.max_ns = max(self.max_ns, ns)
+
+    def percentile(self, q: float) -> int:
+        # returns the upper bound of the bucket holding the q-th percentile
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.buckets):
+            seen += c
+            if seen >= rank and c > 0:
+                return min(2 ** (i + 1), self.max_ns)
+
+        return self.max_ns
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            total_ms=self.total_ns / 1e6,
+            mean_us=self.total_ns / self.count / 1e3 if self.count > 0 else None,
+            min_us=None if self.min_ns is None else self.min_ns / 1e3,
+            p50_us=self.percentile(0.5) / 1e3,
+            p90_us=self.percentile(0.9) / 1e3,
+            p99_us=self.percentile(0.99) / 1e3,
+            max_us=self.max_ns / 1e3,
+            buckets={f"<{2 ** (i + 1)}ns": c for i, c in enumerate(self.buckets) if c > 0},
+        )
+
+
+class ActorMetrics(object):
+    """
+    Collects per message type counts, processing latencies and queue wait times as well as timings of backend
+    calls (i.e. sql statements, history appends, asks to other actors) of one actor.
+    """
+
+    def __init__(self, actor_name: str):
+        self.actor_name = actor_name
+        self.started = time.time()
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.queue_wait: Dict[str, LatencyHistogram] = {}
+        self.backend: Dict[str, LatencyHistogram] = {}
+
+    def record_message(self, message_type: str, latency_ns: int, queue_wait_ns: int | None):
+        _histogram(self.latency, message_type).record(latency_ns)
+        if queue_wait_ns is not None:
+            _histogram(self.queue_wait, message_type).record(queue_wait_ns)
+
+    def record_backend(self, name: str, ns: int):
+        _histogram(self.backend, name).record(ns)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record_backend(name, time.perf_counter_ns() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = time.time() - self.started
+        return dict(
+            actor=self.actor_name,
+            elapsed_s=elapsed,
+            messages={
+                t: dict(
+                    **h.to_dict(),
+                    per_sec=h.count / elapsed if elapsed > 0 else None,
+                    queue_wait=self.queue_wait[t].to_dict() if t in self.queue_wait else None,
+                ) for t, h in self.latency.items()
+            },
+            backend={n: h.to_dict() for n, h in self.backend.items()},
+        )
+
+    def dump(self, file_name: str | None = None):
+        snapshot = self.snapshot()
+        lines = [f"metrics of {self.actor_name} after {snapshot['elapsed_s']:.2f}s"]
+        for kind in ("messages", "backend"):
+            for name, h in snapshot[kind].items():
+                lines.append(f"  {kind[:-1] if kind == 'messages' else kind} {name}: count={h['count']} total={h['total_ms']:.1f}ms mean={h['mean_us']:.1f}us p99={h['p99_us']:.1f}us")
+
+        LOG.info("\n".join(lines))
+
+        directory = os.environ.get("TRADEENGINE_METRICS_DIR")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, file_name or f"{self.actor_name}.json"), 'w') as f:
+                json.dump(snapshot, f, indent=1)
+
+        return snapshot
+
+
+class TimedInbox(queue.Queue):
+    """
+    An actor inbox which remembers when a message was put into the queue such that the actor can measure how long
+    a message was waiting to be processed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.last_wait_ns = None
+
+    def _put(self, item):
+        super()._put((time.perf_counter_ns(), item))
+
+    def _get(self):
+        put_ns, item = super()._get()
+        self.last_wait_ns = time.perf_counter_ns() - put_ns
+        return item
+
+
+def create_actor_inbox():
+    return TimedInbox() if _enabled else queue.Queue()
+
+
+def create_metrics(actor) -> ActorMetrics | None:
+    return ActorMetrics(type(actor).__name__) if _enabled else None
+
+
+def dump_metrics(actor):
+    metrics = getattr(actor, "metrics", None)
+    if metrics is not None:
+        metrics.dump(f"{type(actor).__name__}-{actor.actor_urn.split(':')[-1]}.json")
+
+
+def backend_timer(metrics: ActorMetrics | None, name: str):
+    return NULL_TIMER if metrics is None else metrics.timer(name)
+
+
+def current_metrics() -> ActorMetrics | None:
+    # the metrics of the actor processing a message in the current thread
+    stack = getattr(_current, "stack", None)
+    return stack[-1] if stack else None
+
+
+def instrumented(on_receive):
+    """
+    Decorates the `on_receive` method of an actor to record the processing latency and queue wait time of each
+    message and to answer the `ActorMetricsMessage`. If a journal is active, every received message gets recorded.
+    """
+
+    @wraps(on_receive)
+    def wrapper(self, message):
+        metrics: ActorMetrics | None = getattr(self, "metrics", None)
+        if isinstance(message, ActorMetricsMessage):
+            return None if metrics is None else metrics.snapshot()
+
+        journal = active_journal()
+        if journal is not None and isinstance(message, Message):
+            journal.record(self, message)
+
+        if metrics is None:
+            return on_receive(self, message)
+
+        inbox = getattr(self, "actor_inbox", None)
+        queue_wait_ns = getattr(inbox, "last_wait_ns", None)
+        if queue_wait_ns is not None: inbox.last_wait_ns = None
+
+        stack = getattr(_current, "stack", None)
+        if stack is None: stack = _current.stack = []
+
+        stack.append(metrics)
+        start = time.perf_counter_ns()
+        try:
+            return on_receive(self, message)
+        finally:
+            metrics.record_message(type(message).__name__, time.perf_counter_ns() - start, queue_wait_ns)
+            stack.pop()
+
+    return wrapper
+
+
+def instrument_engine(engine: Engine):
+    """
+    Records the time of each sql statement as backend timing of the actor which executes the statement.
+    """
+    # only the sql actors need sqlalchemy
+    from sqlalchemy import event
+
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("tradeengine_query_start", []).append(time.perf_counter_ns())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["tradeengine_query_start"].pop()
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.record_backend(f"sql.{statement.lstrip().split(' ', 1)[0].upper()}", time.perf_counter_ns() - start)
+
+
+def _histogram(histograms: Dict[str, LatencyHistogram], name: str) -> LatencyHistogram:
+    h = histograms.get(name)
+    if h is None:
+        h = histograms[name] = LatencyHistogram()
+
+    return h
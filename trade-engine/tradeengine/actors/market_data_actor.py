@@ -6,6 +6,8 @@ from typing import Any, Tuple
 import pandas as pd
 import pykka
 
+from tradeengine.actors.instrumentation import instrumented, create_actor_inbox, create_metrics, dump_metrics, \
+    backend_timer
 from tradeengine.messages.messages import ReplayAllMarketDataMessage, \
     NewBidAskMarketData, NewBarMarketData
 
@@ -29,6 +31,8 @@ class AbstractQuoteProviderActor(pykka.ThreadingActor):
      * tells his coworkers about new market data
     """
 
+    _create_actor_inbox = staticmethod(create_actor_inbox)
+
     def __init__(
             self,
             portfolio_actor: pykka.ActorRef,
@@ -36,18 +40,22 @@ class AbstractQuoteProviderActor(pykka.ThreadingActor):
             portfolio_update_timeout: int = 60,
     ):
         super().__init__()
+        self.metrics = create_metrics(self)
         self.portfolio_actor = portfolio_actor
         self.orderbook_actor = orderbook_actor
         self.portfolio_update_timeout = portfolio_update_timeout
 
     def on_stop(self) -> None:
+        dump_metrics(self)
         LOG.debug(f"stopped orderbook actor {self}")
 
+    @instrumented
     def on_receive(self, message: Any) -> Any:
         match message:
             case NewBidAskMarketData() | NewBarMarketData():
                 # make sure the portfolio has processed everything (use ask) before executing orders
-                self.portfolio_actor.ask(message, timeout=self.portfolio_update_timeout)
+                with backend_timer(self.metrics, "ask.portfolio"):
+                    self.portfolio_actor.ask(message, timeout=self.portfolio_update_timeout)
                 self.orderbook_actor.tell(message)
                 return
 
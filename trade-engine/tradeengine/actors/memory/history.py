@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# one evaluation of a position: (asset id, time ns, quantity, cost basis, value, pnl)
+HistoryRow = Tuple[int, int, float, float, float, float]
+HISTORY_DTYPE = np.dtype([("asset", np.int64), ("time", np.int64), ("quantity", float), ("cost_basis", float), ("value", float), ("pnl", float)])
+# one price change of a position of a delta history: (asset id, number of the evaluation timestamp, price)
+PRICE_DTYPE = np.dtype([("asset", np.uint32), ("tick", np.uint32), ("price", float)])
+# the evaluation timestamps of a delta history
+TICK_DTYPE = np.dtype([("time", np.int64)])
+COMPACT_FLOAT = np.float32
+PENDING_ROW_BYTES = 48    # a python tuple including its list slot
+PENDING_FIELD_BYTES = 34  # an int or float object including its tuple slot
+SPILL_COMPRESSION = 'lz4'
+
+
+@dataclass(frozen=True)
+class HistoryChunk:
+    """
+    A frozen block of history rows. The time column holds offsets to `time_base` in multiples of `time_unit`
+    (the greatest common divisor of all offsets) which are stored as int32 whenever they fit.
+    """
+    rows: np.ndarray
+    time_base: int
+    time_unit: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes
+
+    @staticmethod
+    def freeze(rows: List[Tuple], dtype: np.dtype, compact: bool) -> 'HistoryChunk':
+        array = np.array(rows, dtype=dtype)
+        if not compact:
+            return HistoryChunk(array, 0, 1)
+
+        # delta encode the timestamps, i.e. minute bars become minute offsets
+        time = array["time"]
+        base = int(time.min())
+        offsets = time - base
+        unit = max(int(np.gcd.reduce(offsets)), 1)
+        offsets //= unit
+        time_dtype = np.int32 if offsets.max() <= np.iinfo(np.int32).max else np.int64
+
+        compact_array = np.empty(len(array), dtype=[(name, _compact_dtype(name, dtype[name], time_dtype)) for name in dtype.names])
+        for name in dtype.names:
+            compact_array[name] = offsets if name == "time" else array[name]
+
+        return HistoryChunk(compact_array, base, unit)
+
+    def to_array(self, dtype: np.dtype) -> np.ndarray:
+        if self.rows.dtype == dtype:
+            return self.rows
+
+        array = np.empty(len(self.rows), dtype=dtype)
+        for name in dtype.names:
+            array[name] = self.rows[name]
+
+        array["time"] = self.time_base + array["time"] * self.time_unit
+        return array
+
+
+class SpillFile(object):
+    """
+    A temporary arrow ipc stream holding the history chunks which got flushed out of memory. The stream has no
+    footer, hence it can be read back while it is still written. The file gets removed on `close` or latest when
+    the object is garbage collected.
+    """
+
+    def __init__(self, dtype: np.dtype, directory: str | None = None):
+        import pyarrow as pa
+
+        fd, self.path = tempfile.mkstemp(prefix="history-", suffix=".arrows", dir=directory)
+        os.close(fd)
+
+        self.dtype = dtype
+        self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype[name])) for name in dtype.names])
+        self.sink = pa.OSFile(self.path, 'wb')
+        self.writer = pa.ipc.new_stream(self.sink, self.schema, options=pa.ipc.IpcWriteOptions(compression=SPILL_COMPRESSION))
+        self.rows = 0
+        self._finalizer = weakref.finalize(self, _remove_spill_file, self.writer, self.sink, self.path)
+
+    @property
+    def nbytes(self) -> int:
+        return os.path.getsize(self.path)
+
+    def write(self, array: np.ndarray):
+        import pyarrow as pa
+
+        self.writer.write_batch(pa.record_batch([pa.array(array[name]) for name in self.dtype.names], schema=self.schema))
+        self.sink.flush()
+        self.rows += len(array)
+
+    def iter_arrays(self) -> Iterator[np.ndarray]:
+        import pyarrow as pa
+
+        if self.rows <= 0: return
+        with pa.memory_map(self.path) as source:
+            for batch in pa.ipc.open_stream(source):
+                array = np.empty(batch.num_rows, dtype=self.dtype)
+                for i, name in enumerate(self.dtype.names):
+                    array[name] = batch.column(i).to_numpy()
+
+                yield array
+
+    def close(self):
+        self._finalizer()
+
+
+class PositionHistory(object):
+    """
+    An append only history of position records (by default evaluations of `HISTORY_DTYPE`). Rows are collected
+    as plain tuples and frozen into numpy chunks of `chunk_size` rows. In `compact` mode the chunks store float32
+    values, uint32 asset ids and delta encoded timestamps which is about half the memory of the full precision
+    chunks.
+
+    With a `memory_budget` (bytes) the oldest frozen chunks are flushed to a temporary columnar file (in
+    `spill_dir` or the default temp directory) as soon as the in memory chunks exceed the budget. Readers stream
+    the flushed chunks back from disk, so the memory of a long running history stays flat at the budget plus at
+    most `chunk_size` pending rows.
+    """
+
+    def __init__(
+            self,
+            compact: bool = False,
+            chunk_size: int = 1 << 14,
+            dtype: np.dtype = HISTORY_DTYPE,
+            memory_budget: int | None = None,
+            spill_dir: str | None = None,
+    ):
+        self.compact = compact
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.rows: List[Tuple] = []
+        self.chunks: List[HistoryChunk] = []
+        self.spill: SpillFile | None = None
+        self.length = 0
+
+    def append(self, row: Tuple):
+        self.rows.append(row)
+        self.length += 1
+        if len(self.rows) >= self.chunk_size:
+            self.chunks.append(HistoryChunk.freeze(self.rows, self.dtype, self.compact))
+            self.rows = []
+            if self.memory_budget is not None:
+                self._flush_to_budget()
+
+    def _flush_to_budget(self):
+        in_memory = sum(c.nbytes for c in self.chunks)
+        while len(self.chunks) > 0 and in_memory > self.memory_budget:
+            if self.spill is None:
+                self.spill = SpillFile(self.dtype, self.spill_dir)
+
+            chunk = self.chunks.pop(0)
+            self.spill.write(chunk.to_array(self.dtype))
+            in_memory -= chunk.nbytes
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        # bytes held in memory, see `spilled_bytes` for the flushed chunks
+        return sum(c.nbytes for c in self.chunks) + len(self.rows) * (PENDING_ROW_BYTES + PENDING_FIELD_BYTES * len(self.dtype.names))
+
+    @property
+    def spilled_bytes(self) -> int:
+        return 0 if self.spill is None else self.spill.nbytes
+
+    def iter_arrays(self) -> Iterator[np.ndarray]:
+        # oldest first: the flushed chunks, the frozen chunks and the pending rows
+        if self.spill is not None:
+            yield from self.spill.iter_arrays()
+
+        for c in self.chunks:
+            yield c.to_array(self.dtype)
+
+        if len(self.rows) > 0:
+            yield np.array(self.rows, dtype=self.dtype)
+
+    def to_array(self, as_of: int | None = None) -> np.ndarray:
+        # rows after `as_of` (ns) are dropped chunk by chunk while streaming, before concatenating
+        arrays = [a if as_of is None else a[a["time"] <= as_of] for a in self.iter_arrays()]
+        if len(arrays) <= 0:
+            return np.array([], dtype=self.dtype)
+
+        return np.concatenate(arrays) if len(arrays) > 1 else arrays[0]
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+
+class PriceSeries(object):
+    """
+    The evaluation prices of a delta history. Per asset it keeps a growing array of the tick (the number of the
+    evaluation timestamp) and the price whenever the price of the asset changed, that is 12 bytes per price change
+    (8 bytes with float32 prices in `compact` mode) instead of a full history row per evaluation.
+
+    With a `memory_budget` (bytes) all arrays are flushed to a temporary columnar file (see `PositionHistory`) as
+    soon as they exceed the budget.
+    """
+
+    def __init__(self, compact: bool = False, capacity: int = 64, memory_budget: int | None = None, spill_dir: str | None = None):
+        self.dtype = np.dtype([("tick", np.uint32), ("price", COMPACT_FLOAT if compact else float)])
+        self.capacity = capacity
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.series: Dict[int, np.ndarray] = {}
+        self.sizes: Dict[int, int] = {}
+        self.prices: Dict[int, float] = {}
+        self.spill: SpillFile | None = None
+        self.allocated = 0
+        self.length = 0
+
+    def append(self, asset_id: int, tick: int, price: float) -> bool:
+        # records the price of the asset at the tick if it differs from its last price
+        price = self.dtype["price"].type(price)
+        if self.prices.get(asset_id) == price:
+            return False
+
+        series = self.series.get(asset_id)
+        size = self.sizes.get(asset_id, 0)
+        if series is None or size >= len(series):
+            grown = np.empty(self.capacity if series is None else len(series) * 2, dtype=self.dtype)
+            if series is not None: grown[:size] = series
+            self.allocated += grown.nbytes - (0 if series is None else series.nbytes)
+            series = self.series[asset_id] = grown
+
+        series[size] = (tick, price)
+        self.sizes[asset_id] = size + 1
+        self.prices[asset_id] = price
+        self.length += 1
+
+        if self.memory_budget is not None and self.allocated > self.memory_budget:
+            self._flush()
+
+        return True
+
+    def _flush(self):
+        if self.spill is None:
+            self.spill = SpillFile(PRICE_DTYPE, self.spill_dir)
+
+        self.spill.write(self._in_memory_array())
+        self.series, self.sizes, self.allocated = {}, {}, 0
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        # allocated bytes in memory, the arrays grow by doubling
+        return self.allocated
+
+    @property
+    def spilled_bytes(self) -> int:
+        return 0 if self.spill is None else self.spill.nbytes
+
+    def iter_arrays(self, ticks: int | None = None) -> Iterator[np.ndarray]:
+        # all price changes before the tick `ticks` as `PRICE_DTYPE` rows, the flushed ones first
+        arrays = self.spill.iter_arrays() if self.spill is not None else iter(())
+        for array in (*arrays, self._in_memory_array()):
+            yield array if ticks is None else array[array["tick"] < ticks]
+
+    def _in_memory_array(self) -> np.ndarray:
+        array = np.empty(sum(self.sizes.values()), dtype=PRICE_DTYPE)
+        i = 0
+        for asset_id, series in self.series.items():
+            series = series[:self.sizes[asset_id]]
+            array["asset"][i:i + len(series)] = asset_id
+            array["tick"][i:i + len(series)] = series["tick"]
+            array["price"][i:i + len(series)] = series["price"]
+            i += len(series)
+
+        return array
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+
+def fold_last_values(arrays: Callable[[], Iterator[np.ndarray]], field: str = "value") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Folds history rows chunk by chunk into a dense (time x asset) matrix holding the last `field` of each asset per
+    timestamp (NaN where an asset has no row). `arrays` gets called twice, once to collect the timestamps and assets
+    and once to fill the matrix, so besides the result only one chunk is in memory. Returns the sorted timestamps,
+    the sorted asset ids of the columns and the matrix.
+    """
+    times, assets = [], []
+    for array in arrays():
+        times.append(np.unique(array["time"]))
+        assets.append(np.unique(array["asset"]))
+
+    times = np.unique(np.concatenate(times)) if len(times) > 0 else np.empty(0, dtype=np.int64)
+    assets = np.unique(np.concatenate(assets)) if len(assets) > 0 else np.empty(0, dtype=np.int64)
+
+    # rows are in chronological order, later rows of the same timestamp overwrite earlier ones
+    matrix = np.full((len(times), len(assets)), np.nan)
+    for array in arrays():
+        matrix[np.searchsorted(times, array["time"]), np.searchsorted(assets, array["asset"])] = array[field]
+
+    return times, assets, matrix
+
+
+def _compact_dtype(name: str, dtype: np.dtype, time_dtype):
+    if name == "time": return time_dtype
+    if name == "asset": return np.uint32
+    return COMPACT_FLOAT if dtype.kind == 'f' else dtype
+
+
+def _remove_spill_file(writer, sink, path: str):
+    writer.close()
+    sink.close()
+    if os.path.exists(path):
+        os.remove(path)
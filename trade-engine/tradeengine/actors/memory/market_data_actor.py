@@ -6,10 +6,12 @@ from typing import List, Dict, Tuple
 import pandas as pd
 import pykka
 
+from tradeengine.actors.instrumentation import backend_timer
 from tradeengine.actors.market_data_actor import AbstractQuoteProviderActor
-from tradeengine.dto import Asset
-from tradeengine.messages.messages import NewBidAskMarketData, NewBarMarketData
-from tqdm import tqdm
+from tradeengine.dto import ASSETS, Asset
+from tradeengine.messages.codec import datetimes_to_ns
+from tradeengine.messages.messages import NewBidAskMarketData, NewBarMarketData, NewMarketDataBatch
+from tradeengine.storage.compact import compact_frame
 
 LOG = logging.getLogger(__name__)
 
@@ -24,9 +26,13 @@ class PandasQuoteProviderActor(AbstractQuoteProviderActor):
             columns: List,
             portfolio_update_timeout: int = 60,
             blocking: bool = True,
+            compact: bool = False,
     ):
         super().__init__(portfolio_actor, orderbook_actor, portfolio_update_timeout)
         self.dataframe: pd.DataFrame = pd.concat([df[columns] for df in dataframes.values()], axis=1, keys=dataframes.keys()).sort_index().ffill()
+        if compact:
+            # the aligned frame of all assets is by far the biggest object of a backtest
+            self.dataframe = compact_frame(self.dataframe)
         self.assets = list(dataframes.keys())
         self.columns = columns
         self.blocking = blocking
@@ -35,23 +41,45 @@ class PandasQuoteProviderActor(AbstractQuoteProviderActor):
 
     def on_stop(self) -> None:
         LOG.debug(f"stopped market data actor {self}")
+        super().on_stop()
 
     def replay_all_market_data(self) -> pd.DataFrame:
-        # IMPORTANT always update the portfolio first!
-        for tst, row in tqdm(self.dataframe.iterrows(), total=len(self.dataframe)):
-            tst = tst.to_pydatetime() if isinstance(tst, pd.Timestamp) else tst
+        from tqdm import tqdm
+
+        # convert the frame once into plain arrays, (time, asset, column) prices and python timestamps
+        index = self.dataframe.index
+        timestamps = index.to_pydatetime() if isinstance(index, pd.DatetimeIndex) else index.tolist()
+        timestamps_ns = datetimes_to_ns(timestamps).tolist() if isinstance(index, pd.DatetimeIndex) and index.tz is None else [None] * len(index)
+        asset_ids = ASSETS.ids_of(self.assets).tolist()
+        prices = self.dataframe.values.reshape(len(index), len(self.assets), len(self.columns)).tolist()
+        bid, ask = 0, 1 if len(self.columns) > 1 else 0
+
+        # the orderbook takes care of updating the portfolio first with every quote of a batch
+        if getattr(getattr(self.orderbook_actor, "actor_class", None), "batches_market_data", False):
+            for tst, tst_ns, row in tqdm(zip(timestamps, timestamps_ns, prices), total=len(timestamps)):
+                messages = [self._market_data(asset, asset_id, tst, tst_ns, price_data, bid, ask) for asset, asset_id, price_data in zip(self.assets, asset_ids, row)]
+                with backend_timer(self.metrics, "ask.orderbook"):
+                    self.orderbook_actor.ask(NewMarketDataBatch(messages), block=self.blocking)
 
-            for asset in self.assets:
-                price_data = row[asset]
-                message = NewBarMarketData(
-                    asset, tst, *price_data.values
-                ) if self.is_bar else NewBidAskMarketData(
-                    asset, tst, price_data[self.columns[0]], price_data[self.columns[1 if len(self.columns) > 1 else 0]],
-                )
+            return self.dataframe.rename(columns=str, level=0)
+
+        # IMPORTANT always update the portfolio first!
+        for tst, tst_ns, row in tqdm(zip(timestamps, timestamps_ns, prices), total=len(timestamps)):
+            for asset, asset_id, price_data in zip(self.assets, asset_ids, row):
+                message = self._market_data(asset, asset_id, tst, tst_ns, price_data, bid, ask)
 
                 # use ask to be sure portfolio has all data processed before we execute orders
-                self.portfolio_actor.ask(message)
-                self.orderbook_actor.ask(message, block=self.blocking)
+                with backend_timer(self.metrics, "ask.portfolio"):
+                    self.portfolio_actor.ask(message)
+                with backend_timer(self.metrics, "ask.orderbook"):
+                    self.orderbook_actor.ask(message, block=self.blocking)
 
         df = self.dataframe.rename(columns=str, level=0)
-        return df
\ No newline at end of file
+        return df
+
+    def _market_data(self, asset: Asset, asset_id: int, tst, tst_ns: int | None, price_data: List[float], bid: int, ask: int) -> NewBarMarketData | NewBidAskMarketData:
+        return NewBarMarketData(
+            asset, tst, *price_data, asset_id=asset_id, as_of_ns=tst_ns
+        ) if self.is_bar else NewBidAskMarketData(
+            asset, tst, price_data[bid], price_data[ask], asset_id=asset_id, as_of_ns=tst_ns
+        )
@@ -3,18 +3,24 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, Tuple
 
+import numpy as np
 import pandas as pd
 from dataclasses_json import dataclass_json
 
-from tradeengine.actors.portfolio_actor import AbstractPortfolioActor
+from tradeengine.actors.instrumentation import backend_timer
+from tradeengine.actors.memory.history import PositionHistory, PriceSeries, TICK_DTYPE, fold_last_values
+from tradeengine.actors.portfolio_actor import AbstractPortfolioActor, HISTORY_COLUMNS, expand_position_changes
 from tradeengine.dto.position import PositionValue
 from tradeengine.dto.portfolio import PortfolioValue
 from tradeengine.dto.asset import CASH
-from tradeengine.dto import Asset, Position
+from tradeengine.messages.feed import PortfolioFeedWriter
+from tradeengine.dto import ASSETS, Asset, Position
+from tradeengine.messages.codec import to_ns
 
 LOG = logging.getLogger(__name__)
+ONE_DAY_NS = 24 * 3600 * 10 ** 9
 FUNDING_DATE = datetime.utcnow().replace(year=1900, month=1, day=1)
 
 
@@ -23,17 +29,35 @@ class MemPortfolioActor(AbstractPortfolioActor):
     def __init__(
             self,
             funding: float = 1.0,
-            funding_date: datetime = FUNDING_DATE
+            funding_date: datetime = FUNDING_DATE,
+            compact: bool = False,
+            delta_history: bool = False,
+            memory_budget: int | None = None,
+            spill_dir: str | None = None,
+            feed: PortfolioFeedWriter | str | None = None,
     ):
-        super().__init__(funding)
+        super().__init__(funding, feed)
         self.positions: Dict[Asset, TimeseriesPosition] = {}
         self.funding_date = funding_date
 
-        self.portfolio_history: List[pd.Series] = []
+        # the history is kept as rows of (asset id, time ns, quantity, cost basis, value, pnl), in compact mode
+        # with float32 values and delta encoded timestamps. Chunks beyond the memory budget (bytes per history) are
+        # flushed to a temporary file in `spill_dir`
+        self.assets = ASSETS
+        self.portfolio_history = PositionHistory(compact, memory_budget=memory_budget, spill_dir=spill_dir)
+
+        # a delta history only records the position states at trades, the evaluation prices per asset when they
+        # change for non-zero positions and the evaluation timestamps (ticks), the full history is reconstructed
+        # when needed
+        self.delta_history = delta_history
+        self.price_history = PriceSeries(compact, memory_budget=memory_budget, spill_dir=spill_dir)
+        self.ticks = PositionHistory(compact, dtype=TICK_DTYPE, memory_budget=memory_budget, spill_dir=spill_dir)
+        self.last_tick: int | None = None
 
         # in case we have an empty portfolio initialize the cash position
         if len(self.positions) <= 0:
             self.positions[CASH] = TimeseriesPosition(CASH, funding_date, funding, 1.0, 0)
+            if delta_history: self._record_state(CASH, funding_date)
             self.update_position_value(CASH, funding_date, 1.0, 1.0)
 
     def add_new_position(self, asset, as_of, quantity, price, fee):
@@ -50,6 +74,10 @@ class MemPortfolioActor(AbstractPortfolioActor):
             asset, TimeseriesPosition(asset, as_of, 0, 0, quantity * price, 0)
         ) + (quantity, price)
 
+        if self.delta_history:
+            self._record_state(asset, as_of)
+            self._record_state(CASH, as_of)
+
         # since we executed a trade for a given price we know exactly the price of the asset, and thus we
         # re-evaluate the portfolio.
         self.update_position_value(asset, as_of, price, price)
@@ -57,18 +85,35 @@ class MemPortfolioActor(AbstractPortfolioActor):
         # Also since cash probably never gets a price we need to force cash evaluation as well
         self.update_position_value(CASH, as_of, 1.0, 1.0)
 
-    def update_position_value(self, asset, as_of, bid, ask):
+    def update_position_value(self, asset, as_of, bid, ask, asset_id: int | None = None, as_of_ns: int | None = None):
         pos = self.positions.get(asset, None)
         if pos is None: return
 
         assert as_of >= pos.time, f"Can't back evaluate positions! {pos.time} > {as_of}"
 
-        self.positions[asset] = pos.with_time_value(
+        self.positions[asset] = pos = pos.with_time_value(
             as_of,
             pos.quantity * ask if pos.quantity < 0 else pos.quantity * bid
         )
 
-        self.portfolio_history.append(self.positions[asset].to_series())
+        with backend_timer(self.metrics, "history_append"):
+            if asset_id is None: asset_id = self.assets.id_of(asset)
+            time = to_ns(as_of) if as_of_ns is None else as_of_ns
+            if not self.delta_history:
+                self.portfolio_history.append((asset_id, time, pos.quantity, pos.cost_basis, pos.value, pos.pnl))
+                return
+
+            if self.last_tick != time:
+                self.ticks.append((time,))
+                self.last_tick = time
+
+            # zero quantity and flat positions do not change their value
+            if pos.quantity != 0:
+                self.price_history.append(asset_id, len(self.ticks) - 1, ask if pos.quantity < 0 else bid)
+
+    def _record_state(self, asset: Asset, as_of: datetime):
+        pos = self.positions[asset]
+        self.portfolio_history.append((self.assets.id_of(asset), to_ns(as_of), pos.quantity, pos.cost_basis, pos.value, pos.pnl))
 
     def get_portfolio_value(self, as_of: datetime | None = None) -> PortfolioValue:
         if as_of is None: as_of = datetime.max
@@ -84,19 +129,83 @@ class MemPortfolioActor(AbstractPortfolioActor):
             # select PortfolioHistory where time ceil(as_of)
             raise NotImplemented
 
+    def on_stop(self) -> None:
+        super().on_stop()
+        self.portfolio_history.close()
+        self.price_history.close()
+        self.ticks.close()
+
     def get_portfolio_timeseries(self, as_of: datetime | None = None) -> pd.DataFrame:
-        hist = self.portfolio_history
-        if as_of is None or as_of >= hist[-1].time:
-            df = pd.DataFrame(hist)
-        else:
-            df = pd.DataFrame([s for s in hist if s.time <= as_of])
+        as_of = None if as_of is None else to_ns(as_of)
+        df = self._history_frame(self.portfolio_history, as_of)
+
+        if self.delta_history:
+            ticks = self.ticks.to_array(as_of)["time"]
+            prices = np.concatenate(list(self.price_history.iter_arrays(len(ticks))))
+            prices = pd.DataFrame({
+                "asset": self.assets.lookup(prices["asset"]).astype(str),
+                "time": pd.to_datetime(ticks[prices["tick"]]),
+                "price": prices["price"].astype(float),
+            })
+            df = expand_position_changes(df, prices, pd.to_datetime(ticks))
 
         # if this is the first non-cash position, we update the funding date (for pure convenience)
         if len(self.positions) > 1:
-            df.time[0] = df.time[1] - timedelta(days=1)
+            df.loc[0, "time"] = df.loc[1, "time"] - timedelta(days=1)
 
         return df
 
+    def get_position_values(self, as_of: datetime) -> pd.DataFrame:
+        # folds the (possibly spilled) history chunk by chunk instead of reading back the whole timeseries
+        as_of = to_ns(as_of)
+        times, asset_ids, values = self._delta_position_values(as_of) if self.delta_history else fold_last_values(lambda: self._history_arrays(as_of))
+
+        assets = self.assets.lookup(asset_ids).astype(str)
+        order = np.argsort(assets, kind="stable")
+        df = pd.DataFrame(values[:, order], index=pd.DatetimeIndex(pd.to_datetime(times), name="time"), columns=pd.Index(assets[order], name="asset"))
+        return df.ffill()
+
+    def _history_arrays(self, as_of: int) -> Iterator[np.ndarray]:
+        # the history rows until as_of, dated like `get_portfolio_timeseries`
+        first = True
+        for array in self.portfolio_history.iter_arrays():
+            array = array[array["time"] <= as_of]
+            if first and len(array) > 1 and len(self.positions) > 1:
+                array = array.copy()
+                array["time"][0] = array["time"][1] - ONE_DAY_NS
+            first = first and len(array) <= 0
+            yield array
+
+    def _delta_position_values(self, as_of: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # the position states only change at trades, the dense quantities and prices are spread onto the ticks
+        ticks = self.ticks.to_array(as_of)["time"]
+        states = self.portfolio_history.to_array(as_of)
+        asset_ids = np.unique(states["asset"])
+
+        quantity = np.full((len(ticks), len(asset_ids)), np.nan)
+        quantity[np.searchsorted(ticks, states["time"], side="right") - 1, np.searchsorted(asset_ids, states["asset"])] = states["quantity"]
+        price = np.full_like(quantity, np.nan)
+        for prices in self.price_history.iter_arrays(len(ticks)):
+            prices = prices[np.isin(prices["asset"], asset_ids)]
+            price[prices["tick"], np.searchsorted(asset_ids, prices["asset"])] = prices["price"]
+
+        quantity, price = pd.DataFrame(quantity).ffill().values, pd.DataFrame(price).ffill().values
+        if len(ticks) > 1 and len(self.positions) > 1:
+            ticks = ticks.copy()
+            ticks[0] = ticks[1] - ONE_DAY_NS
+
+        return ticks, asset_ids, np.where(quantity == 0, 0.0, quantity * price)
+
+    def _history_frame(self, history: PositionHistory, as_of: int | None) -> pd.DataFrame:
+        # convert the interned history back to assets and timestamps
+        hist = history.to_array(as_of)
+
+        columns = {name: hist[name] for name in hist.dtype.names}
+        columns["asset"] = self.assets.lookup(hist["asset"]).astype(str)
+        columns["time"] = pd.to_datetime(hist["time"])
+        order = [c for c in HISTORY_COLUMNS if c in columns] + [c for c in columns if c not in HISTORY_COLUMNS]
+        return pd.DataFrame(columns, columns=order)
+
 
 @dataclass_json
 @dataclass(frozen=True, eq=True, init=False, repr=True)
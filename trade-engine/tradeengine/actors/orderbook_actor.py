@@ -8,11 +8,13 @@ import numpy as np
 import pandas as pd
 import pykka
 
+from tradeengine.actors.instrumentation import instrumented, create_actor_inbox, create_metrics, dump_metrics, \
+    backend_timer
 from tradeengine.dto.portfolio import PortfolioValue
 from tradeengine.dto.order import Order, ExpectedExecutionPrice
 from tradeengine.dto import Asset, OrderTypes, QuantityOrder
 from tradeengine.messages.messages import NewBidAskMarketData, NewBarMarketData, PortfolioValueMessage, \
-    NewPositionMessage, NewOrderMessage, AllExecutedOrderHistory
+    NewPositionMessage, NewOrderMessage, NewOrdersMessage, AllExecutedOrderHistory, NewMarketDataBatch
 
 RELATIVE_ORDER_TYPES = (OrderTypes.TARGET_QUANTITY, OrderTypes.PERCENT, OrderTypes.TARGET_WEIGHT, OrderTypes.CLOSE)
 LOG = logging.getLogger(__name__)
@@ -32,31 +34,41 @@ class AbstractOrderbookActor(pykka.ThreadingActor):
      * tells the Portfolio Actor about new executed trades
     """
 
+    _create_actor_inbox = staticmethod(create_actor_inbox)
+
+    # orderbooks which can work on all quotes of a timestamp at once get them as one `NewMarketDataBatch` from replays
+    batches_market_data = False
+
     def __init__(
             self,
             portfolio_actor: pykka.ActorRef,
     ):
         super().__init__()
+        self.metrics = create_metrics(self)
         self.portfolio_actor = portfolio_actor
 
     def on_stop(self) -> None:
+        dump_metrics(self)
         LOG.debug(f"stopped orderbook actor {self}")
 
+    @instrumented
     def on_receive(self, message: Any) -> Any:
         match message:
             # if message is PlaceOrder, we store the order in the orderbook
             case NewOrderMessage(order):
                 return self.place_order(order)
+            case NewOrdersMessage(orders):
+                return self.place_orders(orders)
             case AllExecutedOrderHistory(include_evicted):
                 return self.get_all_executed_orders(include_evicted)
 
             # when a new quote messages comes in whe need to check if an order is executed or can be evicted.
             # if an order can be executed and the quantity is not clear (weight/percentage/amount orders)
             # we need to ask the portfolio first what the current portfolio value is
-            case NewBidAskMarketData(asset, as_of, bid, ask):
-                return self.new_market_data(asset, as_of, bid, ask, bid, ask, bid, ask)
-            case NewBarMarketData(asset, as_of, open, high, low, close):
-                return self.new_market_data(asset, as_of, open, open, high, low, close, close)
+            case NewBidAskMarketData() | NewBarMarketData():
+                return self.new_market_data(message.asset, message.as_of, *market_data_prices(message))
+            case NewMarketDataBatch(messages):
+                return self.new_market_data_batch(messages)
             case _:
                 raise ValueError(f"Unknown Message {message}")
 
@@ -69,10 +81,24 @@ class AbstractOrderbookActor(pykka.ThreadingActor):
         expected_price = ExpectedExecutionPrice(as_of, open_bid, open_ask, close_bid, close_ask)
         executable_orders = self._get_orders_for_execution(asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask)
         LOG.info(f"number of executable orders for {asset} @ {as_of}", len(executable_orders))
+        return self.execute_orders(asset, as_of, expected_price, executable_orders)
+
+    def new_market_data_batch(self, messages: List[NewBidAskMarketData | NewBarMarketData]) -> int:
+        # the portfolio always gets a quote before the orders of the quote are executed, a tell is enough as the
+        # portfolio processes all our messages (quotes, portfolio value requests, new positions) in order
+        executed_orders = 0
+        for message in messages:
+            self.portfolio_actor.tell(message)
+            executed_orders += self.new_market_data(message.asset, message.as_of, *market_data_prices(message))
+
+        return executed_orders
+
+    def execute_orders(self, asset: Asset, as_of: datetime, expected_price: ExpectedExecutionPrice, executable_orders: List[Order]) -> int:
+        # executes the matched orders of a quote, relative orders need the portfolio value
         if len(executable_orders) <= 0: return 0
 
         need_portfolio_value = any(o.type for o in executable_orders if o.type in RELATIVE_ORDER_TYPES) and len(executable_orders) > 1
-        pv: PortfolioValue = self.portfolio_actor.ask(PortfolioValueMessage()) if need_portfolio_value else None
+        pv: PortfolioValue = self._ask_portfolio_value() if need_portfolio_value else None
 
         # sort orders by sell orders first:
         definite_executed_orders = 0
@@ -84,11 +110,15 @@ class AbstractOrderbookActor(pykka.ThreadingActor):
         LOG.info(f"number of executed orders for {asset} @ {as_of}", definite_executed_orders)
         return definite_executed_orders
 
+    def _ask_portfolio_value(self) -> PortfolioValue:
+        with backend_timer(self.metrics, "ask.portfolio"):
+            return self.portfolio_actor.ask(PortfolioValueMessage())
+
     def _execute_executable_order(self, order: Order, expected_price: ExpectedExecutionPrice, asset: Asset, as_of: datetime) -> bool:
         # check if we have orders which need the portfolio value to be executable. And sort such that we sell first
         # before we increase positions
         need_portfolio_value = order.type in RELATIVE_ORDER_TYPES
-        pv: PortfolioValue = self.portfolio_actor.ask(PortfolioValueMessage()) if need_portfolio_value else None
+        pv: PortfolioValue = self._ask_portfolio_value() if need_portfolio_value else None
         execute_quantity_order = order.to_quantity(pv, expected_price)
         if abs(execute_quantity_order.size) <= 1e-8: return False
 
@@ -108,6 +138,10 @@ class AbstractOrderbookActor(pykka.ThreadingActor):
         # simply store the order in a datastructure
         raise NotImplemented
 
+    def place_orders(self, orders: List[Order]) -> List[Order]:
+        # place many orders at once, implementations may override this to store all orders in one go
+        return [self.place_order(order) for order in orders]
+
     @abstractmethod
     def _get_orders_for_execution(self, asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask) -> List[Order]:
         # all orders where valid_from >= as_of and valid_until >= as_of and where the limit is matched
@@ -131,6 +165,15 @@ class AbstractOrderbookActor(pykka.ThreadingActor):
         raise NotImplemented
 
 
+def market_data_prices(message: NewBidAskMarketData | NewBarMarketData) -> Tuple[float, float, float, float, float, float]:
+    # open bid, open ask, high, low, close bid, close ask
+    match message:
+        case NewBidAskMarketData(_, _, bid, ask):
+            return bid, ask, bid, ask, bid, ask
+        case NewBarMarketData(_, _, open, high, low, close):
+            return open, open, high, low, close, close
+
+
 def order_sorter(order: Order, expected_price: ExpectedExecutionPrice, pv: PortfolioValue | None):
     """
     we need the following order of orders: fifo by valid_from and then
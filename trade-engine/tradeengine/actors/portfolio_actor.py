@@ -3,17 +3,21 @@ from __future__ import annotations
 import logging
 from abc import abstractmethod
 from datetime import datetime
-from typing import Any, Tuple
+from typing import Any, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 import pykka
 
+from tradeengine.actors.instrumentation import instrumented, create_actor_inbox, create_metrics, dump_metrics
+from tradeengine.dto.asset import CASH
 from tradeengine.dto.portfolio import PortfolioValue
+from tradeengine.messages.feed import PortfolioFeedWriter
 from tradeengine.messages.messages import PortfolioValueMessage, \
     NewBidAskMarketData, NewBarMarketData, NewPositionMessage, PortfolioPerformanceMessage
 
 LOG = logging.getLogger(__name__)
+HISTORY_COLUMNS = ["asset", "quantity", "cost_basis", "value", "pnl", "time"]
 
 
 class AbstractPortfolioActor(pykka.ThreadingActor):
@@ -30,19 +34,31 @@ class AbstractPortfolioActor(pykka.ThreadingActor):
     The actor sends the following messages:
      *
 
+    With a `feed` (a `PortfolioFeedWriter` or the path of one) every change of a position value gets published to
+    it, i.e. to follow a running backtest or live engine with the live dashboard.
     """
 
+    _create_actor_inbox = staticmethod(create_actor_inbox)
+
     def __init__(
             self,
             funding: float = 1.0,
+            feed: PortfolioFeedWriter | str | None = None,
     ):
         super().__init__()
+        self.metrics = create_metrics(self)
         self.funding = funding
+        self.feed = PortfolioFeedWriter(feed) if isinstance(feed, str) else feed
         # self.quote_provider: pykka.ActorRef | None = None
 
     def on_stop(self) -> None:
+        dump_metrics(self)
+        if self.feed is not None:
+            self.feed.close()
+
         LOG.debug(f"stopped orderbook actor {self}")
 
+    @instrumented
     def on_receive(self, message: Any) -> Any:
         match message:
             #case NewMarketDataProviderMessage(provider):
@@ -54,19 +70,33 @@ class AbstractPortfolioActor(pykka.ThreadingActor):
                 return self.get_performance_history(as_of, resample_rule)
 
             case NewPositionMessage(asset, as_of, quantity, price, fee):
-                return self.add_new_position(asset, as_of, quantity, price, fee)
+                result = self.add_new_position(asset, as_of, quantity, price, fee)
+                self.publish(asset, as_of)
+                self.publish(CASH, as_of)
+                return result
             case NewBidAskMarketData(asset, as_of, bid, ask):
-                return self.update_position_value(asset, as_of, bid, ask)
+                result = self.update_position_value(asset, as_of, bid, ask, message.asset_id, message.as_of_ns)
+                self.publish(asset, as_of)
+                return result
             case NewBarMarketData(asset, as_of, open, high, low, close):
-                return self.update_position_value(asset, as_of, close, close)
+                result = self.update_position_value(asset, as_of, close, close, message.asset_id, message.as_of_ns)
+                self.publish(asset, as_of)
+                return result
             case _:
                 raise ValueError(f"Unknown Message {message}")
 
+    def publish(self, asset, as_of):
+        # the implementations keep the current positions in `self.positions`
+        if self.feed is None: return
+
+        pos = self.positions.get(asset, None)
+        if pos is not None:
+            self.feed.publish(asset, as_of, pos.value)
+
     def get_performance_history(self, as_of: datetime = None, resample_rule=None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         if as_of is None: as_of = datetime.max
 
-        df = self.get_portfolio_timeseries(as_of)
-        df_pos_val = df.pivot_table(index='time', columns='asset', values='value', aggfunc='last').sort_index().ffill()
+        df_pos_val = self.get_position_values(as_of)
 
         if resample_rule is not None:
             df_pos_val.resample(resample_rule, convention='e').last()
@@ -80,6 +110,11 @@ class AbstractPortfolioActor(pykka.ThreadingActor):
 
         return df_pos_val, df_pos_weight, df_portfolio
 
+    def get_position_values(self, as_of: datetime) -> pd.DataFrame:
+        # the forward filled (time x asset) values of all positions, implementations may fold their history directly
+        df = self.get_portfolio_timeseries(as_of)
+        return df.pivot_table(index='time', columns='asset', values='value', aggfunc='last').sort_index().ffill()
+
     @abstractmethod
     def get_portfolio_timeseries(self, as_of: datetime | None = None) -> pd.DataFrame:
         raise NotImplemented
@@ -93,6 +128,46 @@ class AbstractPortfolioActor(pykka.ThreadingActor):
         pass
 
     @abstractmethod
-    def update_position_value(self, asset, as_of, bid, ask):
+    def update_position_value(self, asset, as_of, bid, ask, asset_id: int | None = None, as_of_ns: int | None = None):
+        # market data messages carry the interned asset id and as_of in ns, direct callers may omit them
         raise NotImplemented
 
+
+def expand_position_changes(states: pd.DataFrame, prices: pd.DataFrame, ticks: Sequence[datetime]) -> pd.DataFrame:
+    """
+    Reconstructs the full portfolio timeseries from a change-only history. The `states` hold the quantity, cost
+    basis and pnl of a position whenever it traded, the `prices` hold the evaluation price of a position whenever
+    it changed and `ticks` are all timestamps at which the portfolio got evaluated. Every position gets a row for
+    every tick after its first trade carrying forward its last state and price, which is what the full history
+    looks like after pivoting and forward filling it.
+    """
+    fields = [c for c in ("quantity", "cost_basis", "pnl") if c in states.columns]
+    columns = [c for c in HISTORY_COLUMNS if c in fields or c in ("asset", "value", "time")]
+    if len(states) <= 0:
+        return pd.DataFrame([], columns=columns)
+
+    # union keeps duplicates of its inputs, many assets change at the same tick
+    times = [pd.DatetimeIndex(ticks), pd.DatetimeIndex(states["time"]), pd.DatetimeIndex(prices["time"]) if len(prices) > 0 else None]
+    index = pd.DatetimeIndex(np.unique(np.concatenate([t.values for t in times if t is not None])), name="time")
+
+    def wide(df, values):
+        # the last change of an asset within a tick wins
+        return df.drop_duplicates(["time", "asset"], keep="last").pivot(index="time", columns="asset", values=values).reindex(index).ffill()
+
+    state = wide(states, fields)
+    assets = state["quantity"].columns
+    price = wide(prices, "price") if len(prices) > 0 else pd.DataFrame([], index=index)
+    price = price.reindex(columns=assets)
+
+    # stack the wide frames by hand, the multi column `stack` of pandas dominates the runtime otherwise
+    quantity = state["quantity"].values.ravel()
+    mask = ~np.isnan(quantity)
+    data = {
+        "asset": np.tile(assets.values, len(index))[mask],
+        "time": np.repeat(index.values, len(assets))[mask],
+        # positions without a recorded price are flat (zero quantity), like the full history records them
+        "value": np.where(quantity == 0, 0.0, quantity * price.values.ravel())[mask],
+        **{f: state[f].values.ravel()[mask] for f in fields},
+    }
+
+    return pd.DataFrame(data)[columns]
@@ -0,0 +1 @@
+from .sharded_orderbook import ShardedOrderbookActor, sqlite_orderbook_factory
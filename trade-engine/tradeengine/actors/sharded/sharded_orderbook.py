@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+from dataclasses import replace
+from datetime import datetime
+from functools import partial
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import pandas as pd
+import pykka
+
+from tradeengine.actors.orderbook_actor import AbstractOrderbookActor, market_data_prices
+from tradeengine.dto import Asset, Order, QuantityOrder
+from tradeengine.dto.order import ExpectedExecutionPrice
+from tradeengine.dto.portfolio import PortfolioValue
+from tradeengine.messages.messages import NewBidAskMarketData, NewBarMarketData
+
+LOG = logging.getLogger(__name__)
+
+# (portfolio_actor, shard) -> orderbook, needs to be picklable as it is sent to the worker processes
+OrderbookFactory = Callable[[Any, int], AbstractOrderbookActor]
+
+
+class ShardedOrderbookActor(AbstractOrderbookActor):
+    """
+    An orderbook front-end partitioning all orders by the hash of their asset across worker processes. Each worker
+    holds its own (unchanged) orderbook with its own store, created by the `orderbook_factory`, and does the store
+    work like evicting and matching orders outside the GIL of the actor system.
+
+    Consistent ordering protocol: the quotes of a timestamp (a `NewMarketDataBatch`, one asset each) are sent to all
+    shards at once and every shard evicts and matches the orders of its assets in parallel. Neither touches the
+    portfolio. Then the front-end walks through the quotes in their original order, tells the portfolio about the
+    quote and executes the matched orders, asking the portfolio value for relative orders and filling the orders
+    in their shard. So the portfolio sees the same sequence of messages as with a single orderbook and relative orders
+    always get the portfolio value including all trades executed before, no matter on which shard they happened.
+
+    Order ids are made unique across shards (`local_id * nr_of_shards + shard`).
+    """
+
+    batches_market_data = True
+
+    def __init__(
+            self,
+            portfolio_actor: pykka.ActorRef,
+            orderbook_factory: OrderbookFactory,
+            nr_of_shards: int | None = None,
+            mp_context: str = 'spawn',
+    ):
+        super().__init__(portfolio_actor)
+        self.nr_of_shards = nr_of_shards or os.cpu_count()
+        self.shards: Dict[Asset, int] = {}
+        self.connections: List[Connection] = []
+        self.workers: List[multiprocessing.Process] = []
+
+        # never fork a process running actor threads
+        ctx = multiprocessing.get_context(mp_context)
+        for shard in range(self.nr_of_shards):
+            connection, worker_connection = ctx.Pipe()
+            worker = ctx.Process(target=_run_shard, args=(worker_connection, orderbook_factory, shard), daemon=True)
+            worker.start()
+
+            self.connections.append(connection)
+            self.workers.append(worker)
+
+        # wait until all orderbooks are created
+        self._call_all([("ping", ())] * self.nr_of_shards)
+
+    def on_stop(self) -> None:
+        try:
+            for connection in self.connections:
+                connection.send(None)
+
+            for worker in self.workers:
+                worker.join(10)
+        except Exception as e:
+            LOG.error(e)
+        finally:
+            super().on_stop()
+
+    def shard_of(self, asset: Asset) -> int:
+        # use a hash which is stable across processes and runs
+        shard = self.shards.get(asset)
+        if shard is None:
+            shard = self.shards[asset] = int(hashlib.md5(str(asset).encode("utf-8")).hexdigest(), 16) % self.nr_of_shards
+
+        return shard
+
+    def place_order(self, order: Order) -> Order:
+        return self.place_orders([order])[0]
+
+    def place_orders(self, orders: List[Order]) -> List[Order]:
+        shards: Dict[int, List[int]] = {}
+        for i, order in enumerate(orders):
+            shards.setdefault(self.shard_of(order.asset), []).append(i)
+
+        # all shards store their orders in parallel
+        placed_orders: List[Order | None] = [None] * len(orders)
+        results = self._call_all([("place_orders", ([orders[i] for i in shards.get(s, [])],)) for s in range(self.nr_of_shards)])
+        for shard, placed in enumerate(results):
+            for i, order in zip(shards.get(shard, []), placed):
+                placed_orders[i] = self._global_order(order, shard)
+
+        return placed_orders
+
+    def new_market_data(self, asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask):
+        shard = self.shard_of(asset)
+        orders = self._call(shard, "prepare_market_data", [(asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask)])[0]
+        return self._execute_prepared_orders(shard, orders, asset, as_of, open_bid, open_ask, close_bid, close_ask)
+
+    def new_market_data_batch(self, messages: List[NewBidAskMarketData | NewBarMarketData]) -> int:
+        executed_orders = 0
+        for chunk in _independent_chunks(messages):
+            # all shards evict and match the orders of their assets in parallel
+            quotes: List[List[Tuple]] = [[] for _ in range(self.nr_of_shards)]
+            for message in chunk:
+                quotes[self.shard_of(message.asset)].append((message.asset, message.as_of, *market_data_prices(message)))
+
+            prepared = [iter(orders) for orders in self._call_all([("prepare_market_data", (q,)) for q in quotes])]
+
+            # only the portfolio updates and the executions are serialized in the order of the quotes
+            for message in chunk:
+                shard = self.shard_of(message.asset)
+                open_bid, open_ask, _, _, close_bid, close_ask = market_data_prices(message)
+                self.portfolio_actor.tell(message)
+                executed_orders += self._execute_prepared_orders(shard, next(prepared[shard]), message.asset, message.as_of, open_bid, open_ask, close_bid, close_ask)
+
+        return executed_orders
+
+    def _execute_prepared_orders(self, shard: int, orders: List[Order], asset, as_of, open_bid, open_ask, close_bid, close_ask) -> int:
+        expected_price = ExpectedExecutionPrice(as_of, open_bid, open_ask, close_bid, close_ask)
+        return self.execute_orders(asset, as_of, expected_price, [self._global_order(o, shard) for o in orders])
+
+    def get_full_orderbook(self):
+        return [o for orders in self._call_all([("get_full_orderbook", ())] * self.nr_of_shards) for o in orders]
+
+    def get_all_executed_orders(self, include_evicted=False) -> pd.DataFrame:
+        frames = []
+        for shard, df in enumerate(self._call_all([("get_all_executed_orders", (include_evicted,))] * self.nr_of_shards)):
+            if len(df) > 0:
+                # the same global order ids as the placed orders
+                frames.append(df.assign(order_id=df["order_id"] * self.nr_of_shards + shard))
+
+        if len(frames) <= 0:
+            return pd.DataFrame([])
+
+        # same order as a single orderbook returns them
+        return pd.concat(frames).sort_values(["valid_from", "asset"], kind="stable", ignore_index=True)
+
+    def _evict_orders(self, asset: Asset, as_of: datetime) -> int:
+        raise NotImplementedError("orders are evicted by the shards while preparing the market data")
+
+    def _get_orders_for_execution(self, asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask) -> List[Order]:
+        raise NotImplementedError("orders are matched by the shards while preparing the market data")
+
+    def _execute_order(self, order: QuantityOrder, expected_execution_time: datetime, expected_price: float, pv: PortfolioValue | None) -> Tuple[float | None, float | None, float | None]:
+        # fills are the only store work which depends on the portfolio (the quantity of relative orders)
+        local_order = replace(order, id=None if order.id is None else order.id // self.nr_of_shards)
+        return self._call(self.shard_of(order.asset), "_execute_order", local_order, expected_execution_time, expected_price, pv)
+
+    def _global_order(self, order: Order | None, shard: int) -> Order | None:
+        if order is None or order.id is None: return order
+        return replace(order, id=order.id * self.nr_of_shards + shard)
+
+    def _call(self, shard: int, method: str, *args) -> Any:
+        self.connections[shard].send((method, args))
+        return self._receive(shard)
+
+    def _call_all(self, calls: List[Tuple[str, Tuple]]) -> List[Any]:
+        # send to all shards first such that they work in parallel
+        for connection, call in zip(self.connections, calls):
+            connection.send(call)
+
+        return [self._receive(shard) for shard in range(len(calls))]
+
+    def _receive(self, shard: int) -> Any:
+        connection = self.connections[shard]
+        while True:
+            kind, value = connection.recv()
+            match kind:
+                case "result":
+                    return value
+                case "error":
+                    raise value
+                case "tell":
+                    self.portfolio_actor.tell(value)
+                case "ask":
+                    connection.send(self.portfolio_actor.ask(value))
+
+
+class PortfolioChannel(object):
+    """
+    Stands in for the portfolio actor within a shard worker, all messages are sent to the front-end which forwards
+    them to the real portfolio actor.
+    """
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def tell(self, message: Any):
+        self.connection.send(("tell", message))
+
+    def ask(self, message: Any, block: bool = True, timeout: float | None = None) -> Any:
+        self.connection.send(("ask", message))
+        return self.connection.recv()
+
+
+def _run_shard(connection: Connection, orderbook_factory: OrderbookFactory, shard: int):
+    orderbook = orderbook_factory(PortfolioChannel(connection), shard)
+    try:
+        while True:
+            call = connection.recv()
+            if call is None: break
+
+            method, args = call
+            try:
+                match method:
+                    case "ping": result = None
+                    case "prepare_market_data": result = _prepare_market_data(orderbook, *args)
+                    case _: result = getattr(orderbook, method)(*args)
+                connection.send(("result", result))
+            except Exception as e:
+                LOG.exception(f"shard {shard} failed to execute {method}")
+                connection.send(("error", e))
+    finally:
+        orderbook.on_stop()
+
+
+def _prepare_market_data(orderbook: AbstractOrderbookActor, quotes: List[Tuple]) -> List[List[Order]]:
+    # evicts and matches the orders of each quote, the executable orders are executed by the front-end
+    executable_orders = []
+    for asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask in quotes:
+        orderbook._evict_orders(asset, as_of)
+        executable_orders.append(orderbook._get_orders_for_execution(asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask))
+
+    return executable_orders
+
+
+def _independent_chunks(messages: List[NewBidAskMarketData | NewBarMarketData]) -> Iterator[List[NewBidAskMarketData | NewBarMarketData]]:
+    # quotes of the same timestamp and distinct assets can be matched before any of them is executed
+    chunk, assets = [], set()
+    for message in messages:
+        if len(chunk) > 0 and (message.asset in assets or message.as_of != chunk[0].as_of):
+            yield chunk
+            chunk, assets = [], set()
+
+        chunk.append(message)
+        assets.add(message.asset)
+
+    if len(chunk) > 0:
+        yield chunk
+
+
+def sqlite_orderbook_factory(file_pattern: str | None = None, **kwargs) -> OrderbookFactory:
+    """
+    A (picklable) factory of `SQLOrderbookActor`s for the shard workers, using an in memory database per shard or a
+    file per shard like `file_pattern="/tmp/orderbook-{shard}.db"`. The kwargs are passed to the `SQLOrderbookActor`.
+    """
+    return partial(_create_sqlite_orderbook, file_pattern, kwargs)
+
+
+def _create_sqlite_orderbook(file_pattern: str | None, kwargs: Dict[str, Any], portfolio_actor, shard: int) -> AbstractOrderbookActor:
+    from sqlalchemy import create_engine, StaticPool
+    from tradeengine.actors.sql import SQLOrderbookActor
+
+    if file_pattern is None:
+        engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(f'sqlite:///{file_pattern.format(shard=shard)}')
+
+    return SQLOrderbookActor(portfolio_actor, engine, **kwargs)
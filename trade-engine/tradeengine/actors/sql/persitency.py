@@ -30,6 +30,7 @@ class OrderBook(OrderBookBase):
 
     def to_history(self, order: QuantityOrder = None, execute_time: datetime = None, execute_price: float = None, status: int = None):
         return OrderBookHistory(
+            order_id=self.id,
             strategy_id=self.strategy_id,
             order_type=self.order_type,
             asset=self.asset,
@@ -49,6 +50,7 @@ class OrderBook(OrderBookBase):
 class OrderBookHistory(OrderBookBase):
     __tablename__ = 'orderbook_history'
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(index=True, nullable=True)
     strategy_id: Mapped[str] = mapped_column(index=True)
     order_type: Mapped[OrderTypes] = mapped_column(Enum(OrderTypes, length=50), index=True)
     asset: Mapped[Asset] = composite(mapped_column(String(255), index=True))
@@ -66,6 +68,7 @@ class OrderBookHistory(OrderBookBase):
     def to_dict(self):
         return dict(
             id=self.id,
+            order_id=self.order_id,
             strategy_id=self.strategy_id,
             order_type=self.order_type,
             asset=str(self.asset),
@@ -131,3 +134,27 @@ class PortfolioHistory(PortfolioBase):
             cost_basis=self.cost_basis,
             value=self.value,
         )
+
+
+class PortfolioPrice(PortfolioBase):
+    # the evaluation price of a position whenever it changed (delta history)
+    __tablename__ = 'portfolio_price'
+    strategy_id: Mapped[str] = mapped_column(primary_key=True)
+    asset: Mapped[Asset] = composite(mapped_column(String(255), primary_key=True))
+    time: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    price: Mapped[float] = mapped_column()
+
+    def to_dict(self):
+        return dict(
+            strategy_id=self.strategy_id,
+            asset=str(self.asset),
+            time=self.time,
+            price=self.price,
+        )
+
+
+class PortfolioTick(PortfolioBase):
+    # every timestamp the portfolio got evaluated at (delta history)
+    __tablename__ = 'portfolio_tick'
+    strategy_id: Mapped[str] = mapped_column(primary_key=True)
+    time: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
@@ -1,22 +1,39 @@
 import logging
+import threading
+from collections import Counter
+from dataclasses import replace
 from datetime import datetime
-from typing import List, Tuple, Callable
+from typing import Any, Callable, List, Set, Tuple
 
 import pandas as pd
 import pykka
-from sqlalchemy import Engine, select, and_, or_, between, case, null
+from sqlalchemy import Engine, select, and_, or_, between, case, null, func
 from sqlalchemy.orm import Session
 
+from tradeengine.actors.instrumentation import instrument_engine
 from tradeengine.actors.orderbook_actor import AbstractOrderbookActor
 from tradeengine.actors.sql.persitency import OrderBookBase, OrderBook, OrderBookHistory
-from tradeengine.dto import Asset, OrderTypes, QuantityOrder, CloseOrder, PercentOrder, TargetQuantityOrder, \
-    TargetWeightOrder, Order
+from tradeengine.dto import ASSETS, Asset, OrderTypes, QuantityOrder, CloseOrder, PercentOrder, \
+    TargetQuantityOrder, TargetWeightOrder, Order
 from tradeengine.dto.portfolio import PortfolioValue
+from tradeengine.messages.codec import to_ns, NONE_TIME, MAX_TIME
 
 LOG = logging.getLogger(__name__)
 
+# (store, strategy_id) of all orderbooks holding an in memory index of the open orders
+_OWNED_STORES: Set[Tuple[Any, str]] = set()
+_OWNED_STORES_LOCK = threading.Lock()
+
 
 class SQLOrderbookActor(AbstractOrderbookActor):
+    """
+    An orderbook storing its orders in a sql database.
+
+    The orderbook keeps an in memory index of its open orders which is only correct as long as no one else writes
+    orders of the same `strategy_id` to the store. An in memory sqlite database is owned exclusively by default, for
+    all other stores pass `exclusive=True` to promise that no other actor or process writes the same orders, else
+    every quote queries the database. Two orderbooks owning the same store in this process raise a ValueError.
+    """
 
     def __init__(
             self,
@@ -24,7 +41,8 @@ class SQLOrderbookActor(AbstractOrderbookActor):
             alchemy_engine: Engine,
             fee_calculator: Callable[[float, float], float] = lambda qty, price: 0,
             slippage: float = 0,
-            strategy_id: str = ''
+            strategy_id: str = '',
+            exclusive: bool | None = None,
     ):
         super().__init__(portfolio_actor)
         self.engine = alchemy_engine
@@ -32,12 +50,39 @@ class SQLOrderbookActor(AbstractOrderbookActor):
 
         self.fee_calculator = fee_calculator
         self.slippage = slippage
+        if self.metrics is not None: instrument_engine(alchemy_engine)
 
         LOG.info("generate OrderBook database objects")
         OrderBookBase.metadata.create_all(bind=alchemy_engine)
 
+        # an in memory index of the open orders (count by asset id and the earliest expiry in ns) which lets us skip
+        # the database for all market data of assets without orders and for bars where no order can be evicted
+        self.assets = ASSETS
+        self.open_orders: Counter[int] = Counter()
+        self.next_expiry = MAX_TIME
+        self.store = _store_of(alchemy_engine, strategy_id) if (_is_memory_store(alchemy_engine) if exclusive is None else exclusive) else None
+        if self.store is None:
+            LOG.warning(f"orderbook {strategy_id} does not own its store exclusively, the open orders are not indexed")
+            return
+
+        with _OWNED_STORES_LOCK:
+            if self.store in _OWNED_STORES:
+                raise ValueError(f"the orders of strategy '{strategy_id}' are already owned by another orderbook")
+            _OWNED_STORES.add(self.store)
+
+        with Session(self.engine) as session:
+            for asset, valid_until in session.execute(select(OrderBook.asset, OrderBook.valid_until).where(OrderBook.strategy_id == self.strategy_id)):
+                self._index_order(asset, valid_until)
+
+    @property
+    def indexed(self) -> bool:
+        return self.store is not None
+
     def on_stop(self) -> None:
         try:
+            with _OWNED_STORES_LOCK:
+                _OWNED_STORES.discard(self.store)
+
             # close database connection
             self.engine.dispose()
         except Exception as e:
@@ -47,8 +92,12 @@ class SQLOrderbookActor(AbstractOrderbookActor):
 
     def place_order(self, order: Order) -> Order:
         # simply store the order in the datastructure i.e. sqlite
+        return self.place_orders([order])[0]
+
+    def place_orders(self, orders: List[Order]) -> List[Order]:
+        # store all orders within one transaction
         with Session(self.engine) as session:
-            session.add(
+            order_book_entries = [
                 OrderBook(
                     strategy_id=self.strategy_id,
                     order_type=order.type,
@@ -58,11 +107,19 @@ class SQLOrderbookActor(AbstractOrderbookActor):
                     valid_from=order.valid_from,
                     valid_until=order._valid_until(),
                     qty=order.size
-                )
-            )
+                ) for order in orders
+            ]
+            session.add_all(order_book_entries)
+            session.flush()
+
+            # return the orders as they are stored in the orderbook
+            placed_orders = [replace(order, id=entry.id) for order, entry in zip(orders, order_book_entries)]
             session.commit()
 
-        return order
+        for order in orders:
+            self._index_order(order.asset, order._valid_until())
+
+        return placed_orders
 
     def get_full_orderbook(self):
         with Session(self.engine) as session:
@@ -71,6 +128,8 @@ class SQLOrderbookActor(AbstractOrderbookActor):
     def _evict_orders(self, asset: Asset, as_of: datetime) -> int:
         # delete orders where valid_until < as_of from the orderbook and put it to the orderbook_history
         # returns the number of evicted orders
+        if self.indexed and _time_ns(as_of, MAX_TIME) <= self.next_expiry: return 0
+
         evicted = 0
         with Session(self.engine) as session:
             for order in session.scalars(
@@ -79,10 +138,15 @@ class SQLOrderbookActor(AbstractOrderbookActor):
             ):
                 session.delete(order)
                 session.add(order.to_history())
+                self.open_orders[self.assets.id_of(order.asset)] -= 1
                 evicted += 1
 
             session.commit()
 
+            # all orders expiring before as_of are gone, the database knows the next expiry
+            next_expiry = session.scalar(select(func.min(OrderBook.valid_until)).where(OrderBook.strategy_id == self.strategy_id))
+            self.next_expiry = MAX_TIME if next_expiry is None else _time_ns(next_expiry, NONE_TIME)
+
         return evicted
 
     def _get_orders_for_execution(self, asset, as_of, open_bid, open_ask, high, low, close_bid, close_ask) -> List[Order]:
@@ -99,6 +163,8 @@ class SQLOrderbookActor(AbstractOrderbookActor):
                 case OrderTypes.TARGET_WEIGHT:
                     return TargetWeightOrder(o.asset, o.qty, o.valid_from, o.limit, o.stop_limit, o.valid_until, o.id)
 
+        if self.indexed and self.open_orders[self.assets.id_of(asset)] <= 0: return []
+
         with Session(self.engine) as session:
             sql = _get_executable_orders_from_orderbook_sql(self.strategy_id, asset, as_of, high, low)
             return [map_order(o) for o in session.scalars(sql)]
@@ -122,11 +188,17 @@ class SQLOrderbookActor(AbstractOrderbookActor):
             ):
                 session.delete(o)
                 session.add(o.to_history(order, expected_execution_time, expected_price, 2 if not has_impact else None))
+                self.open_orders[self.assets.id_of(o.asset)] -= 1
 
             session.commit()
 
         return (order.size, price, fee) if has_impact else (None, None, None)
 
+    def _index_order(self, asset: Asset, valid_until: datetime | None):
+        self.open_orders[self.assets.id_of(asset)] += 1
+        if valid_until is not None:
+            self.next_expiry = min(self.next_expiry, _time_ns(valid_until, NONE_TIME))
+
     def get_all_executed_orders(self, include_evicted=False) -> pd.DataFrame:
         filer = (OrderBookHistory.strategy_id == self.strategy_id)\
             if include_evicted else ((OrderBookHistory.strategy_id == self.strategy_id) & (OrderBookHistory.status == 1))
@@ -143,6 +215,21 @@ class SQLOrderbookActor(AbstractOrderbookActor):
                 ]
             )
 
+def _is_memory_store(engine: Engine) -> bool:
+    # no other connection pool (let alone process) can see an in memory sqlite database
+    return engine.url.get_backend_name() == 'sqlite' and engine.url.database in (None, '', ':memory:')
+
+
+def _store_of(engine: Engine, strategy_id: str) -> Tuple[Any, str]:
+    # every engine has its own in memory database, all other stores are identified by their url
+    return (id(engine) if _is_memory_store(engine) else engine.url.render_as_string(hide_password=True)), strategy_id
+
+
+def _time_ns(dt: datetime, aware: int) -> int:
+    # timezone aware timestamps are only compared by the database, `aware` is chosen such that no query is skipped
+    return to_ns(dt) if dt.tzinfo is None else aware
+
+
 def _get_executable_orders_from_orderbook_sql(strategy_id, asset, as_of, low, high):
     # all orders where valid_from >= as_of and valid_until >= as_of and where the limit is matched
     # return fifo
@@ -8,11 +8,14 @@ from typing import Dict, Any, Tuple
 import pandas as pd
 from sqlalchemy import Engine, text, select, func, update
 from sqlalchemy.orm import Session
-from tradeengine.actors.portfolio_actor import AbstractPortfolioActor
-from tradeengine.actors.sql.persitency import PortfolioBase, PortfolioHistory, PortfolioPosition
+from tradeengine.actors.instrumentation import backend_timer, instrument_engine
+from tradeengine.actors.portfolio_actor import AbstractPortfolioActor, expand_position_changes
+from tradeengine.actors.sql.persitency import PortfolioBase, PortfolioHistory, PortfolioPosition, PortfolioPrice, \
+    PortfolioTick
 from tradeengine.dto.position import PositionValue
 from tradeengine.dto.portfolio import PortfolioValue
 from tradeengine.dto.asset import CASH
+from tradeengine.messages.feed import PortfolioFeedWriter
 from tradeengine.dto import Asset
 
 LOG = logging.getLogger(__name__)
@@ -28,13 +31,22 @@ class SQLPortfolioActor(AbstractPortfolioActor):
             alchemy_engine: Engine,
             funding: float = 1.0,
             strategy_id: str = '',
-            funding_date: datetime = FUNDING_DATE
+            funding_date: datetime = FUNDING_DATE,
+            delta_history: bool = False,
+            feed: PortfolioFeedWriter | str | None = None,
     ):
-        super().__init__(funding)
+        super().__init__(funding, feed)
         self.alchemy_engine = alchemy_engine
         self.strategy_id = strategy_id
         self.positions: Dict[Asset, PortfolioPosition] = {}
         self.funding_date = funding_date
+        if self.metrics is not None: instrument_engine(alchemy_engine)
+
+        # a delta history only records the position states at trades, the evaluation prices when they change for
+        # non-zero positions and the evaluation timestamps (ticks), the full history is reconstructed when needed
+        self.delta_history = delta_history
+        self.prices: Dict[Asset, float] = {}
+        self.last_tick: datetime | None = None
 
         LOG.info("generate Portfolio database objects")
         PortfolioBase.metadata.create_all(bind=alchemy_engine)
@@ -54,6 +66,7 @@ class SQLPortfolioActor(AbstractPortfolioActor):
             session.commit()
 
             self.positions[initial_portfolio[-1].asset] = initial_portfolio[-1]
+            if delta_history: self._record_states([CASH], funding_date)
             self.update_position_value(CASH, funding_date, 1.0, 1.0)
 
     def on_stop(self) -> None:
@@ -86,6 +99,14 @@ class SQLPortfolioActor(AbstractPortfolioActor):
                         .values({PortfolioHistory.time: as_of - timedelta(days=1)})
                 )
 
+                if self.delta_history:
+                    for table in (PortfolioPrice, PortfolioTick):
+                        session.execute(
+                            update(table)\
+                                .where((table.strategy_id == self.strategy_id) & (table.time == self.funding_date))\
+                                .values({table.time: as_of - timedelta(days=1)})
+                        )
+
             session.commit()
 
         # update all current positions
@@ -96,6 +117,7 @@ class SQLPortfolioActor(AbstractPortfolioActor):
 
         self.session.add_all([self.positions[asset], self.positions[CASH]])
         self.session.commit()
+        if self.delta_history: self._record_states([asset, CASH], as_of)
 
         # since we executed a trade for a given price we know exactly the price of the asset, and thus we
         # re-evaluate the portfolio.
@@ -104,20 +126,22 @@ class SQLPortfolioActor(AbstractPortfolioActor):
         # Also since cash probably never gets a price we need to force cash evaluation as well
         self.update_position_value(CASH, as_of, 1.0, 1.0)
 
-    def update_position_value(self, asset, as_of, bid, ask):
+    def update_position_value(self, asset, as_of, bid, ask, asset_id: int | None = None, as_of_ns: int | None = None):
         pos = self.positions.get(asset, None)
         if pos is None: return
 
         assert as_of >= pos.time, f"Can't back evaluate positions! {pos.time} > {as_of}"
 
         position_value = pos.quantity * ask if pos.quantity < 0 else pos.quantity * bid
+        if self.delta_history:
+            return self._record_price(pos, as_of, ask if pos.quantity < 0 else bid, position_value)
 
         # we don't want these guys to stick around in some session memory
         # maybe there is a better way then opening a new session for this.
         # FIXME this is a problem when we have more then one trades for the same timestamp as any trade is against the
         #  CASH asset and thus raises a duplicate key error. But one idea is anyways to introduce a save history actor
         #  that one should implement some sort of upsert ...
-        with Session(self.alchemy_engine) as session:
+        with backend_timer(self.metrics, "history_append"), Session(self.alchemy_engine) as session:
             session.merge(
                 PortfolioHistory(
                     strategy_id=self.strategy_id,
@@ -135,6 +159,36 @@ class SQLPortfolioActor(AbstractPortfolioActor):
         self.session.add(pos)
         self.session.commit()
 
+    def _record_states(self, assets, as_of: datetime):
+        with backend_timer(self.metrics, "history_append"), Session(self.alchemy_engine) as session:
+            for asset in assets:
+                pos = self.positions[asset]
+                session.merge(
+                    PortfolioHistory(strategy_id=self.strategy_id, asset=asset, time=as_of, quantity=pos.quantity, cost_basis=pos.cost_basis, value=pos.value)
+                )
+            session.commit()
+
+    def _record_price(self, pos: PortfolioPosition, as_of: datetime, price: float, position_value: float):
+        # only new ticks and changed prices of non-zero positions are written
+        new_tick = as_of != self.last_tick
+        new_price = pos.quantity != 0 and self.prices.get(pos.asset) != price
+        if not (new_tick or new_price): return
+
+        with backend_timer(self.metrics, "history_append"), Session(self.alchemy_engine) as session:
+            if new_tick:
+                session.merge(PortfolioTick(strategy_id=self.strategy_id, time=as_of))
+                self.last_tick = as_of
+            if new_price:
+                session.merge(PortfolioPrice(strategy_id=self.strategy_id, asset=pos.asset, time=as_of, price=price))
+                self.prices[pos.asset] = price
+
+            session.commit()
+
+        if pos.value != position_value:
+            pos.value = position_value
+            self.session.add(pos)
+            self.session.commit()
+
     def get_portfolio_value(self, as_of: datetime | None = None) -> PortfolioValue:
         if as_of is None: as_of = datetime.max
 
@@ -152,16 +206,22 @@ class SQLPortfolioActor(AbstractPortfolioActor):
     def get_portfolio_timeseries(self, as_of: datetime | None = None) -> pd.DataFrame:
         if as_of is None: as_of = datetime.max
 
+        df = self._select_frame(PortfolioHistory, as_of)
+        if self.delta_history:
+            ticks = [t.time for t in self._select(PortfolioTick, as_of)]
+            df = expand_position_changes(df, self._select_frame(PortfolioPrice, as_of), ticks)
+
+        return df
+
+    def _select(self, table, as_of: datetime):
         with Session(self.alchemy_engine) as session:
-            return pd.DataFrame(
-                [
-                    ph.to_dict() for ph in
-                        session.scalars(
-                            select(PortfolioHistory)\
-                                .where((PortfolioHistory.strategy_id == self.strategy_id) & (PortfolioHistory.time <= as_of))\
-                                .order_by(PortfolioHistory.time)
-                        )
-                ]
+            return list(
+                session.scalars(
+                    select(table)\
+                        .where((table.strategy_id == self.strategy_id) & (table.time <= as_of))\
+                        .order_by(table.time)
+                )
             )
 
-
+    def _select_frame(self, table, as_of: datetime) -> pd.DataFrame:
+        return pd.DataFrame([row.to_dict() for row in self._select(table, as_of)])
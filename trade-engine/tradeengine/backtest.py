@@ -1,24 +1,25 @@
-import datetime
+from __future__ import annotations
+
 import logging
 import click
-import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
-from functools import partial
-from typing import Dict, List, Hashable, Tuple, Any
+from typing import Dict, List, Hashable, TYPE_CHECKING
 
 import pandas as pd
-import pykka
-from pykka._future import Future
 
-import tradeengine
-from tradeengine.actors.memory import PandasQuoteProviderActor
-from tradeengine.dto import Asset, Order
-from tradeengine.messages import NewOrderMessage, ReplayAllMarketDataMessage, PortfolioPerformanceMessage, \
-    AllExecutedOrderHistory
+from tradeengine.storage import LazyFrame, save_frames, open_frames, is_artifact, compact_frame, compaction_report
+
+if TYPE_CHECKING:
+    import pykka
 
 LOG = logging.getLogger(__name__)
-ORDER_MODULE = tradeengine.dto.order.__name__
+
+
+FRAMES = (
+    'market_data', 'signals', 'orders', 'position_values', 'position_weights', 'porfolio_performance',
+    'market_data_extra_data'
+)
 
 
 @dataclass(frozen=True, eq=True)
@@ -29,32 +30,46 @@ class Backtest:
     position_values: pd.DataFrame
     position_weights:pd.DataFrame
     porfolio_performance: pd.DataFrame
-    market_data_extra_data: pd.DataFrame = pd.DataFrame({})
+    market_data_extra_data: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+    def __getattribute__(self, name):
+        # loaded backtests hold lazy frames which we only read from disk once they are touched
+        value = object.__getattribute__(self, name)
+        if isinstance(value, LazyFrame):
+            value = value.load()
+            object.__setattr__(self, name, value)
+
+        return value
+
+    def frame(self, name: str) -> pd.DataFrame | LazyFrame:
+        # returns the frame without loading it, use this to only read the needed columns i.e. `frame(..)[asset]`
+        assert name in FRAMES, f"unknown frame {name}"
+        return object.__getattribute__(self, name)
 
     @property
     def assets(self):
-        return set([c[0] for c in self.market_data.columns])
+        return set([c[0] for c in self.frame('market_data').columns])
+
+    def compact(self) -> 'Backtest':
+        # float32 prices and values, categorical assets
+        return Backtest(*[compact_frame(getattr(self, name)) for name in FRAMES])
 
-    def save(self, filename):
-        self.market_data.to_hdf(filename, key='market_data')
-        self.signals.to_hdf(filename, key='signals')
-        self.orders.to_hdf(filename, key='orders')
-        self.position_values.to_hdf(filename, key='position_values')
-        self.position_weights.to_hdf(filename, key='position_weights')
-        self.porfolio_performance.to_hdf(filename, key='porfolio_performance')
-        self.market_data_extra_data.to_hdf(filename, key='market_data_extra_data')
+    def compaction_report(self) -> pd.DataFrame:
+        # memory saved by `compact()` per frame and the largest relative error against the float64 frames
+        frames = {name: getattr(self, name) for name in FRAMES}
+        return compaction_report(frames, {name: compact_frame(df) for name, df in frames.items()})
+
+    def save(self, path, compact: bool = False):
+        save_frames(path, {name: getattr(self, name) for name in FRAMES}, kind='backtest', compact=compact)
 
     @staticmethod
-    def load(filename) -> 'Backtest':
-        return Backtest(
-            pd.read_hdf(filename, key='market_data'),
-            pd.read_hdf(filename, key='signals'),
-            pd.read_hdf(filename, key='orders'),
-            pd.read_hdf(filename, key='position_values'),
-            pd.read_hdf(filename, key='position_weights'),
-            pd.read_hdf(filename, key='porfolio_performance'),
-            pd.read_hdf(filename, key='market_data_extra_data'),
-        )
+    def load(path) -> 'Backtest':
+        if not is_artifact(path):
+            # legacy multi key hdf5 file
+            return Backtest(*[pd.read_hdf(path, key=name) for name in FRAMES])
+
+        frames = open_frames(path)
+        return Backtest(*[frames[name] for name in FRAMES])
 
 
 class BacktestStrategy(object):
@@ -67,6 +82,7 @@ class BacktestStrategy(object):
             market_data_price_columns: List = ("Open", "High", "Low", "Close"),
             market_data_extra_data: Dict[Hashable, pd.DataFrame] = None,
             market_data_interval: timedelta = timedelta(seconds=1),
+            compact: bool = False,
     ):
         self.orderbook_actor = orderbook_actor
         self.portfolio_actor = portfolio_actor
@@ -74,32 +90,37 @@ class BacktestStrategy(object):
         self.market_data_price_columns = list(market_data_price_columns) if not isinstance(market_data_price_columns, list) else market_data_price_columns
         self.market_data_extra_data = market_data_extra_data if market_data_extra_data is not None else {k: pd.DataFrame({}) for k in market_data.keys()}
         self.market_data_interval = market_data_interval
+        self.compact = compact
 
     def run_backtest(
             self,
-            signals: Dict[Hashable, pd.Series],  # pass a series of [pd.Timestamp, Dict[str[Type[<Order]], kwargs]]]
+            signals: Dict[Hashable, pd.Series] | pd.DataFrame,  # pass a series of [pd.Timestamp, Dict[str[Type[<Order]], kwargs]]] or a target weight matrix
             resample_rule: str = 'D',
             shutdown_on_complete: bool = True
     ) -> Backtest:
+        # the actor system is only imported when running a backtest, loading a stored backtest does not need it
+        import pykka
+        from tradeengine.actors.memory import PandasQuoteProviderActor
+        from tradeengine.dto import Asset
+        from tradeengine.messages import NewOrdersMessage, ReplayAllMarketDataMessage, PortfolioPerformanceMessage, \
+            AllExecutedOrderHistory
+        from tradeengine.runtime import start_actor, runtime_of
+        from tradeengine.signals import signal_frame, generate_orders
+
         market_data = self.market_data
 
         # create orders from signals
-        orders = {
-            h: pd.Series(map(self._gen_trading_days_aware_orders(h), s.items()), index=s.index)\
-                for h, s in signals.items()
-        }
-
-        # ask orderbook about all orders we want to place
-        #  NOTE in order to return this data structure we need to json serialize the Order/Asset objects
-        placed_orders = {
-            a: s.apply(self._place_order).apply(lambda futures: [f.get().todict() for f in futures if f.get() is not None])\
-                for a, s in orders.items()
-        }
-
-        # generate market data for market data actor
+        signal_orders = generate_orders(signals, {h: df.index for h, df in market_data.items()}, self.market_data_interval)
+
+        # ask orderbook to place all orders we want to place and keep them as a flat signal table
+        placed_orders = self.orderbook_actor.ask(NewOrdersMessage([o for _, o in signal_orders]))
+        trading_signals = signal_frame([(tst, o) for (tst, _), o in zip(signal_orders, placed_orders)])
+
+        # generate market data for market data actor, it runs in the same runtime as the orderbook
         market_data = {Asset(h): df for h, df in market_data.items()}
-        market_data_actor = PandasQuoteProviderActor.start(
-            self.portfolio_actor, self.orderbook_actor, market_data, self.market_data_price_columns
+        market_data_actor = start_actor(
+            PandasQuoteProviderActor, self.portfolio_actor, self.orderbook_actor, market_data, self.market_data_price_columns,
+            compact=self.compact, runtime=runtime_of(self.orderbook_actor)
         )
 
         try:
@@ -118,13 +139,12 @@ class BacktestStrategy(object):
             market_data_extra_data = \
                 pd.concat(self.market_data_extra_data.values(), keys=self.market_data_extra_data.keys(), axis=1, sort=True)
 
-            # make signals dataframe
-            trading_signals = pd.concat(placed_orders.values(), keys=placed_orders.keys(), axis=1, sort=True)
-
             # return all frame results
-            return Backtest(
+            backtest = Backtest(
                 used_marketdata_frame, trading_signals, executed_orders_frame, *portfolio_result_frames, market_data_extra_data
             )
+
+            return backtest.compact() if self.compact else backtest
         finally:
             if shutdown_on_complete:
                 LOG.info(f"shutting down actors: {self.portfolio_actor}, {self.orderbook_actor}, {market_data_actor}")
@@ -135,74 +155,55 @@ class BacktestStrategy(object):
                 except Exception as ignore:
                     LOG.error("ignored error: ", ignore)
 
-    def _gen_trading_days_aware_orders(self, symbol: Hashable):
-        market_data_index: pd.DatetimeIndex = self.market_data[symbol].index
-        trading_days_4_asset = market_data_index.to_series().shift(-1).fillna(datetime.datetime.max)
-        return partial(self._make_orders, market_data_index=trading_days_4_asset, asset=Asset(symbol))
-
-    def _make_orders(self, order_descriptions: Tuple[pd.Timestamp, Dict[str, Dict[str, Any]]], market_data_index: pd.Series, asset: Asset):
-        tst, order_description = order_descriptions
-        if order_description is None: return []
-
-        next_trading_tst = market_data_index.loc[tst]
-
-        if isinstance(tst, pd.Timestamp): tst = tst.to_pydatetime()
-        if isinstance(next_trading_tst, pd.Timestamp): next_trading_tst = next_trading_tst.to_pydatetime()
-
-        # prevent lookahead bias!!
-        valid_from = tst + self.market_data_interval
-
-        def make_order(order_type__kwargs):
-            order_type, order_kwargs = order_type__kwargs
-            if isinstance(order_type, str): order_type = getattr(sys.modules[ORDER_MODULE], order_type)
-
-            return order_type(
-                asset,
-                **{
-                    "size": None,
-                    "valid_until": next_trading_tst,
-                    **order_kwargs,
-                    "valid_from": valid_from
-                }
-            )
-
-        orders = list(map(make_order, order_description.items()))
-        return orders
-
-    def _place_order(self, orders: List[Order]) -> List[Future]:
-        return [self.orderbook_actor.ask(NewOrderMessage(order), block=False) for order in orders]
-
 
 @click.command()
 @click.option('-s', '--signals', type=str, help="glob string of signal csv files")
 @click.option('-q', '--quote-frames', type=str, help="glob string of quote csv files")
+@click.option('-w', '--workers', type=int, default=None, help="number of processes used to parse csv files")
+@click.option('--no-cache', is_flag=True, default=False, help="don't use/write the binary sidecar cache of csv files")
+@click.option('--sync', is_flag=True, default=False, help="run all actors synchronously in one thread (deterministic)")
+@click.option('--compact', is_flag=True, default=False, help="float32 prices and histories, categorical assets and delta encoded timestamps")
+@click.option('--memory-budget', type=int, default=None, help="MB of portfolio history kept in memory, older history is spilled to a temporary file")
 @click.argument('out_file', nargs=1)
-def cli(signals: str, quote_frames: str, out_file: str):
+def cli(signals: str, quote_frames: str, out_file: str, workers: int | None, no_cache: bool, sync: bool, compact: bool, memory_budget: int | None):
     from pathlib import Path
-
-    signals = {f.name: pd.read_csv(f, parse_dates=True, index_col="Date") for f in Path(".").glob(signals)}
-    quote_frames = {f.name: pd.read_csv(f, parse_dates=True, index_col="Date") for f in Path(".").glob(quote_frames)}
-    run(signals, quote_frames, out_file)
-
-
-def run(signals: Dict[Hashable, pd.Series], quote_frames: Dict[Hashable, pd.DataFrame], out_file: str):
+    from tradeengine.storage import read_csv_files
+
+    read_csv = dict(max_workers=workers, use_cache=not no_cache, parse_dates=True, index_col="Date")
+    signals = read_csv_files(Path(".").glob(signals), **read_csv)
+    quote_frames = read_csv_files(Path(".").glob(quote_frames), **read_csv)
+    run(signals, quote_frames, out_file, sync, compact, None if memory_budget is None else memory_budget << 20)
+
+
+def run(
+        signals: Dict[Hashable, pd.Series],
+        quote_frames: Dict[Hashable, pd.DataFrame],
+        out_file: str,
+        sync: bool = False,
+        compact: bool = False,
+        memory_budget: int | None = None,
+):
     import uuid
     from sqlalchemy import create_engine, StaticPool
     from tradeengine.actors.memory import MemPortfolioActor
     from tradeengine.actors.sql import SQLOrderbookActor
+    from tradeengine.runtime import start_actor, SyncRuntime
 
     strategy_id: str = str(uuid.uuid4())
-    portfolio_actor = MemPortfolioActor.start(funding=100)
-    orderbook_actor = SQLOrderbookActor.start(
+    runtime = SyncRuntime() if sync else None
+    portfolio_actor = start_actor(MemPortfolioActor, funding=100, compact=compact, memory_budget=memory_budget, runtime=runtime)
+    orderbook_actor = start_actor(
+        SQLOrderbookActor,
         portfolio_actor,
         create_engine('sqlite://', echo=False, connect_args={'check_same_thread': False}, poolclass=StaticPool),
-        strategy_id=strategy_id
+        strategy_id=strategy_id,
+        runtime=runtime
     )
 
-    backtest = BacktestStrategy(orderbook_actor, portfolio_actor, quote_frames).run_backtest(signals)
+    backtest = BacktestStrategy(orderbook_actor, portfolio_actor, quote_frames, compact=compact).run_backtest(signals)
 
     if out_file is not None:
-        backtest.save(out_file)
+        backtest.save(out_file, compact=compact)
 
 
 if __name__ == '__main__':
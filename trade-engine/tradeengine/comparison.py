@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from tradeengine.backtest import Backtest, FRAMES
+from tradeengine.storage import CachedFrame, FrameCache, FRAME_CACHE, is_artifact, open_frames
+
+LOG = logging.getLogger(__name__)
+
+PERIODS_PER_YEAR = 252
+SUMMARY_COLUMNS = ['start', 'end', 'total_return', 'cagr', 'volatility', 'sharpe', 'max_drawdown', 'orders']
+
+
+def summary_statistics(performance: pd.DataFrame, periods_per_year: int = PERIODS_PER_YEAR) -> Dict[str, float]:
+    """
+    Headline statistics of a `porfolio_performance` frame (only its `performance` column is needed). Volatility
+    and sharpe ratio (risk free rate of 0) are annualized by `periods_per_year`.
+    """
+    performance = performance["performance"].dropna()
+    if len(performance) <= 1:
+        return dict(start=None, end=None, total_return=np.nan, cagr=np.nan, volatility=np.nan, sharpe=np.nan, max_drawdown=np.nan)
+
+    values = performance.values.astype(float)
+    returns = np.diff(values) / values[:-1]
+    years = (performance.index[-1] - performance.index[0]) / pd.Timedelta(days=365.25)
+    std = returns.std(ddof=1)
+
+    return dict(
+        start=performance.index[0],
+        end=performance.index[-1],
+        total_return=values[-1] / values[0] - 1,
+        cagr=(values[-1] / values[0]) ** (1 / years) - 1 if years > 0 else np.nan,
+        volatility=std * np.sqrt(periods_per_year),
+        sharpe=returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan,
+        max_drawdown=(values / np.maximum.accumulate(values) - 1).min(),
+    )
+
+
+def find_backtests(paths: Iterable[str]) -> Dict[str, str]:
+    # backtest artifacts, legacy hdf5 files or directories containing artifacts, named by their file name
+    runs = {}
+    for path in paths:
+        path = str(path)
+        if os.path.isdir(path) and not is_artifact(path):
+            runs.update(find_backtests(sorted(e.path for e in os.scandir(path) if is_artifact(e.path) or e.name.endswith((".hdf5", ".hd5", ".h5")))))
+        else:
+            name = os.path.basename(os.path.normpath(path))
+            assert name not in runs, f"duplicate backtest name {name}"
+            runs[name] = path
+
+    return runs
+
+
+class BacktestComparison(object):
+    """
+    Compares many stored backtests (i.e. the results of a parameter sweep) side by side. Opening a comparison
+    only reads the manifests, the summary reads the (small) `porfolio_performance` frames of all runs and
+    `backtest(name)` drills into the heavy frames of a single run on demand. All loaded frames go through one
+    process wide `FrameCache`, so the memory of the comparison stays bounded by the cache budget.
+    """
+
+    def __init__(self, paths: Iterable[str] | Dict[str, str], cache: FrameCache = FRAME_CACHE, periods_per_year: int = PERIODS_PER_YEAR):
+        self.runs: Dict[str, str] = dict(paths) if isinstance(paths, dict) else find_backtests(paths)
+        self.cache = cache
+        self.periods_per_year = periods_per_year
+        self._frames: Dict[str, Dict[str, CachedFrame]] = {}
+        self._summary: pd.DataFrame | None = None
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.runs.keys())
+
+    def __len__(self):
+        return len(self.runs)
+
+    def frame(self, name: str, frame: str) -> pd.DataFrame:
+        assert frame in FRAMES, f"unknown frame {frame}"
+        path = self.runs[name]
+        if not is_artifact(path):
+            # legacy hdf5 files can at least be read key by key
+            return self.cache.get((path, frame), lambda: pd.read_hdf(path, key=frame))
+
+        return self._lazy_frames(name)[frame].load()
+
+    def _lazy_frames(self, name: str) -> Dict[str, CachedFrame]:
+        if name not in self._frames:
+            self._frames[name] = {f: CachedFrame(lf, self.cache) for f, lf in open_frames(self.runs[name]).items()}
+
+        return self._frames[name]
+
+    def performance(self, name: str) -> pd.DataFrame:
+        return self.frame(name, 'porfolio_performance')
+
+    def performances(self, names: Iterable[str] | None = None) -> pd.DataFrame:
+        # the performance of every run as one column, aligned on the union of all timestamps
+        names = self.names if names is None else list(names)
+        return pd.concat({name: self.performance(name)["performance"] for name in names}, axis=1)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row of `summary_statistics` per run. The number of orders is taken from the artifact manifest
+        without reading the orders table.
+        """
+        if self._summary is None:
+            rows = {}
+            for name in self.names:
+                rows[name] = summary_statistics(self.performance(name), self.periods_per_year)
+                rows[name]["orders"] = len(self._lazy_frames(name)["orders"]) if is_artifact(self.runs[name]) else np.nan
+
+            self._summary = pd.DataFrame.from_dict(rows, orient='index', columns=SUMMARY_COLUMNS)
+            self._summary.index.name = "backtest"
+
+        return self._summary
+
+    def backtest(self, name: str) -> Backtest:
+        # the frames are read once they get touched, repeated drill downs are served from the cache
+        path = self.runs[name]
+        if not is_artifact(path):
+            return Backtest(*[self.frame(name, f) for f in FRAMES])
+
+        frames = self._lazy_frames(name)
+        return Backtest(*[frames[f] for f in FRAMES])
@@ -0,0 +1,4 @@
+# defaults shared by the dashboards and the cli, the layouts import dash only once they are used
+
+# about one bucket per horizontal pixel of the timeseries figure
+MAX_POINTS = 2000
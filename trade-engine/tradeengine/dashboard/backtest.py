@@ -1,11 +1,23 @@
+from typing import Any, Dict
+
 import dash_bootstrap_components as dbc
+import pandas as pd
 from dash import html, dcc
 from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
 from plotly.subplots import make_subplots
-from tradeengine.plot.plot_backtest import PlotBacktest
 
+from tradeengine.dashboard import MAX_POINTS
+from tradeengine.plot.cache import LRUCache
+from tradeengine.plot.plot_backtest import PlotBacktest, TimeRange
+
+FULL_RANGE = None
+FIGURE_CACHE_SIZE = 32
 
-def backtest_layout(app, plot_bt: PlotBacktest):
+
+def backtest_layout(app, plot_bt: PlotBacktest, max_points: int = MAX_POINTS, cache_size: int = FIGURE_CACHE_SIZE):
+    # serialized figures of already visited windows, panning back and forth does not re-plot them
+    timeseries_figures = LRUCache(cache_size)
     fig_positions = make_subplots(rows=2, cols=1, vertical_spacing=0.03)
 
     layout = html.Div(
@@ -16,12 +28,7 @@ def backtest_layout(app, plot_bt: PlotBacktest):
             dbc.Row(
                 [
                     dbc.Col(
-                        dcc.Graph(id='figure_timeseries', figure=
-                            plot_bt.plot_performance()\
-                                .update_layout(height=1000, barmode='relative', bargap=0, bargroupgap=0)\
-                                .update(layout_xaxis_rangeslider_visible=False)\
-                                .update_yaxes(fixedrange=True)
-                        ),
+                        dcc.Graph(id='figure_timeseries', figure=timeseries_figure(plot_bt, FULL_RANGE, max_points)),
                         width=9
                     ),
                     dbc.Col(
@@ -39,12 +46,72 @@ def backtest_layout(app, plot_bt: PlotBacktest):
         ],
     )
 
-    # Callback function to update figure2 on click
+    # Callback function to update figure2 on click, the pies of every clicked row are built once
     @app.callback(Output('figure_positions', 'figure'), Input('figure_timeseries', 'clickData'))
     def update_figure2(click_data):
         x_value = click_data['points'][0]['x'] if click_data is not None else None
-        return plot_bt.plot_positions(x_value)
+        return plot_bt.position_pies().figure(x_value)
+
+    # re-query the backtest for the visible window on zoom/pan, downsampled to `max_points` per trace
+    @app.callback(Output('figure_timeseries', 'figure'), Input('figure_timeseries', 'relayoutData'), prevent_initial_call=True)
+    def update_timeseries(relayout_data):
+        return zoomed_figure(timeseries_figures, plot_bt, relayout_data, max_points)
+
+    # only the visible page of the orders is sent to the browser
+    @app.callback(
+        Output('orders-table', 'data'), Output('orders-table', 'page_count'),
+        Input('orders-table', 'page_current'), Input('orders-table', 'page_size'),
+        Input('orders-table', 'sort_by'), Input('orders-table', 'filter_query'),
+        prevent_initial_call=True
+    )
+    def update_orders_table(page_current, page_size, sort_by, filter_query):
+        table = plot_bt.orders_table()
+        data, rows = table.query(page_current, page_size, sort_by, filter_query)
+        return data, table.page_count(rows, page_size)
 
     return layout
 
 
+def timeseries_figure(plot_bt: PlotBacktest, time_range: TimeRange | None = FULL_RANGE, max_points: int = MAX_POINTS):
+    fig = plot_bt.plot_performance(time_range=time_range, max_points=max_points)\
+        .update_layout(height=1000, barmode='relative', bargap=0, bargroupgap=0, uirevision='timeseries')\
+        .update(layout_xaxis_rangeslider_visible=False)\
+        .update_yaxes(fixedrange=True)
+
+    if time_range is not FULL_RANGE:
+        fig.update_xaxes(range=list(time_range))
+
+    return fig
+
+
+def zoomed_figure(figures: LRUCache, plot_bt: PlotBacktest, relayout_data: Dict[str, Any] | None, max_points: int = MAX_POINTS, key: Any = ()):
+    # the (cached) serialized timeseries figure of the window visible after a relayout event, `key` tells apart the
+    # figures of several backtests sharing a cache
+    time_range = visible_range(relayout_data)
+    if time_range is ...:
+        raise PreventUpdate
+
+    return figures.get_or_compute((key, time_range), lambda: timeseries_figure(plot_bt, time_range, max_points).to_dict())
+
+
+def visible_range(relayout_data: Dict[str, Any] | None) -> TimeRange | None:
+    """
+    Extracts the visible x range of a relayout event of the (shared x axes) timeseries figure. Returns `FULL_RANGE`
+    if the axes got reset and `...` if the event did not touch the x axes at all (legend clicks, resizing).
+    """
+    if not relayout_data:
+        return ...
+
+    for key, value in relayout_data.items():
+        axis, _, attribute = key.partition('.')
+        if not axis.startswith('xaxis'):
+            continue
+
+        if attribute == 'autorange':
+            return FULL_RANGE
+        if attribute == 'range':
+            return pd.Timestamp(value[0]), pd.Timestamp(value[1])
+        if attribute == 'range[0]':
+            return pd.Timestamp(value), pd.Timestamp(relayout_data[f"{axis}.range[1]"])
+
+    return ...
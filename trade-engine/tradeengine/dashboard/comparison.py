@@ -0,0 +1,99 @@
+import dash.dash_table as ddt
+import dash_bootstrap_components as dbc
+import pandas as pd
+import plotly.graph_objects as go
+from dash import html, dcc
+from dash.dependencies import Input, Output, State, MATCH
+from dash.exceptions import PreventUpdate
+
+from tradeengine.comparison import BacktestComparison
+from tradeengine.dashboard.backtest import MAX_POINTS, FULL_RANGE, FIGURE_CACHE_SIZE, timeseries_figure, zoomed_figure
+from tradeengine.plot.cache import LRUCache
+from tradeengine.plot.colors import get_color_for
+from tradeengine.plot.downsample import lttb
+from tradeengine.plot.plot_backtest import PlotBacktest
+
+# number of drilled down runs of which we keep the plots (and hence their loaded frames) alive
+DRILL_DOWN_CACHE_SIZE = 4
+DRILL_DOWN_GRAPH = 'comparison-timeseries'
+
+
+def comparison_layout(app, comparison: BacktestComparison, max_points: int = MAX_POINTS, cache_size: int = DRILL_DOWN_CACHE_SIZE):
+    plots = LRUCache(cache_size)
+    timeseries_figures = LRUCache(FIGURE_CACHE_SIZE)
+    summary = summary_records(comparison.summary())
+
+    layout = html.Div(
+        [
+            dbc.Row(
+                dbc.Col(html.H2(f"Comparison of {len(comparison)} Backtests", className='text-center'), width="12")
+            ),
+            dbc.Row(
+                dbc.Col(dcc.Graph(id='figure_comparison', figure=comparison_figure(comparison, max_points)), width=12)
+            ),
+            dbc.Row(
+                dbc.Col(
+                    ddt.DataTable(
+                        id='comparison-summary',
+                        columns=[dict(name=str(c), id=str(c)) for c in summary[0].keys()] if len(summary) > 0 else [],
+                        data=summary,
+                        sort_action='native',
+                        row_selectable='single',
+                        page_size=50,
+                    ),
+                    width=12,
+                )
+            ),
+            dbc.Row(
+                dbc.Col(html.Div(id='comparison-drilldown'), width=12)
+            ),
+        ],
+    )
+
+    # only the selected run gets its heavy frames loaded
+    @app.callback(Output('comparison-drilldown', 'children'), Input('comparison-summary', 'derived_virtual_data'), Input('comparison-summary', 'derived_virtual_selected_rows'), prevent_initial_call=True)
+    def drill_down(rows, selected_rows):
+        if not rows or not selected_rows:
+            raise PreventUpdate
+
+        name = rows[selected_rows[0]]["backtest"]
+        plot_bt = plots.get_or_compute(name, lambda: PlotBacktest(comparison.backtest(name)))
+        return [
+            html.H3(name, className='text-center'),
+            dcc.Graph(id={'type': DRILL_DOWN_GRAPH, 'index': name}, figure=timeseries_figure(plot_bt, FULL_RANGE, max_points)),
+        ]
+
+    # like the backtest dashboard, a zoomed drill down re-queries the run for the visible window
+    @app.callback(
+        Output({'type': DRILL_DOWN_GRAPH, 'index': MATCH}, 'figure'),
+        Input({'type': DRILL_DOWN_GRAPH, 'index': MATCH}, 'relayoutData'),
+        State({'type': DRILL_DOWN_GRAPH, 'index': MATCH}, 'id'),
+        prevent_initial_call=True
+    )
+    def update_drill_down(relayout_data, graph_id):
+        name = graph_id['index']
+        plot_bt = plots.get_or_compute(name, lambda: PlotBacktest(comparison.backtest(name)))
+        return zoomed_figure(timeseries_figures, plot_bt, relayout_data, max_points, key=name)
+
+    return layout
+
+
+def comparison_figure(comparison: BacktestComparison, max_points: int = MAX_POINTS) -> go.Figure:
+    # one (downsampled) performance line per run
+    fig = go.Figure()
+    for name in comparison.names:
+        performance = lttb(comparison.performance(name)["performance"], max_points)
+        fig.add_trace(go.Scattergl(x=performance.index, y=performance, mode='lines', name=name, line=dict(color=get_color_for(name))))
+
+    return fig.update_layout(height=600, uirevision='comparison')
+
+
+def summary_records(summary: pd.DataFrame):
+    summary = summary.reset_index()
+    for c in summary.columns:
+        if pd.api.types.is_float_dtype(summary[c]):
+            summary[c] = summary[c].round(4)
+        elif summary[c].dtype == object or pd.api.types.is_datetime64_any_dtype(summary[c]):
+            summary[c] = summary[c].astype(str)
+
+    return summary.to_dict('records')
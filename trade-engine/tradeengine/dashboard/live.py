@@ -0,0 +1,152 @@
+import threading
+from bisect import bisect_right
+from typing import List
+
+import dash_bootstrap_components as dbc
+import numpy as np
+import pandas as pd
+from dash import html, dcc, no_update
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from plotly.subplots import make_subplots
+import plotly.graph_objects as go
+
+from tradeengine.messages.feed import PortfolioFeedReader
+from tradeengine.plot.colors import get_color_for
+
+# the browser keeps a sliding window of this many points per trace
+LIVE_MAX_POINTS = 10_000
+INTERVAL_MS = 1000
+PERFORMANCE_COLUMNS = ["value", "performance"]
+
+
+class LivePortfolio(object):
+    """
+    Folds the position values of a portfolio feed into rows of position values (columns by asset, forward filled)
+    plus the portfolio `value` and `performance` (relative to the first value). Rows are only ever appended, the
+    rows of the newest timestamp are held back until a later timestamp (or an empty poll) shows they are complete.
+    """
+
+    def __init__(self, reader: PortfolioFeedReader):
+        self.reader = reader
+        self.chunks: List[pd.DataFrame] = []
+        self.offsets: List[int] = []
+        self.rows = 0
+        self.assets: List[str] = []
+        self.pending = None
+        self.last: pd.Series | None = None
+        self.initial_value: float | None = None
+        self.lock = threading.Lock()
+
+    def update(self) -> int:
+        # returns the number of appended rows
+        with self.lock:
+            new = self.reader.poll()
+            if len(new) <= 0:
+                complete, self.pending = self.pending, None
+            else:
+                new = new if self.pending is None else pd.concat([self.pending, new], ignore_index=True)
+                newest = new["time"].values == new["time"].values.max()
+                complete, self.pending = new[~newest], new[newest]
+
+            if complete is None or len(complete) <= 0:
+                return 0
+
+            return self._append(complete)
+
+    def _append(self, records: pd.DataFrame) -> int:
+        values = records.pivot_table(index="time", columns="asset", values="value", aggfunc="last")
+        self.assets += [a for a in values.columns if a not in self.assets]
+        values = values.reindex(columns=self.assets)
+
+        # carry the last known position values into the new rows
+        if self.last is not None:
+            values.iloc[0] = values.iloc[0].fillna(self.last.reindex(self.assets))
+
+        values = values.ffill()
+        self.last = values.iloc[-1]
+
+        value = values.fillna(0).sum(axis=1)
+        if self.initial_value is None:
+            self.initial_value = value.iloc[0] if value.iloc[0] != 0 else 1.0
+
+        values["value"] = value
+        values["performance"] = value / self.initial_value
+
+        self.chunks.append(values)
+        self.offsets.append(self.rows)
+        self.rows += len(values)
+        return len(values)
+
+    def window(self, start: int, stop: int | None = None) -> pd.DataFrame:
+        # the rows [start, stop), the columns are the assets (in order of appearance), value and performance
+        with self.lock:
+            stop = self.rows if stop is None else min(stop, self.rows)
+            first = max(bisect_right(self.offsets, start) - 1, 0)
+            last = bisect_right(self.offsets, stop - 1)
+            if start >= stop:
+                return pd.DataFrame({})
+
+            rows = pd.concat(self.chunks[first:last])
+            rows = rows.iloc[start - self.offsets[first]:stop - self.offsets[first]]
+            return rows[self.assets_of(rows) + PERFORMANCE_COLUMNS]
+
+    @staticmethod
+    def assets_of(rows: pd.DataFrame) -> List[str]:
+        return [c for c in rows.columns if c not in PERFORMANCE_COLUMNS]
+
+
+def live_layout(app, live: LivePortfolio, max_points: int = LIVE_MAX_POINTS, interval_ms: int = INTERVAL_MS):
+    layout = html.Div(
+        [
+            dbc.Row(
+                dbc.Col(html.H2("Live Portfolio", className='text-center'), width="12")
+            ),
+            dbc.Row(
+                dbc.Col(dcc.Graph(id='figure_live', figure=live_figure(pd.DataFrame({}))), width=12)
+            ),
+            dcc.Interval(id='live-interval', interval=interval_ms),
+            dcc.Store(id='live-cursor', data=dict(rows=0, assets=[])),
+        ],
+    )
+
+    # every client only gets the rows after its cursor, appended to its traces. The figure is only re-rendered
+    # once a new asset (trace) shows up
+    @app.callback(
+        Output('figure_live', 'extendData'), Output('figure_live', 'figure'), Output('live-cursor', 'data'),
+        Input('live-interval', 'n_intervals'), State('live-cursor', 'data'),
+    )
+    def update_live(n_intervals, cursor):
+        live.update()
+        cursor = cursor or dict(rows=0, assets=[])
+        rows = live.window(cursor["rows"])
+        if len(rows) <= 0:
+            raise PreventUpdate
+
+        end = cursor["rows"] + len(rows)
+        assets = LivePortfolio.assets_of(rows)
+        if assets != cursor["assets"]:
+            return no_update, live_figure(live.window(max(end - max_points, 0), end)), dict(rows=end, assets=assets)
+
+        return extend_data(rows, max_points), no_update, dict(rows=end, assets=assets)
+
+    return layout
+
+
+def live_figure(rows: pd.DataFrame) -> go.Figure:
+    # trace 0 is the performance, followed by one position value trace per asset
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.03, row_heights=[0.6, 0.4], subplot_titles=("Performance", "Position Values"))
+    if len(rows) > 0:
+        fig.add_trace(go.Scattergl(x=rows.index, y=rows["performance"], mode='lines', name="Portfolio", line=dict(color=get_color_for("Portfolio"))), row=1, col=1)
+        for asset in LivePortfolio.assets_of(rows):
+            fig.add_trace(go.Scattergl(x=rows.index, y=rows[asset], mode='lines', name=asset, line=dict(color=get_color_for(asset))), row=2, col=1)
+
+    return fig.update_layout(height=800, uirevision='live')
+
+
+def extend_data(rows: pd.DataFrame, max_points: int = LIVE_MAX_POINTS):
+    # the (x, y) updates of the performance and all asset traces in the format of `dcc.Graph.extendData`
+    x = rows.index.values.astype('datetime64[ms]').astype(str).tolist()
+    columns = ["performance"] + LivePortfolio.assets_of(rows)
+    y = [np.where(np.isnan(v), None, v).tolist() for v in (rows[c].values.astype(float) for c in columns)]
+    return dict(x=[x] * len(columns), y=y), list(range(len(columns))), max_points
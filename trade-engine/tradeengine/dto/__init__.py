@@ -1,3 +1,3 @@
 from .position import Position, PositionValue
 from .order import OrderTypes, Order, QuantityOrder, CloseOrder, PercentOrder, TargetQuantityOrder, TargetWeightOrder, ExpectedExecutionPrice
-from .asset import Asset
+from .asset import Asset, AssetRegistry, ASSETS
@@ -1,7 +1,9 @@
 import hashlib
+import threading
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Dict, Iterable, List
 
+import numpy as np
 from dataclasses_json import dataclass_json
 
 
@@ -10,6 +12,10 @@ from dataclasses_json import dataclass_json
 class Asset:
     symbol: Any
 
+    def __post_init__(self):
+        # the md5 hash is stable across processes but expensive, assets are hashed on every dict lookup
+        object.__setattr__(self, "_hash", int(hashlib.md5(str(self.symbol).encode("utf-8")).hexdigest(), 16))
+
     def __lt__(self, other):
         return self.symbol < other.symbol
 
@@ -17,8 +23,57 @@ class Asset:
         return f"{self.symbol}"
 
     def __hash__(self):
-        return int(hashlib.md5(str(self.symbol).encode("utf-8")).hexdigest(), 16)
+        return self._hash
+
+
+class AssetRegistry(object):
+    """
+    Interns assets to dense integer ids (in order of registration) such that hot paths and binary encodings can use
+    plain integers instead of hashing asset objects. `ASSETS` is the registry shared by all actors of a process.
+    """
+
+    def __init__(self, assets: Iterable[Asset] = ()):
+        self.assets: List[Asset] = []
+        self.ids: Dict[Asset, int] = {}
+        self.lock = threading.Lock()
+        self._lookup = np.empty(0, dtype=object)
+
+        for asset in assets:
+            self.id_of(asset)
+
+    def id_of(self, asset: Asset) -> int:
+        asset_id = self.ids.get(asset)
+        if asset_id is None:
+            # actors register new assets concurrently
+            with self.lock:
+                asset_id = self.ids.get(asset)
+                if asset_id is None:
+                    self.assets.append(asset)
+                    asset_id = self.ids[asset] = len(self.assets) - 1
+
+        return asset_id
+
+    def ids_of(self, assets: Iterable[Asset]) -> np.ndarray:
+        return np.array([self.id_of(a) for a in assets], dtype=np.uint32)
+
+    def asset(self, asset_id: int) -> Asset:
+        return self.assets[asset_id]
+
+    def lookup(self, asset_ids: np.ndarray) -> np.ndarray:
+        # vectorized id -> asset, returns an object array
+        if len(self._lookup) != len(self.assets):
+            self._lookup = np.empty(len(self.assets), dtype=object)
+            self._lookup[:] = self.assets
+
+        return self._lookup[asset_ids]
+
+    def __len__(self):
+        return len(self.assets)
+
+    def __contains__(self, asset: Asset):
+        return asset in self.ids
 
 
 # SOME CONSTANTS
 CASH = Asset("$$$")
+ASSETS = AssetRegistry([CASH])
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
+NONE_TIME = np.iinfo(np.int64).min     # None, same as NaT
+MAX_TIME = np.iinfo(np.int64).max      # datetime.max and everything beyond the ns range (year 2262)
+MAX_TIME_US = MAX_TIME // 1000
+
+
+def to_ns(dt: datetime | None) -> int:
+    if dt is None: return NONE_TIME
+    assert dt.tzinfo is None, "only naive timestamps are supported"
+    us = (dt - EPOCH) // ONE_US
+    return MAX_TIME if us >= MAX_TIME_US else us * 1000
+
+
+def from_ns(ns: int) -> datetime | None:
+    if ns == NONE_TIME: return None
+    if ns == MAX_TIME: return datetime.max
+    return EPOCH + ns // 1000 * ONE_US
@@ -1,3 +1,530 @@
+from __future__ import annotations
 
-# Needs to be implemented
-raise NotImplemented
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Literal, Tuple
+
+import click
+import numpy as np
+import pykka
+from pykka import ActorDeadError
+
+from tradeengine.actors.instrumentation import LatencyHistogram, backend_timer
+from tradeengine.actors.sql import SQLOrderbookActor
+from tradeengine.dto import Asset, QuantityOrder
+from tradeengine.messages.messages import NewBidAskMarketData, NewMarketDataMessage, NewOrdersMessage
+from tradeengine.runtime import SyncRuntime, runtime_of
+
+LOG = logging.getLogger(__name__)
+
+Overflow = Literal['block', 'drop_oldest']
+INBOX_SIZE = 256
+ASK_TIMEOUT = 60
+STAGES = ('feed', 'portfolio', 'orderbook', 'tick_to_trade')
+
+
+@dataclass(frozen=True)
+class LatencySLA:
+    """
+    A latency budget of a stage: at least the `quantile` of all messages have to be processed within `budget_us`.
+    An optional `queue_wait_us` budgets the time the same quantile of messages may wait in the inbox of the stage.
+    """
+    budget_us: float
+    quantile: float = 0.99
+    queue_wait_us: float | None = None
+
+    def is_met(self, violations: int, count: int) -> bool:
+        return violations <= (1 - self.quantile) * count
+
+
+DEFAULT_SLAS = {
+    # the feed stage measures the time a put is blocked by a full inbox
+    'feed': LatencySLA(1_000),
+    'portfolio': LatencySLA(2_000, queue_wait_us=25_000),
+    'orderbook': LatencySLA(10_000),
+    'tick_to_trade': LatencySLA(50_000),
+}
+
+
+class StageMetrics(object):
+    """
+    The processing latency and the queue wait time (time spent in the inbox) of every message of one stage of the
+    live runtime, plus the number of messages exceeding the latency budget of the stage.
+    """
+
+    def __init__(self, name: str, sla: LatencySLA | None = None):
+        self.name = name
+        self.sla = sla
+        self.latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.violations = 0
+        self.queue_wait_violations = 0
+        self.errors = 0
+
+    def record(self, latency_ns: int, queue_wait_ns: int | None = None):
+        self.latency.record(latency_ns)
+        if self.sla is not None and latency_ns > self.sla.budget_us * 1e3:
+            self.violations += 1
+        if queue_wait_ns is not None:
+            self.queue_wait.record(queue_wait_ns)
+            if self.sla is not None and self.sla.queue_wait_us is not None and queue_wait_ns > self.sla.queue_wait_us * 1e3:
+                self.queue_wait_violations += 1
+
+    def sla_met(self) -> bool | None:
+        if self.sla is None:
+            return None
+
+        return self.sla.is_met(self.violations, self.latency.count) \
+            and self.sla.is_met(self.queue_wait_violations, self.queue_wait.count)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(
+            latency=self.latency.to_dict(),
+            queue_wait=self.queue_wait.to_dict() if self.queue_wait.count > 0 else None,
+            errors=self.errors,
+            sla=None if self.sla is None else dict(
+                budget_us=self.sla.budget_us,
+                quantile=self.sla.quantile,
+                violations=self.violations,
+                queue_wait_us=self.sla.queue_wait_us,
+                queue_wait_violations=self.queue_wait_violations,
+                met=self.sla_met(),
+            ),
+        )
+
+
+def coalesce_key(message: Any) -> Hashable:
+    # only the latest quote of an asset matters, bars carry the high and low of their period and are never coalesced
+    if isinstance(message, NewBidAskMarketData):
+        return message.asset
+    if isinstance(message, NewMarketDataMessage):
+        return message.asset, message.as_of
+
+    return id(message)
+
+
+class CoalescingQueue(object):
+    """
+    A bounded FIFO queue between two stages which keeps at most one pending quote per asset: a newer quote of an
+    asset replaces the pending (stale) one and moves to the end of the queue, an older one is discarded. Both count as
+    coalesced. The queue stays ordered by `as_of` as long as the source is.
+
+    `maxsize` bounds the number of pending messages. If the queue is full a `put` either blocks until the consumer
+    caught up (backpressure to the producer) or drops the oldest pending message (`overflow='drop_oldest'`).
+    """
+
+    def __init__(self, maxsize: int = INBOX_SIZE, overflow: Overflow = 'block', key: Callable[[Any], Hashable] = coalesce_key):
+        assert maxsize > 0, "the queue needs to be bounded"
+        assert overflow in ('block', 'drop_oldest'), f"unknown overflow policy {overflow}"
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.key = key
+        self.pending: OrderedDict[Hashable, Tuple[int, int, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+        self.coalesced = 0
+        self.dropped = 0
+        self.blocked_ns = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def put(self, message: Any, tick_ns: int | None = None) -> bool:
+        """
+        Enqueues a message, `tick_ns` is the time the message entered the runtime (default now). Returns False if
+        the queue got closed.
+        """
+        put_ns = time.perf_counter_ns()
+        tick_ns = put_ns if tick_ns is None else tick_ns
+        key = self.key(message)
+
+        with self.lock:
+            if self.closed:
+                return False
+
+            pending = self.pending.get(key)
+            if pending is not None:
+                # the newer quote is queued behind all quotes which arrived before it
+                if message.as_of >= pending[2].as_of:
+                    self.pending[key] = (put_ns, tick_ns, message)
+                    self.pending.move_to_end(key)
+                self.coalesced += 1
+                return True
+
+            if len(self.pending) >= self.maxsize:
+                if self.overflow == 'drop_oldest':
+                    self.pending.popitem(last=False)
+                    self.dropped += 1
+                else:
+                    while len(self.pending) >= self.maxsize and not self.closed:
+                        self.not_full.wait()
+
+                    self.blocked_ns += time.perf_counter_ns() - put_ns
+                    if self.closed:
+                        return False
+
+            self.pending[key] = (put_ns, tick_ns, message)
+            self.not_empty.notify()
+            return True
+
+    def get(self) -> Tuple[int, int, Any] | None:
+        """
+        Returns the oldest pending (put_ns, tick_ns, message) and blocks while the queue is empty. Returns None once
+        the queue is closed and drained.
+        """
+        with self.lock:
+            while len(self.pending) <= 0 and not self.closed:
+                self.not_empty.wait()
+
+            if len(self.pending) <= 0:
+                return None
+
+            _, item = self.pending.popitem(last=False)
+            self.not_full.notify()
+            return item
+
+    def close(self):
+        # pending messages are still delivered, blocked producers return
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+
+class SimulatedFeed(object):
+    """
+    A local stand-in of a streaming quote source: a random walk of bid/ask quotes of `nr_of_assets` assets (picked at
+    random per tick) paced at `ticks_per_second` wall clock rate for `duration` seconds. If the consumer blocks the
+    feed falls behind its schedule and catches up in a burst, like a socket buffer filling up.
+    """
+
+    def __init__(
+            self,
+            nr_of_assets: int = 10,
+            ticks_per_second: float = 1000,
+            duration: float = 10,
+            volatility: float = 1e-4,
+            spread: float = 1e-4,
+            price: float = 100,
+            seed: int | None = None,
+            block_size: int = 1024,
+    ):
+        self.assets = [Asset(f"SIM{i}") for i in range(nr_of_assets)]
+        self.ticks_per_second = ticks_per_second
+        self.nr_of_ticks = int(duration * ticks_per_second)
+        self.volatility = volatility
+        self.spread = spread
+        self.price = price
+        self.seed = seed
+        self.block_size = block_size
+        self.lag_s = 0.0
+
+    def __len__(self):
+        return self.nr_of_ticks
+
+    def __iter__(self) -> Iterator[NewBidAskMarketData]:
+        rng = np.random.default_rng(self.seed)
+        mids = [self.price] * len(self.assets)
+        half_spread = self.spread / 2
+        started = time.perf_counter()
+
+        for offset in range(0, self.nr_of_ticks, self.block_size):
+            size = min(self.block_size, self.nr_of_ticks - offset)
+            assets = rng.integers(0, len(self.assets), size).tolist()
+            returns = np.exp(rng.normal(0, self.volatility, size)).tolist()
+
+            for i, (a, r) in enumerate(zip(assets, returns)):
+                # sleep once we are more than a millisecond ahead of the schedule
+                ahead = (offset + i) / self.ticks_per_second - (time.perf_counter() - started)
+                if ahead > 1e-3:
+                    time.sleep(ahead)
+                else:
+                    self.lag_s = max(self.lag_s, -ahead)
+
+                mid = mids[a] = mids[a] * r
+                yield NewBidAskMarketData(self.assets[a], datetime.now(), mid * (1 - half_spread), mid * (1 + half_spread))
+
+
+class SimulatedExchangeActor(SQLOrderbookActor):
+    """
+    A local stand-in of a broker: an in memory sqlite orderbook which fills orders at the quote (plus slippage)
+    after a simulated round trip of `fill_latency` seconds. Live deployments replace it by an orderbook actor
+    talking to the broker's API.
+    """
+
+    def __init__(
+            self,
+            portfolio_actor: pykka.ActorRef,
+            alchemy_engine=None,
+            fill_latency: float = 0,
+            **kwargs
+    ):
+        if alchemy_engine is None:
+            from sqlalchemy import create_engine, StaticPool
+            alchemy_engine = create_engine('sqlite://', echo=False, connect_args={'check_same_thread': False}, poolclass=StaticPool)
+
+        super().__init__(portfolio_actor, alchemy_engine, **kwargs)
+        self.fill_latency = fill_latency
+
+    def _execute_order(self, order, expected_execution_time, expected_price, pv):
+        if self.fill_latency > 0:
+            with backend_timer(self.metrics, "exchange.fill"):
+                time.sleep(self.fill_latency)
+
+        return super()._execute_order(order, expected_execution_time, expected_price, pv)
+
+
+class LiveRuntime(object):
+    """
+    Drives the portfolio and orderbook actors from a streaming quote source. Two threads are connected by a bounded
+    coalescing inbox (see `CoalescingQueue`):
+
+     * feed: reads the source and enqueues the quotes, a full inbox blocks the source (backpressure)
+     * dispatcher: like in a backtest it asks the portfolio actor to value its positions at a quote first and then
+       asks the orderbook actor to execute the orders matching the quote
+
+    The source is never slowed down by the actors as long as the inbox has room. If the actors fall behind, the stale
+    quotes of an asset waiting in the inbox are coalesced into the latest one instead of queueing up. Every stage
+    records its latency against an optional `LatencySLA` (the portfolio stage also the time a quote waited in the
+    inbox), the latency of the feed is the time a put was blocked by a full inbox and `tick_to_trade` measures the time
+    from reading a quote until the orderbook processed it.
+    """
+
+    def __init__(
+            self,
+            portfolio_actor: pykka.ActorRef,
+            orderbook_actor: pykka.ActorRef,
+            source: Iterable[NewMarketDataMessage],
+            inbox_size: int = INBOX_SIZE,
+            overflow: Overflow = 'block',
+            slas: Dict[str, LatencySLA] | None = None,
+            ask_timeout: float = ASK_TIMEOUT,
+    ):
+        for actor_ref in (portfolio_actor, orderbook_actor):
+            assert not isinstance(runtime_of(actor_ref), SyncRuntime), "the live runtime needs thread safe actors"
+
+        slas = DEFAULT_SLAS if slas is None else slas
+        self.portfolio_actor = portfolio_actor
+        self.orderbook_actor = orderbook_actor
+        self.source = source
+        self.ask_timeout = ask_timeout
+        self.metrics = {name: StageMetrics(name, slas.get(name)) for name in STAGES}
+        self.inbox = CoalescingQueue(inbox_size, overflow)
+        self.stopped = threading.Event()
+        self.ticks = 0
+        self.restamped = 0
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.threads: List[threading.Thread] = [
+            threading.Thread(target=self._feed, name="live-feed", daemon=True),
+            threading.Thread(target=self._dispatch, name="live-dispatcher", daemon=True),
+        ]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self) -> 'LiveRuntime':
+        self.started = time.perf_counter()
+        for thread in self.threads:
+            thread.start()
+
+        return self
+
+    def stop(self, timeout: float | None = None):
+        # stops reading the source, the quotes already read are still processed
+        self.stopped.set()
+        self.inbox.close()
+        self.join(timeout)
+
+    def join(self, timeout: float | None = None) -> bool:
+        # waits until the source is exhausted and all stages are drained, returns False on timeout
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(deadline - time.perf_counter(), 0))
+
+        return not self.is_alive()
+
+    def is_alive(self) -> bool:
+        return any(thread.is_alive() for thread in self.threads)
+
+    def run(self) -> Dict[str, Any]:
+        # processes the whole source and returns the metrics
+        self.start().join()
+        return self.snapshot()
+
+    def place_orders(self, orders: List[QuantityOrder]) -> List[QuantityOrder]:
+        # can be called from any thread while the runtime is running
+        return self.orderbook_actor.ask(NewOrdersMessage(orders), timeout=self.ask_timeout)
+
+    def _feed(self):
+        metrics = self.metrics['feed']
+        try:
+            for message in self.source:
+                start = time.perf_counter_ns()
+                if self.stopped.is_set() or not self.inbox.put(message, start):
+                    break
+
+                # the time a quote waits for space in the inbox
+                metrics.record(time.perf_counter_ns() - start)
+                self.ticks += 1
+        except Exception as e:
+            metrics.errors += 1
+            LOG.error(f"quote source failed: {e}")
+        finally:
+            self.inbox.close()
+
+    def _dispatch(self):
+        portfolio, orderbook, tick_to_trade = self.metrics['portfolio'], self.metrics['orderbook'], self.metrics['tick_to_trade']
+        latest = None
+        try:
+            while (item := self.inbox.get()) is not None:
+                put_ns, tick_ns, message = item
+
+                # the actors need a monotonic clock but the quotes of a venue can be out of order, a quote is never
+                # dated before a quote which was already dispatched
+                if latest is not None and message.as_of < latest:
+                    message = replace(message, as_of=latest, as_of_ns=None)
+                    self.restamped += 1
+                latest = message.as_of
+
+                start = time.perf_counter_ns()
+                if not self._ask(portfolio, self.portfolio_actor, message):
+                    continue
+
+                valued = time.perf_counter_ns()
+                portfolio.record(valued - start, start - put_ns)
+                if not self._ask(orderbook, self.orderbook_actor, message):
+                    continue
+
+                end = time.perf_counter_ns()
+                orderbook.record(end - valued)
+                tick_to_trade.record(end - tick_ns)
+        except ActorDeadError as e:
+            LOG.error(f"stopping the live runtime: {e}")
+            self.stopped.set()
+            self.inbox.close()
+        finally:
+            self.finished = time.perf_counter()
+
+    def _ask(self, metrics: StageMetrics, actor_ref: pykka.ActorRef, message: Any) -> bool:
+        try:
+            actor_ref.ask(message, timeout=self.ask_timeout)
+            return True
+        except ActorDeadError:
+            raise
+        except Exception as e:
+            metrics.errors += 1
+            LOG.error(f"{metrics.name} failed to process {message}: {e}")
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started is not None else 0
+        stages = {name: m.snapshot() for name, m in self.metrics.items()}
+        stages['feed'].update(pending=len(self.inbox), coalesced=self.inbox.coalesced, dropped=self.inbox.dropped, blocked_ms=self.inbox.blocked_ns / 1e6)
+
+        return dict(
+            elapsed_s=elapsed,
+            ticks=self.ticks,
+            restamped=self.restamped,
+            ticks_per_sec=self.ticks / elapsed if elapsed > 0 else None,
+            quotes_traded=self.metrics['tick_to_trade'].latency.count,
+            slas_met=all(s['sla']['met'] for s in stages.values() if s['sla'] is not None),
+            stages=stages,
+        )
+
+    def dump(self, file_name: str = "LiveRuntime.json") -> Dict[str, Any]:
+        snapshot = self.snapshot()
+        lines = [f"live runtime: {snapshot['ticks']} ticks in {snapshot['elapsed_s']:.2f}s, {snapshot['quotes_traded']} traded"]
+        for name, stage in snapshot['stages'].items():
+            h, sla = stage['latency'], stage['sla']
+            line = f"  {name}: count={h['count']} mean={h['mean_us'] or 0:.1f}us p99={h['p99_us']:.1f}us max={h['max_us']:.1f}us"
+            if 'coalesced' in stage: line += f" coalesced={stage['coalesced']} dropped={stage['dropped']} blocked={stage['blocked_ms']:.1f}ms"
+            if stage['queue_wait'] is not None: line += f" queue_wait_p99={stage['queue_wait']['p99_us']:.1f}us"
+            if sla is not None: line += f" sla({sla['budget_us']:.0f}us)={'met' if sla['met'] else 'VIOLATED'}"
+            lines.append(line)
+
+        LOG.info("\n".join(lines))
+
+        directory = os.environ.get("TRADEENGINE_METRICS_DIR")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, file_name), 'w') as f:
+                json.dump(snapshot, f, indent=1)
+
+        return snapshot
+
+
+def simulated_runtime(
+        nr_of_assets: int = 10,
+        ticks_per_second: float = 1000,
+        duration: float = 10,
+        funding: float = 1_000_000,
+        fill_latency: float = 0,
+        seed: int | None = None,
+        **kwargs
+) -> LiveRuntime:
+    """
+    Wires a (not yet started) live runtime with a memory portfolio, a simulated exchange and a simulated feed, all
+    local such that the runtime can be load tested without a network. The remaining kwargs go to the `LiveRuntime`.
+    """
+    from tradeengine.actors.memory import MemPortfolioActor
+
+    feed = SimulatedFeed(nr_of_assets, ticks_per_second, duration, seed=seed)
+    portfolio_actor = MemPortfolioActor.start(funding=funding, funding_date=datetime.now())
+    orderbook_actor = SimulatedExchangeActor.start(portfolio_actor, fill_latency=fill_latency)
+    return LiveRuntime(portfolio_actor, orderbook_actor, feed, **kwargs)
+
+
+def load_test(runtime: LiveRuntime, orders_per_second: float = 0, seed: int | None = None) -> Dict[str, Any]:
+    """
+    Runs a live runtime of a `SimulatedFeed` to completion while placing random quantity orders at the given rate
+    (like a strategy thread would) and returns the metrics.
+    """
+    rng = np.random.default_rng(seed)
+    assets = runtime.source.assets
+    interval = 1 / orders_per_second if orders_per_second > 0 else math.inf
+
+    runtime.start()
+    while not runtime.join(min(interval, 1.0)):
+        if interval < math.inf:
+            asset = assets[int(rng.integers(len(assets)))]
+            runtime.place_orders([QuantityOrder(asset, float(rng.choice([-1, 1])), datetime.now())])
+
+    return runtime.dump()
+
+
+@click.command()
+@click.option('-a', '--assets', type=int, default=10, help="number of simulated assets")
+@click.option('-r', '--rate', type=float, default=1000, help="ticks per second of the simulated feed")
+@click.option('-d', '--duration', type=float, default=10, help="seconds to run")
+@click.option('-o', '--orders', type=float, default=10, help="orders per second placed at random assets")
+@click.option('-i', '--inbox', type=int, default=INBOX_SIZE, help=f"max pending quotes (default {INBOX_SIZE})")
+@click.option('--overflow', type=click.Choice(['block', 'drop_oldest']), default='block', help="what to do if an inbox is full")
+@click.option('--fill-latency', type=float, default=0, help="ms the simulated exchange takes to fill an order")
+@click.option('--seed', type=int, default=None)
+def cli(assets: int, rate: float, duration: float, orders: float, inbox: int, overflow: Overflow, fill_latency: float, seed: int | None):
+    logging.basicConfig(level=logging.WARNING)
+    runtime = simulated_runtime(assets, rate, duration, fill_latency=fill_latency / 1e3, seed=seed, inbox_size=inbox, overflow=overflow)
+    try:
+        snapshot = load_test(runtime, orders, seed)
+        snapshot['feed_lag_s'] = runtime.source.lag_s
+        print(json.dumps(snapshot, indent=1))
+    finally:
+        pykka.ActorRegistry.stop_all()
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Type
+
+import numpy as np
+
+from tradeengine.dto import AssetRegistry, Order, OrderTypes, QuantityOrder, CloseOrder, PercentOrder, \
+    TargetQuantityOrder, TargetWeightOrder
+from tradeengine.messages.messages import Message, NewBarMarketData, NewBidAskMarketData, NewOrderMessage, \
+    NewPositionMessage
+from tradeengine.dto.timestamps import EPOCH, ONE_US, NONE_TIME, MAX_TIME, MAX_TIME_US, to_ns, from_ns
+
+ORDER_CLASSES: Dict[OrderTypes, Type[Order]] = {
+    c.type: c for c in [CloseOrder, QuantityOrder, TargetQuantityOrder, PercentOrder, TargetWeightOrder]
+}
+
+
+class FieldKind(IntEnum):
+    ASSET = 0       # interned asset id, uint32
+    TIME = 1        # ns since epoch, int64
+    FLOAT = 2       # float64, None as NaN
+    ORDER_TYPE = 3  # OrderTypes value, uint8
+    ID = 4          # int64, None as -1
+
+
+FIELD_DTYPES = {FieldKind.ASSET: '<u4', FieldKind.TIME: '<i8', FieldKind.FLOAT: '<f8', FieldKind.ORDER_TYPE: 'u1', FieldKind.ID: '<i8'}
+FIELD_FORMATS = {FieldKind.ASSET: 'I', FieldKind.TIME: 'q', FieldKind.FLOAT: 'd', FieldKind.ORDER_TYPE: 'B', FieldKind.ID: 'q'}
+
+
+@dataclass(frozen=True)
+class MessageSchema:
+    """
+    The fixed binary layout of one message type. The same layout is used for single messages (struct) and batches
+    (numpy structured arrays), `values` extracts the field values of a message and `build` creates the message.
+    """
+    tag: int
+    message_type: Type[Message]
+    fields: Tuple[Tuple[str, FieldKind], ...]
+    values: Callable[[Message], Sequence[Any]]
+    build: Callable[..., Message]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([(name, FIELD_DTYPES[kind]) for name, kind in self.fields])
+
+    @property
+    def struct(self) -> struct.Struct:
+        return struct.Struct("<" + "".join(FIELD_FORMATS[kind] for _, kind in self.fields))
+
+
+def _order_values(message: NewOrderMessage):
+    o = message.order
+    return o.type, o.asset, o.size, o.valid_from, o.limit, o.stop_limit, o.valid_until, o.id
+
+
+def _order_message(order_type, asset, size, valid_from, limit, stop_limit, valid_until, id):
+    return NewOrderMessage(ORDER_CLASSES[OrderTypes(order_type)](asset, size, valid_from, limit, stop_limit, valid_until, id))
+
+
+SCHEMAS: List[MessageSchema] = [
+    MessageSchema(
+        1, NewBarMarketData,
+        (("asset", FieldKind.ASSET), ("as_of", FieldKind.TIME), ("open", FieldKind.FLOAT), ("high", FieldKind.FLOAT), ("low", FieldKind.FLOAT), ("close", FieldKind.FLOAT)),
+        lambda m: (m.asset, m.as_of, m.open, m.high, m.low, m.close),
+        NewBarMarketData,
+    ),
+    MessageSchema(
+        2, NewBidAskMarketData,
+        (("asset", FieldKind.ASSET), ("as_of", FieldKind.TIME), ("bid", FieldKind.FLOAT), ("ask", FieldKind.FLOAT)),
+        lambda m: (m.asset, m.as_of, m.bid, m.ask),
+        NewBidAskMarketData,
+    ),
+    MessageSchema(
+        3, NewPositionMessage,
+        (("asset", FieldKind.ASSET), ("as_of", FieldKind.TIME), ("quantity", FieldKind.FLOAT), ("price", FieldKind.FLOAT), ("fee", FieldKind.FLOAT)),
+        lambda m: (m.asset, m.as_of, m.quantity, m.price, m.fee),
+        NewPositionMessage,
+    ),
+    MessageSchema(
+        4, NewOrderMessage,
+        (("type", FieldKind.ORDER_TYPE), ("asset", FieldKind.ASSET), ("size", FieldKind.FLOAT), ("valid_from", FieldKind.TIME),
+         ("limit", FieldKind.FLOAT), ("stop_limit", FieldKind.FLOAT), ("valid_until", FieldKind.TIME), ("id", FieldKind.ID)),
+        _order_values,
+        _order_message,
+    ),
+]
+
+SCHEMA_BY_TYPE: Dict[Type[Message], MessageSchema] = {s.message_type: s for s in SCHEMAS}
+SCHEMA_BY_TAG: Dict[int, MessageSchema] = {s.tag: s for s in SCHEMAS}
+BATCH_HEADER = struct.Struct("<BI")
+
+
+class MessageCodec(object):
+    """
+    A compact binary codec for the hot engine messages (market data, new orders and new positions). Assets are
+    interned to integer ids of the codec's `AssetRegistry` (which needs to be shared by the encoding and the decoding
+    side), timestamps are int64 ns since epoch (naive datetimes only). A single message is one tag byte followed by
+    its fixed layout, a batch of messages of the same type is encoded and decoded vectorized via numpy.
+    """
+
+    def __init__(self, assets: AssetRegistry | None = None):
+        self.assets = assets if assets is not None else AssetRegistry()
+        self._structs = {s.tag: s.struct for s in SCHEMAS}
+
+    def encode(self, message: Message) -> bytes:
+        schema = SCHEMA_BY_TYPE[type(message)]
+        values = [self._encode_value(kind, v) for (_, kind), v in zip(schema.fields, schema.values(message))]
+        return bytes((schema.tag,)) + self._structs[schema.tag].pack(*values)
+
+    def decode(self, data: bytes) -> Message:
+        schema = SCHEMA_BY_TAG[data[0]]
+        values = self._structs[schema.tag].unpack_from(data, 1)
+        return schema.build(*[self._decode_value(kind, v) for (_, kind), v in zip(schema.fields, values)])
+
+    def encode_batch(self, messages: List[Message]) -> bytes:
+        array = self.to_array(messages)
+        tag = SCHEMA_BY_TYPE[type(messages[0])].tag if len(messages) > 0 else 0
+        return BATCH_HEADER.pack(tag, len(array)) + array.tobytes()
+
+    def decode_batch(self, data: bytes) -> List[Message]:
+        tag, length = BATCH_HEADER.unpack_from(data)
+        if length <= 0: return []
+
+        schema = SCHEMA_BY_TAG[tag]
+        return self.from_array(np.frombuffer(data, dtype=schema.dtype, count=length, offset=BATCH_HEADER.size), schema)
+
+    def to_array(self, messages: List[Message]) -> np.ndarray:
+        """
+        Converts messages of the same type into a numpy structured array of their binary layout.
+        """
+        if len(messages) <= 0: return np.empty(0, dtype=SCHEMAS[0].dtype)
+
+        schema = SCHEMA_BY_TYPE[type(messages[0])]
+        assert all(type(m) is schema.message_type for m in messages), "a batch needs to hold messages of the same type"
+
+        columns = list(zip(*[schema.values(m) for m in messages]))
+        array = np.empty(len(messages), dtype=schema.dtype)
+        for (name, kind), column in zip(schema.fields, columns):
+            array[name] = self._encode_column(kind, column)
+
+        return array
+
+    def from_array(self, array: np.ndarray, schema: MessageSchema | Type[Message]) -> List[Message]:
+        if not isinstance(schema, MessageSchema): schema = SCHEMA_BY_TYPE[schema]
+        columns = [self._decode_column(kind, array[name]) for name, kind in schema.fields]
+        return list(map(schema.build, *columns))
+
+    def _encode_value(self, kind: FieldKind, value):
+        match kind:
+            case FieldKind.ASSET:
+                return self.assets.id_of(value)
+            case FieldKind.TIME:
+                return to_ns(value)
+            case FieldKind.FLOAT:
+                return np.nan if value is None else value
+            case FieldKind.ORDER_TYPE:
+                return value.value
+            case FieldKind.ID:
+                return -1 if value is None else value
+
+    def _decode_value(self, kind: FieldKind, value):
+        match kind:
+            case FieldKind.ASSET:
+                return self.assets.asset(value)
+            case FieldKind.TIME:
+                return from_ns(value)
+            case FieldKind.FLOAT:
+                return None if value != value else value
+            case FieldKind.ID:
+                return None if value < 0 else value
+            case _:
+                return value
+
+    def _encode_column(self, kind: FieldKind, column: Sequence[Any]) -> np.ndarray:
+        match kind:
+            case FieldKind.ASSET:
+                return self.assets.ids_of(column)
+            case FieldKind.TIME:
+                return datetimes_to_ns(column)
+            case FieldKind.FLOAT:
+                return np.array(column, dtype=float)  # None becomes NaN
+            case FieldKind.ORDER_TYPE:
+                return np.array([t.value for t in column], dtype=np.uint8)
+            case FieldKind.ID:
+                return np.array([-1 if i is None else i for i in column], dtype=np.int64)
+
+    def _decode_column(self, kind: FieldKind, column: np.ndarray) -> List[Any]:
+        match kind:
+            case FieldKind.ASSET:
+                return self.assets.lookup(column).tolist()
+            case FieldKind.TIME:
+                return ns_to_datetimes(column).tolist()
+            case FieldKind.FLOAT:
+                values = column.astype(object)
+                values[np.isnan(column)] = None
+                return values.tolist()
+            case FieldKind.ID:
+                values = column.astype(object)
+                values[column < 0] = None
+                return values.tolist()
+            case _:
+                return column.tolist()
+
+
+def datetimes_to_ns(values: Sequence[datetime | None]) -> np.ndarray:
+    us = np.array(values, dtype='datetime64[us]').view(np.int64)
+    beyond = us >= MAX_TIME_US
+    ns = np.where(beyond, 0, us) * 1000
+    ns[beyond] = MAX_TIME
+    ns[us == NONE_TIME] = NONE_TIME
+    return ns
+
+
+def ns_to_datetimes(ns: np.ndarray) -> np.ndarray:
+    is_none, is_max = ns == NONE_TIME, ns == MAX_TIME
+    values = np.where(is_none | is_max, 0, ns // 1000).astype('datetime64[us]').astype(object)
+    values[is_none] = None
+    values[is_max] = datetime.max
+    return values
+
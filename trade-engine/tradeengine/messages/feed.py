@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import BinaryIO, List
+
+import numpy as np
+import pandas as pd
+
+from tradeengine.dto import Asset, AssetRegistry
+from tradeengine.messages.codec import to_ns
+
+MAGIC = b"TEFEED1\n"
+ASSETS_SUFFIX = ".assets"
+FLUSH_INTERVAL = 0.5
+
+# every record is the new value of a position: asset id, as_of in ns since epoch, value
+FEED_RECORD = np.dtype([("asset", "<u4"), ("time", "<i8"), ("value", "<f8")])
+FEED_STRUCT = struct.Struct("<Iqd")
+
+
+class PortfolioFeedWriter(object):
+    """
+    An append-only feed of position value changes a running portfolio actor publishes for live dashboards (see
+    `AbstractPortfolioActor(feed=...)`). The records have a fixed size such that a reader tailing the file can take
+    every complete record as is. The asset names are written to a side file (`path` + `.assets`, one per line),
+    which is flushed before any record refers to the asset. Records are flushed at least every `flush_interval`
+    seconds.
+    """
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, buffer_size: int = 1 << 16):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.file: BinaryIO = open(path, 'wb', buffering=buffer_size)
+        self.file.write(MAGIC)
+        self.file.flush()
+        self.assets_file = open(path + ASSETS_SUFFIX, 'w', encoding="utf-8")
+        self.assets = AssetRegistry()
+        self.lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def publish(self, asset: Asset, as_of: datetime, value: float):
+        with self.lock:
+            if asset not in self.assets:
+                self.assets_file.write(f"{asset}\n")
+                self.assets_file.flush()
+
+            self.file.write(FEED_STRUCT.pack(self.assets.id_of(asset), to_ns(as_of), value))
+
+            now = time.monotonic()
+            if now - self._flushed >= self.flush_interval:
+                self.file.flush()
+                self._flushed = now
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+            self._flushed = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+            self.assets_file.close()
+
+
+class PortfolioFeedReader(object):
+    """
+    Tails a feed written by `PortfolioFeedWriter`. Every `poll` returns the records appended since the last poll
+    as a long frame of asset, time and value. A partially written record is left for the next poll.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = len(MAGIC)
+        self.assets: List[str] = []
+
+    def poll(self) -> pd.DataFrame:
+        if not os.path.exists(self.path):
+            return _empty_frame()
+
+        with open(self.path, 'rb') as f:
+            if self.offset == len(MAGIC):
+                magic = f.read(len(MAGIC))
+                if len(magic) < len(MAGIC): return _empty_frame()
+                assert magic == MAGIC, f"{self.path} is not a portfolio feed"
+
+            f.seek(self.offset)
+            data = f.read()
+
+        complete = len(data) - len(data) % FEED_RECORD.itemsize
+        if complete <= 0:
+            return _empty_frame()
+
+        records = np.frombuffer(data[:complete], dtype=FEED_RECORD)
+        self.offset += complete
+
+        if records["asset"].max() >= len(self.assets):
+            self._read_assets()
+
+        return pd.DataFrame({
+            "asset": np.array(self.assets, dtype=object)[records["asset"]],
+            "time": pd.to_datetime(records["time"]),
+            "value": records["value"],
+        })
+
+    def _read_assets(self):
+        with open(self.path + ASSETS_SUFFIX, encoding="utf-8") as f:
+            self.assets = f.read().splitlines()
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({"asset": pd.Series([], dtype=object), "time": pd.Series([], dtype='datetime64[ns]'), "value": pd.Series([], dtype=float)})
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import mmap
+import pickle
+import struct
+import threading
+import time
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Tuple, Type
+
+from tradeengine.dto import Asset, AssetRegistry
+from tradeengine.messages.codec import SCHEMA_BY_TYPE, to_ns, from_ns
+from tradeengine.messages.messages import Message, NewBarMarketData, NewBidAskMarketData, NewPositionMessage, \
+    PortfolioValueMessage
+
+MAGIC = b"TEJOURNAL1\n"
+
+# every record is: length (of everything after the length), kind, actor id, receive time in ns, body
+HEADER = struct.Struct("<IBHq")
+
+
+class RecordKind(IntEnum):
+    ACTOR = 0
+    ASSET = 1
+    BAR = 2
+    BID_ASK = 3
+    POSITION = 4
+    PICKLED = 5
+
+
+# fixed layout bodies of the hot messages (asset id, as_of in ns since epoch, floats) as defined by the codec
+BAR_BODY = SCHEMA_BY_TYPE[NewBarMarketData].struct
+BID_ASK_BODY = SCHEMA_BY_TYPE[NewBidAskMarketData].struct
+POSITION_BODY = SCHEMA_BY_TYPE[NewPositionMessage].struct
+ID_BODY = struct.Struct("<I")
+
+# the roles of the actors, the replay maps them onto fresh actors
+ROLES = {
+    "AbstractPortfolioActor": "portfolio",
+    "AbstractOrderbookActor": "orderbook",
+    "AbstractQuoteProviderActor": "quote_provider",
+}
+
+# messages the actors generate themselves when they get replayed together
+DERIVED_MESSAGES = (NewPositionMessage, PortfolioValueMessage)
+
+_active_journal: JournalWriter | None = None
+
+
+class JournalEntry(NamedTuple):
+    actor: str
+    received_ns: int
+    message: Message
+
+
+class JournalWriter(object):
+    """
+    An append-only journal of the messages the actors receive. Each record is length prefixed, the hot messages
+    (market data and new positions) use a compact fixed layout with interned assets and ns timestamps, all other
+    messages are pickled.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.file: BinaryIO = open(path, 'wb', buffering=buffer_size)
+        self.file.write(MAGIC)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.actors: Dict[str, int] = {}
+        self.assets = AssetRegistry()
+
+    def record(self, actor: Any, message: Message, received_ns: int | None = None):
+        if received_ns is None: received_ns = time.time_ns()
+
+        with self.lock:
+            # the journal may get stopped between looking it up and recording, drop messages of a closed journal
+            if self.closed: return
+
+            actor_id = self.actors.get(actor.actor_urn)
+            if actor_id is None:
+                actor_id = self.actors[actor.actor_urn] = len(self.actors)
+                self._write(RecordKind.ACTOR, actor_id, 0, role_of(actor).encode("utf-8"))
+
+            match message:
+                case NewBarMarketData(asset, as_of, open, high, low, close) if _is_naive(as_of):
+                    self._write(RecordKind.BAR, actor_id, received_ns, BAR_BODY.pack(self._asset_id(asset), to_ns(as_of), open, high, low, close))
+                case NewBidAskMarketData(asset, as_of, bid, ask) if _is_naive(as_of):
+                    self._write(RecordKind.BID_ASK, actor_id, received_ns, BID_ASK_BODY.pack(self._asset_id(asset), to_ns(as_of), bid, ask))
+                case NewPositionMessage(asset, as_of, quantity, price, fee) if _is_naive(as_of):
+                    self._write(RecordKind.POSITION, actor_id, received_ns, POSITION_BODY.pack(self._asset_id(asset), to_ns(as_of), quantity, price, fee))
+                case _:
+                    self._write(RecordKind.PICKLED, actor_id, received_ns, pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def flush(self):
+        with self.lock:
+            if not self.closed: self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.file.close()
+
+    def _asset_id(self, asset: Asset) -> int:
+        if asset not in self.assets:
+            self._write(RecordKind.ASSET, 0, 0, ID_BODY.pack(len(self.assets)) + pickle.dumps(asset, protocol=pickle.HIGHEST_PROTOCOL))
+
+        return self.assets.id_of(asset)
+
+    def _write(self, kind: RecordKind, actor_id: int, received_ns: int, body: bytes):
+        self.file.write(HEADER.pack(HEADER.size - 4 + len(body), kind, actor_id, received_ns))
+        self.file.write(body)
+
+
+class JournalReader(object):
+    """
+    Reads a journal (memory mapped) as a sequence of `JournalEntry(actor role, receive time ns, message)`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[JournalEntry]:
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            assert buffer[:len(MAGIC)] == MAGIC, f"{self.path} is not a journal"
+            actors: Dict[int, str] = {}
+            assets: List[Asset] = []
+            offset, size = len(MAGIC), len(buffer)
+
+            while offset + HEADER.size <= size:
+                length, kind, actor_id, received_ns = HEADER.unpack_from(buffer, offset)
+                body_offset, offset = offset + HEADER.size, offset + 4 + length
+                if offset > size: break  # incomplete last record of a crashed process
+
+                match kind:
+                    case RecordKind.BAR:
+                        asset_id, as_of, open_, high, low, close = BAR_BODY.unpack_from(buffer, body_offset)
+                        yield JournalEntry(actors[actor_id], received_ns, NewBarMarketData(assets[asset_id], from_ns(as_of), open_, high, low, close))
+                    case RecordKind.BID_ASK:
+                        asset_id, as_of, bid, ask = BID_ASK_BODY.unpack_from(buffer, body_offset)
+                        yield JournalEntry(actors[actor_id], received_ns, NewBidAskMarketData(assets[asset_id], from_ns(as_of), bid, ask))
+                    case RecordKind.POSITION:
+                        asset_id, as_of, quantity, price, fee = POSITION_BODY.unpack_from(buffer, body_offset)
+                        yield JournalEntry(actors[actor_id], received_ns, NewPositionMessage(assets[asset_id], from_ns(as_of), quantity, price, fee))
+                    case RecordKind.PICKLED:
+                        yield JournalEntry(actors[actor_id], received_ns, pickle.loads(buffer[body_offset:offset]))
+                    case RecordKind.ASSET:
+                        asset_id, = ID_BODY.unpack_from(buffer, body_offset)
+                        assert asset_id == len(assets), f"corrupt journal, asset {asset_id} out of order"
+                        assets.append(pickle.loads(buffer[body_offset + ID_BODY.size:offset]))
+                    case RecordKind.ACTOR:
+                        actors[actor_id] = bytes(buffer[body_offset:offset]).decode("utf-8")
+                    case _:
+                        raise ValueError(f"corrupt journal, unknown record kind {kind} at {offset}")
+
+
+def replay_journal(
+        path: str,
+        actors: Dict[str, Any],
+        skip: Tuple[Type[Message], ...] = DERIVED_MESSAGES,
+        speed: float | None = None,
+) -> int:
+    """
+    Replays a journal into (fresh) actors given by their role (`portfolio`, `orderbook`, `quote_provider`). Messages
+    to roles which are not given and messages of the `skip` types are ignored. By default the messages the actors
+    derive themselves (new positions, portfolio value requests of the orderbook) are skipped as they are generated
+    again while replaying. Every message is asked such that the actors process them in the recorded order.
+
+    The replay runs at disk speed unless a `speed` is given (i.e. 10 replays 10 times faster than recorded).
+    Returns the number of replayed messages.
+    """
+    replayed, first_ns, started_ns = 0, None, time.perf_counter_ns()
+    for actor, received_ns, message in JournalReader(path):
+        actor_ref = actors.get(actor)
+        if actor_ref is None or isinstance(message, skip):
+            continue
+
+        if speed is not None:
+            if first_ns is None: first_ns = received_ns
+            delay = (received_ns - first_ns) / speed - (time.perf_counter_ns() - started_ns)
+            if delay > 0: time.sleep(delay / 1e9)
+
+        actor_ref.ask(message)
+        replayed += 1
+
+    return replayed
+
+
+def start_journal(path: str) -> JournalWriter:
+    """
+    Starts recording every message any actor receives into a journal at `path` until `stop_journal` is called.
+    """
+    global _active_journal
+    stop_journal()
+    _active_journal = JournalWriter(path)
+    return _active_journal
+
+
+def stop_journal():
+    global _active_journal
+    journal, _active_journal = _active_journal, None
+    if journal is not None:
+        journal.close()
+
+
+def active_journal() -> JournalWriter | None:
+    return _active_journal
+
+
+def role_of(actor: Any) -> str:
+    for cls in type(actor).__mro__:
+        if cls.__name__ in ROLES:
+            return ROLES[cls.__name__]
+
+    return type(actor).__name__
+
+
+def _is_naive(dt: Any) -> bool:
+    return isinstance(dt, datetime) and dt.tzinfo is None
@@ -1,8 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import List
 
 from tradeengine.dto.order import Order
-from tradeengine.dto import Asset
+from tradeengine.dto import Asset, ASSETS
+from tradeengine.dto.timestamps import to_ns
 
 
 @dataclass(frozen=True, eq=True)
@@ -40,6 +42,17 @@ class NewMarketDataMessage(Message):
     asset: Asset
     as_of: datetime
 
+    # the interned asset id (of `ASSETS`) and the naive as_of as int64 ns (None otherwise) the actors work with.
+    # Quote providers pass them from their vectorized conversion, for all other quotes they are converted once here
+    asset_id: int | None = field(default=None, compare=False, repr=False, kw_only=True)
+    as_of_ns: int | None = field(default=None, compare=False, repr=False, kw_only=True)
+
+    def __post_init__(self):
+        if self.asset_id is None:
+            object.__setattr__(self, "asset_id", ASSETS.id_of(self.asset))
+        if self.as_of_ns is None and isinstance(self.as_of, datetime) and self.as_of.tzinfo is None:
+            object.__setattr__(self, "as_of_ns", to_ns(self.as_of))
+
 
 @dataclass(frozen=True, eq=True)
 class NewBidAskMarketData(NewMarketDataMessage):
@@ -56,18 +69,28 @@ class NewBarMarketData(NewMarketDataMessage):
 
 
 @dataclass(frozen=True, eq=True)
-class NewOrderMessage(Message):
-    order: Order
+class NewMarketDataBatch(Message):
+    # quotes of one timestamp, the receiving orderbook updates the portfolio with every quote before it executes the
+    # orders of that quote (exactly like a quote provider sending them one by one)
+    messages: List[NewMarketDataMessage]
 
 
 @dataclass(frozen=True, eq=True)
-class AllExecutedOrderHistory(Message):
-    include_evicted: bool = False
-
-
+class NewOrderMessage(Message):
+    order: Order
 
 
+@dataclass(frozen=True, eq=True)
+class NewOrdersMessage(Message):
+    orders: List[Order]
 
 
+@dataclass(frozen=True, eq=True)
+class AllExecutedOrderHistory(Message):
+    include_evicted: bool = False
 
 
+@dataclass(frozen=True, eq=True)
+class ActorMetricsMessage(Message):
+    # answered with a snapshot of the actor's metrics (None if instrumentation is not enabled)
+    pass
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class LRUCache(OrderedDict):
+    """
+    A small least recently used cache for the results of the dashboard callbacks. Unlike `functools.lru_cache` it
+    is owned by the object it caches for, so it does not keep (large) backtests alive.
+    """
+
+    def __init__(self, size: int = 16):
+        super().__init__()
+        self.size = size
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+
+        self[key] = value = compute()
+        while len(self) > self.size:
+            self.popitem(last=False)
+
+        return value
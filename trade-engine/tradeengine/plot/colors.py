@@ -1,10 +1,12 @@
 import hashlib
+from functools import lru_cache
 
 import plotly
 
 color_scale = plotly.colors.qualitative.Light24 + plotly.colors.qualitative.Dark24
 
 
+@lru_cache(maxsize=None)
 def get_color_for(asset):
     if asset in ("$$$", "Portfolio"):
         return '#555555'
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Dict, Literal
+
+import numpy as np
+import pandas as pd
+
+Aggregation = Literal['first', 'last', 'min', 'max', 'sum']
+OHLC_AGGREGATIONS = ('first', 'max', 'min', 'last')
+
+
+def bucket_starts(index: pd.DatetimeIndex, n_buckets: int) -> np.ndarray:
+    """
+    Splits a sorted time index into `n_buckets` buckets of equal time width (i.e. one per pixel) and returns the
+    position of the first row of every non-empty bucket.
+    """
+    if len(index) <= n_buckets:
+        return np.arange(len(index))
+
+    ns = index.asi8
+    edges = np.linspace(ns[0], ns[-1], n_buckets + 1)[:-1]
+    return np.unique(np.searchsorted(ns, edges, side='left'))
+
+
+def aggregate_buckets(df: pd.DataFrame, n_buckets: int, how: Aggregation | Dict[str, Aggregation] = 'last') -> pd.DataFrame:
+    """
+    Downsamples a time indexed frame to at most `n_buckets` rows, every bucket is indexed by the time of its first
+    row. The aggregation can be given per column, min, max and sum ignore missing values.
+    """
+    if len(df) <= n_buckets:
+        return df
+
+    starts = bucket_starts(df.index, n_buckets)
+    how = how if isinstance(how, dict) else {c: how for c in df.columns}
+    columns = {c: _aggregate(df[c].values.astype(float), starts, how[c]) for c in df.columns}
+    return pd.DataFrame(columns, index=df.index[starts], columns=df.columns)
+
+
+def ohlc_buckets(df: pd.DataFrame, n_buckets: int) -> pd.DataFrame:
+    # the first four columns are taken as open, high, low, close, all further columns (i.e. volume) are summed up
+    how = {c: OHLC_AGGREGATIONS[i] if i < 4 else 'sum' for i, c in enumerate(df.columns)}
+    return aggregate_buckets(df, n_buckets, how)
+
+
+def minmax_buckets(series: pd.Series, n_buckets: int) -> pd.Series:
+    """
+    Keeps the minimum and the maximum of every bucket at their original timestamps, which preserves the visual
+    envelope of a line with at most 2 * `n_buckets` points.
+    """
+    valid = series.dropna()
+    if len(valid) <= 2 * n_buckets:
+        return valid
+
+    values = valid.values.astype(float)
+    starts = bucket_starts(valid.index, n_buckets)
+    lengths = np.diff(np.append(starts, len(values)))
+    buckets = np.repeat(np.arange(len(starts)), lengths)
+
+    # the first position of every bucket where the value equals the bucket extreme
+    keep = []
+    for extreme in (np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)):
+        hits = np.flatnonzero(values == np.repeat(extreme, lengths))
+        keep.append(hits[np.unique(buckets[hits], return_index=True)[1]])
+
+    return valid.iloc[np.unique(np.concatenate(keep))]
+
+
+def lttb(series: pd.Series, n_out: int) -> pd.Series:
+    """
+    Largest triangle three buckets: keeps the first and last point and from every bucket in between the point
+    spanning the largest triangle with the previously selected point and the mean of the next bucket.
+    """
+    valid = series.dropna()
+    if len(valid) <= n_out or n_out < 3:
+        return valid
+
+    x = valid.index.asi8.astype(float)
+    y = valid.values.astype(float)
+    edges = np.linspace(1, len(valid) - 1, n_out - 1).astype(int)
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, len(valid) - 1
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else len(valid)
+        mean_x, mean_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+
+        a = selected[i]
+        area = np.abs((x[a] - mean_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y - y[a]))
+        selected[i + 1] = lo + int(np.argmax(area))
+
+    return valid.iloc[selected]
+
+
+def _aggregate(values: np.ndarray, starts: np.ndarray, how: Aggregation) -> np.ndarray:
+    match how:
+        case 'first':
+            return values[starts]
+        case 'last':
+            return values[np.append(starts[1:], len(values)) - 1]
+        case 'min':
+            return np.fmin.reduceat(values, starts)
+        case 'max':
+            return np.fmax.reduceat(values, starts)
+        case 'sum':
+            return np.add.reduceat(np.nan_to_num(values), starts)
+
+    raise ValueError(f"unknown aggregation {how}")
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tradeengine.plot.cache import LRUCache
+
+LOG = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+FILTER_OPERATORS = ('ge', 'le', 'lt', 'gt', 'ne', 'eq', 'contains', 'datestartswith')
+FILTER_PART = re.compile(r"^\s*\{(?P<column>[^}]+)\}\s+(?P<operator>s?[<>=!]=?|[a-z]+)\s+(?P<value>.+?)\s*$")
+SYMBOLS = {'<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge', '=': 'eq', '!=': 'ne'}
+
+
+class OrdersTable(object):
+    """
+    Serves single pages of the orders frame to a dash DataTable with custom (backend) paging, sorting and filtering.
+    The row order of every sorting and the row mask of every filter query are computed once and kept in a small
+    LRU cache, paging through a sorted and filtered table only touches the rows of the requested page.
+    """
+
+    def __init__(self, orders: pd.DataFrame, cache_size: int = 16):
+        self.orders = orders.reset_index(drop=True)
+        self.cache_size = cache_size
+        self._orderings: LRUCache = LRUCache(cache_size)
+        self._masks: LRUCache = LRUCache(cache_size)
+        self._categoricals: Dict[str, pd.Categorical] = {}
+
+    def __len__(self):
+        return len(self.orders)
+
+    @property
+    def columns(self) -> List[Dict[str, str]]:
+        return [dict(name=str(c), id=str(c)) for c in self.orders.columns]
+
+    def page_count(self, rows: int, page_size: int = PAGE_SIZE) -> int:
+        return max(math.ceil(rows / page_size), 1)
+
+    def query(
+            self,
+            page_current: int = 0,
+            page_size: int = PAGE_SIZE,
+            sort_by: List[Dict[str, str]] | None = None,
+            filter_query: str | None = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Returns the records of the requested page and the number of rows matching the filter. `sort_by` and
+        `filter_query` are the properties of the same name of a DataTable.
+        """
+        positions = self._ordering(sort_by or [])
+        mask = self._mask(filter_query or '')
+        if mask is not None:
+            positions = positions[mask[positions]]
+
+        page = positions[page_current * page_size:(page_current + 1) * page_size]
+        return _records(self.orders.iloc[page]), len(positions)
+
+    def _ordering(self, sort_by: List[Dict[str, str]]) -> np.ndarray:
+        # unknown columns are not sortable, they are skipped
+        key = tuple((s['column_id'], s['direction']) for s in sort_by if s['column_id'] in self.orders.columns)
+        if len(key) <= 0:
+            return np.arange(len(self.orders))
+
+        def sort():
+            columns = [c for c, _ in key]
+            ascending = [d == 'asc' for _, d in key]
+            return self.orders.sort_values(columns, ascending=ascending, kind='stable', na_position='last', key=self._sort_key).index.values
+
+        return self._orderings.get_or_compute(key, sort)
+
+    def _mask(self, filter_query: str) -> np.ndarray | None:
+        if len(filter_query.strip()) <= 0:
+            return None
+
+        def evaluate():
+            mask = np.ones(len(self.orders), dtype=bool)
+            for part in filter_query.split(' && '):
+                # the query is typed by the user, parts which can not be evaluated are ignored
+                try:
+                    mask &= self._compare(*parse_filter_part(part))
+                except ValueError as e:
+                    LOG.warning(f"ignore filter {part}: {e}")
+
+            return mask
+
+        return self._masks.get_or_compute(filter_query, evaluate)
+
+    def categorical(self, column: str) -> pd.Categorical:
+        # object columns (assets, enums, None) are indexed once by the sorted set of their string representations
+        if column not in self._categoricals:
+            codes, uniques = pd.factorize(self.orders[column], use_na_sentinel=False)
+            strings = [str(u) for u in uniques]
+            categories = sorted(set(strings))
+            position = {c: i for i, c in enumerate(categories)}
+            recode = np.array([position[s] for s in strings], dtype=np.int64)
+            self._categoricals[column] = pd.Categorical.from_codes(recode[codes], categories=categories, ordered=True)
+
+        return self._categoricals[column]
+
+    def _sort_key(self, values: pd.Series) -> pd.Series:
+        # enums and mixed objects are not orderable, they sort by the codes of their string representation
+        return values if values.dtype != object else pd.Series(self.categorical(values.name).codes, index=values.index)
+
+    def _compare(self, column: str, operator: str, value: str) -> np.ndarray:
+        if column not in self.orders.columns:
+            raise ValueError(f"unknown column {column}")
+
+        values = self.orders[column]
+        if values.dtype == object:
+            # evaluate the filter on the few distinct values and broadcast it by the codes
+            categorical = self.categorical(column)
+            return _compare(pd.Series(categorical.categories, dtype=object), operator, value)[categorical.codes]
+
+        if operator == 'datestartswith' and pd.api.types.is_datetime64_any_dtype(values):
+            date_range = _date_prefix_range(value)
+            if date_range is not None:
+                start, end = date_range
+                return ((values >= start) & (values < end)).values
+
+            # midnight only columns print without a time, match the prefix against the full date and time
+            return values.dt.strftime('%Y-%m-%d %H:%M:%S.%f').str.startswith(value.strip().replace('T', ' ', 1)).values
+
+        return _compare(values, operator, value)
+
+
+def parse_filter_part(part: str) -> Tuple[str, str, str]:
+    """
+    Parses one part of a DataTable filter query like `{size} s> 10` or `{asset} contains 'AA'` into the column, the
+    operator (one of `FILTER_OPERATORS`) and the unquoted value. Raises a ValueError for unsupported filters.
+    """
+    match = FILTER_PART.match(part)
+    if match is None:
+        raise ValueError(f"unsupported filter {part}")
+
+    operator = match['operator'].lstrip('s')
+    operator = SYMBOLS.get(operator, operator)
+    if operator not in FILTER_OPERATORS:
+        raise ValueError(f"unsupported filter operator {match['operator']}")
+
+    value = match['value']
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"`":
+        value = value[1:-1]
+
+    return match['column'], operator, value
+
+
+def _compare(values: pd.Series, operator: str, value: str) -> np.ndarray:
+    if operator == 'contains':
+        return values.astype(str).str.contains(value, regex=False).values
+    if operator == 'datestartswith':
+        return values.astype(str).str.startswith(value).values
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values, value = values.values, np.datetime64(pd.Timestamp(value))
+    elif pd.api.types.is_numeric_dtype(values):
+        number = pd.to_numeric(value, errors='coerce')
+        if pd.isna(number):
+            # None / nan only equal missing values
+            missing = values.isna().values
+            return missing if operator == 'eq' else ~missing if operator == 'ne' else np.zeros(len(values), dtype=bool)
+
+        values, value = values.values, float(number)
+    else:
+        values = values.astype(str).values
+
+    match operator:
+        case 'eq': return values == value
+        case 'ne': return values != value
+        case 'lt': return values < value
+        case 'le': return values <= value
+        case 'gt': return values > value
+        case 'ge': return values >= value
+
+
+def _date_prefix_range(prefix: str) -> Tuple[pd.Timestamp, pd.Timestamp] | None:
+    # a date prefix like 2020, 2020-03 or 2020-03-02 covers one year, month or day, any other prefix is matched
+    # against the string representation of the dates
+    offset = {4: pd.DateOffset(years=1), 7: pd.DateOffset(months=1), 10: pd.DateOffset(days=1)}.get(len(prefix.strip()))
+    if offset is None:
+        return None
+
+    start = pd.Timestamp(prefix)
+    return start, start + offset
+
+
+def _records(page: pd.DataFrame) -> List[Dict[str, Any]]:
+    page = page.copy()
+    if "order_type" in page.columns:
+        page["order_type"] = page["order_type"].astype(str)
+
+    return page.to_dict('records')
+
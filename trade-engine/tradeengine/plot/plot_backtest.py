@@ -1,13 +1,23 @@
 from collections import defaultdict
-from typing import Dict, Literal
+from typing import Dict, Iterable, Literal, Tuple
 
-import dash.dash_table as ddt
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 from tradeengine.backtest import Backtest
 from tradeengine.dto.asset import CASH
 from tradeengine.plot.colors import get_color_for
+from tradeengine.plot.orders_table import OrdersTable, PAGE_SIZE
+from tradeengine.plot.positions import PositionPies
+from tradeengine.plot.downsample import aggregate_buckets, lttb, minmax_buckets, ohlc_buckets
+from tradeengine.plot.raster import RASTER_SIZE, RasterLayer, datashader_available, rasterize_lines, rasterize_points
+from tradeengine.signals import signal_markers
+
+RenderMode = Literal['auto', 'vector', 'raster']
+TimeRange = Tuple[pd.Timestamp | None, pd.Timestamp | None]
+MAX_VECTOR_POINTS = 200_000
 
 
 # FIXME
@@ -17,14 +27,49 @@ from tradeengine.plot.colors import get_color_for
 
 
 class PlotBacktest(object):
-
-    def __init__(self, backtest: Backtest) -> None:
+    """
+    Plots a backtest either as plotly vector traces (one trace per asset and layer) or, for large selections of
+    assets times bars, with the price, order and position value layers rasterized server side by datashader.
+    `render='auto'` switches to rasters as soon as a selection exceeds `max_vector_points` prices.
+    """
+
+    def __init__(
+            self,
+            backtest: Backtest,
+            render: RenderMode = 'auto',
+            max_vector_points: int = MAX_VECTOR_POINTS,
+            raster_size: Tuple[int, int] = RASTER_SIZE,
+    ) -> None:
         super().__init__()
         self.backtest = backtest
-
-    def plot_performance(self):
+        self.render = render
+        self.max_vector_points = max_vector_points
+        self.raster_size = raster_size
+        self._signal_markers: pd.DataFrame | None = None
+        self._scale_factors: Dict[str, float] = {}
+        self._orders_table: OrdersTable | None = None
+        self._position_pies: PositionPies | None = None
+
+    def plot_performance(self, assets: Iterable[str] | None = None, time_range: TimeRange | None = None, max_points: int | None = None):
+        """
+        Plots the performance, prices, signals, executed orders and position values of the selected assets within
+        the time range. With `max_points` every vector trace is downsampled to at most this many buckets of the
+        time range (about one per pixel), so zooming into a window re-plots it at full resolution.
+        """
         fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.03, row_heights=[0.6, 0.2, 0.2], subplot_titles=("Performance", "Position Changes", "Position Values"))
-        traces = self.get_plot_objects()
+        assets = self.backtest.assets if assets is None else set(assets)
+
+        if self.rasterize(assets, time_range, max_points):
+            layers = self.get_raster_objects(assets, time_range)
+            fig.add_traces(self.get_performance_traces(time_range, max_points), rows=1, cols=1)
+            for row, layer in enumerate([layers["market_data"], layers["executed_orders"], layers["position_values"]], start=1):
+                if layer is None: continue
+                fig.add_trace(layer.bounds_trace(f"raster{row}"), row=row, col=1)
+                fig.add_layout_image(layer.layout_image(), row=row, col=1)
+
+            return fig
+
+        traces = self.get_plot_objects(assets, time_range, max_points)
 
         fig.add_traces(traces["portfolio_performance"], rows=1, cols=1)
         fig.add_traces(traces["market_data"], rows=1, cols=1)
@@ -34,85 +79,159 @@ class PlotBacktest(object):
 
         return fig
 
-    def plot_positions(self, tst=None):
-        specs = [[{"type": "pie"}], [{"type": "pie"}]]
-        fig_positions = make_subplots(
-            rows=2, cols=1, vertical_spacing=0.03, subplot_titles=("Position Weights", "Position Values"), specs=specs)
-
-        x_value = tst if tst is not None else self.backtest.position_values.index[-1]
-        print("x", x_value)
-        fig_positions.add_trace(
-            go.Pie(
-                labels=list(map(str, self.backtest.position_weights.loc[x_value].index)),
-                values=self.backtest.position_weights.loc[x_value].abs().apply(lambda x: f"{x:.4f}"),
-                marker_colors=list(map(get_color_for, self.backtest.position_weights.loc[x_value].index)),
-                sort=False,
-            ),
-            row=1,
-            col=1
+    def rasterize(self, assets: Iterable[str], time_range: TimeRange | None = None, max_points: int | None = None) -> bool:
+        if self.render == 'vector':
+            return False
+
+        if self.render == 'auto' and self._selected_points(assets, time_range, max_points) <= self.max_vector_points:
+            return False
+
+        # without a usable datashader we can only plot vectors
+        return datashader_available()
+
+    def _selected_points(self, assets: Iterable[str], time_range: TimeRange | None, max_points: int | None = None) -> int:
+        assets = list(assets)
+        if len(assets) <= 0:
+            return 0
+
+        market_data = self.backtest.frame('market_data')
+        rows = len(market_data) if time_range is None else len(_slice(market_data[assets[0]], time_range))
+        return (rows if max_points is None else min(rows, max_points)) * len(assets)
+
+    def market_data(self, asset: str, time_range: TimeRange | None = None) -> pd.DataFrame:
+        market_data = self.backtest.frame('market_data')
+        if isinstance(market_data, pd.DataFrame):
+            # slice the rows first so only the window gets copied
+            return _slice(market_data, time_range)[asset]
+
+        return _slice(market_data[asset], time_range)
+
+    def scale_factor(self, asset: str) -> float:
+        # prices are normalized by the first prices of the full series, so they do not jump when zooming in
+        if asset not in self._scale_factors:
+            md = self.backtest.frame('market_data')[asset]
+            self._scale_factors[asset] = md.loc[md.first_valid_index()].mean()
+
+        return self._scale_factors[asset]
+
+    def signal_markers(self) -> pd.DataFrame:
+        """
+        The flat marker table (time, asset, marker, y) of all signals where y is the normalized mean price of the
+        asset at the signal time. It is derived once, zooming only selects windows of it.
+        """
+        if self._signal_markers is None:
+            markers = signal_markers(self.backtest.signals)
+            market_data_assets = self.backtest.assets
+            y = np.full(len(markers), np.nan)
+            for asset, positions in markers.groupby("asset").indices.items():
+                if asset not in market_data_assets: continue
+                md = self.backtest.frame('market_data')[asset]
+                y[positions] = md.reindex(markers["time"].values[positions]).mean(axis=1).values / self.scale_factor(asset)
+
+            markers["y"] = y
+            self._signal_markers = markers[~np.isnan(y)].reset_index(drop=True)
+
+        return self._signal_markers
+
+    def get_performance_traces(self, time_range: TimeRange | None = None, max_points: int | None = None) -> list:
+        performance = _slice(self.backtest.porfolio_performance, time_range)["performance"]
+        if max_points is not None:
+            performance = lttb(performance, max_points)
+
+        return [go.Scatter(x=performance.index, y=performance, mode='lines', name="Portfolio", legendgroup="Portfolio", marker=dict(color='#555555'))]
+
+    def get_raster_objects(self, assets: Iterable[str], time_range: TimeRange | None = None) -> Dict[str, RasterLayer | None]:
+        # normalized close prices of all assets, executed order values and position values as density images
+        prices = {}
+        for asset in assets:
+            md = self.market_data(asset, time_range)
+            cols = md.columns.tolist()
+            prices[asset] = md[cols[3] if len(cols) >= 4 else cols[-1]] / self.scale_factor(asset)
+
+        orders = self.backtest.orders[(self.backtest.orders["status"] == 1) & self.backtest.orders["asset"].isin(assets)]
+        orders = _slice(orders.set_index("execute_time").sort_index(), time_range)
+
+        position_values = self.backtest.position_values
+        position_values = _slice(position_values[[c for c in position_values.columns if c in assets]], time_range)
+
+        return dict(
+            market_data=rasterize_lines(pd.DataFrame(prices), self.raster_size),
+            executed_orders=rasterize_points(orders.index.to_series(), orders["execute_value"], self.raster_size),
+            position_values=rasterize_lines(position_values, self.raster_size),
         )
 
-        fig_positions.add_trace(
-            go.Pie(
-                labels=list(map(str, self.backtest.position_values.loc[x_value].index)),
-                values=self.backtest.position_values.loc[x_value].abs().apply(lambda x: f"{x:.4f}"),
-                marker_colors=list(map(get_color_for, self.backtest.position_values.loc[x_value].index)),
-                sort=False,
-            ),
-            row=2, col=1
+    def position_pies(self) -> PositionPies:
+        if self._position_pies is None:
+            self._position_pies = PositionPies(self.backtest.position_weights, self.backtest.position_values)
+
+        return self._position_pies
+
+    def plot_positions(self, tst=None):
+        # `tst` defaults to the last row, see `position_pies` for the serialized (and cached) figure
+        return go.Figure(self.position_pies().figure(tst))
+
+    def get_plot_objects(self, assets: Iterable[str] | None = None, time_range: TimeRange | None = None, max_points: int | None = None) -> Dict[str, list]:
+        assets = self.backtest.assets if assets is None else set(assets)
+        orders = _slice(
+            self.backtest.orders[self.backtest.orders["status"] == 1]\
+                .pivot_table(index='execute_time', columns='asset', values='execute_value', aggfunc='sum')\
+                .sort_index(),
+            time_range
         )
 
-        return fig_positions
+        signals = self.signal_markers()
+        if time_range is not None:
+            signals = signals[_between(signals["time"], time_range)]
+
+        markers_by_asset = defaultdict(list)
+        for (asset, marker), positions in signals.groupby(["asset", "marker"]).indices.items():
+            markers_by_asset[asset].append((marker, positions))
+        position_values = _slice(self.backtest.position_values, time_range)
 
-    def get_plot_objects(self) -> Dict[str, list]:
-        orders = self.backtest.orders[self.backtest.orders["status"] == 1]\
-            .pivot(index='execute_time', columns='asset', values='execute_value')\
-            .sort_index()
-        idx = self.backtest.market_data.index
+        if max_points is not None:
+            # order values add up within a bucket, position values are sampled at the end of it
+            orders = aggregate_buckets(orders, max_points, 'sum')
+            position_values = aggregate_buckets(position_values, max_points, 'last')
 
         # store traces in dict
         traces = defaultdict(list)
 
         # performance
-        traces["portfolio_performance"] = [go.Scatter(x=self.backtest.porfolio_performance.index, y=self.backtest.porfolio_performance["performance"], mode='lines', name="Portfolio", legendgroup="Portfolio", marker=dict(color='#555555'))]
+        traces["portfolio_performance"] = self.get_performance_traces(time_range, max_points)
 
         # cash position
         #traces["position_values"].append(go.Scatter(x=self.position_values.index, y=self.position_values[CASH], mode='lines', name="Cash", legendgroup="Cash", marker=dict(color='#555555')))
-        traces["position_values"].append(go.Bar(x=self.backtest.position_values.index, y=self.backtest.position_values[str(CASH)], name="Cash", legendgroup="Cash", marker=dict(color='#555555')))
+        traces["position_values"].append(go.Bar(x=position_values.index, y=position_values[str(CASH)], name="Cash", legendgroup="Cash", marker=dict(color='#555555')))
 
         # Add traces to the first row
-        visible = 'legendonly' if len(self.backtest.assets) > 3 else True
-        for asset in self.backtest.assets:
+        visible = 'legendonly' if len(assets) > 3 else True
+        for asset in assets:
             symbol = str(asset)
             color = get_color_for(asset)
 
             # plot market data
-            md = self.backtest.market_data[asset]
-            scale_factor = md.loc[md.first_valid_index()].mean()
-            md /= scale_factor
+            scale_factor = self.scale_factor(asset)
+            md = self.market_data(asset, time_range)
             cols = md.columns.tolist()
             ncols = md.shape[1]
-            ohlc = cols[:4] if ncols >= 4 else (cols[0] * 2 + cols[1] * 2 if ncols == 2 else cols[0] * 4)
-            trace_price = go.Ohlc(x=idx, open=md[ohlc[0]], high=md[ohlc[1]], low=md[ohlc[2]], close=md[ohlc[3]], name=symbol, legendgroup=symbol, increasing_line_color=color, decreasing_line_color=color, visible=visible)
+            ohlc = cols[:4] if ncols >= 4 else ([cols[0]] * 2 + [cols[1]] * 2 if ncols == 2 else [cols[0]] * 4)
+            bars = md[ohlc].set_axis(["open", "high", "low", "close"], axis=1)
+            if max_points is not None: bars = ohlc_buckets(bars, max_points)
+            bars = bars / scale_factor
+            trace_price = go.Ohlc(x=bars.index, open=bars["open"], high=bars["high"], low=bars["low"], close=bars["close"], name=symbol, legendgroup=symbol, increasing_line_color=color, decreasing_line_color=color, visible=visible)
             traces["market_data"].append(trace_price)
 
             if len(self.backtest.market_data_extra_data) > 0:
-                ext_data = self.backtest.market_data_extra_data[asset] / scale_factor
+                ext_data = _slice(self.backtest.market_data_extra_data[asset], time_range) / scale_factor
                 for ext_col in ext_data.columns:
-                    trace_price = go.Scatter(x=ext_data.index, y=ext_data[ext_col], name=f"{symbol}.{ext_col}", legendgroup=symbol, mode='lines', visible=visible)
+                    line = ext_data[ext_col] if max_points is None else minmax_buckets(ext_data[ext_col], max_points)
+                    trace_price = go.Scatter(x=line.index, y=line, name=f"{symbol}.{ext_col}", legendgroup=symbol, mode='lines', visible=visible)
                     traces["market_data"].append(trace_price)
 
-            # plot raw signals
-            signals = self.backtest.signals[asset]  # Dict[Class[<Order], params]
-            markers = defaultdict(lambda: {"x": [], "y": []})
-            for i, sigs in signals.items():
-                for s in sigs:
-                    if s is None: continue
-                    markers[s["marker"]]["x"].append(i)
-                    markers[s["marker"]]["y"].append(md.loc[i].mean())
-
-            for marker, xy in markers.items():
-                trace_signal = go.Scatter(x=xy["x"], y=xy["y"], name=symbol, marker=dict(color=color, symbol=marker, size=10), legendgroup=symbol, showlegend=False, mode='markers', visible=visible)
+            # plot raw signals, one trace per marker symbol
+            for marker, positions in markers_by_asset.get(symbol, []):
+                xy = signals.iloc[positions]
+                trace_signal = go.Scatter(x=xy["time"].values, y=xy["y"].values, name=symbol, marker=dict(color=color, symbol=marker, size=10), legendgroup=symbol, showlegend=False, mode='markers', visible=visible)
                 traces["signal"].append(trace_signal)
 
             # plot executed orders
@@ -121,8 +240,8 @@ class PlotBacktest(object):
                 traces["executed_orders"].append(trace_executed_order)
 
             # position values
-            if symbol in self.backtest.position_values.columns:
-                pv = self.backtest.position_values[asset]
+            if symbol in position_values.columns:
+                pv = position_values[asset]
                 position_value = go.Bar(x=pv.index, y=pv, marker=dict(color=color), name=symbol, legendgroup=symbol, showlegend=False, visible=visible)
                 traces["position_values"].append(position_value)
 
@@ -142,7 +261,41 @@ class PlotBacktest(object):
 
         pass
 
-    def get_orders_table(self):
-        orders = self.backtest.orders.copy()
-        orders["order_type"] = orders["order_type"].astype(str)
-        return ddt.DataTable(orders.to_dict('records'), id='orders-table')
+    def orders_table(self) -> OrdersTable:
+        if self._orders_table is None:
+            self._orders_table = OrdersTable(self.backtest.orders)
+
+        return self._orders_table
+
+    def get_orders_table(self, page_size: int = PAGE_SIZE):
+        # only the first page is sent, paging, sorting and filtering is served by `orders_table().query`
+        import dash.dash_table as ddt
+
+        table = self.orders_table()
+        data, rows = table.query(0, page_size)
+        return ddt.DataTable(
+            data,
+            columns=table.columns,
+            id='orders-table',
+            page_current=0,
+            page_size=page_size,
+            page_count=table.page_count(rows, page_size),
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='multi',
+            sort_by=[],
+            filter_action='custom',
+            filter_query='',
+        )
+
+
+def _slice(df: pd.DataFrame, time_range: TimeRange | None) -> pd.DataFrame:
+    return df if time_range is None else df.loc[time_range[0]:time_range[1]]
+
+
+def _between(time: pd.Series, time_range: TimeRange) -> np.ndarray:
+    start, end = time_range
+    mask = np.ones(len(time), dtype=bool)
+    if start is not None: mask &= (time >= start).values
+    if end is not None: mask &= (time <= end).values
+    return mask
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from tradeengine.plot.cache import LRUCache
+from tradeengine.plot.colors import get_color_for
+
+PIE_TITLES = ("Position Weights", "Position Values")
+PIE_DECIMALS = 4
+
+
+class PositionRows(object):
+    """
+    The rows of a position frame (weights or values) as a plain numpy matrix together with the labels and colors
+    of its columns, such that a single timestamp is looked up by a binary search instead of `.loc`.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.index = pd.DatetimeIndex(frame.index)
+        self.time = self.index.asi8
+        self.values = frame.to_numpy(dtype=float)
+        self.labels = [str(c) for c in frame.columns]
+        self.colors = [get_color_for(c) for c in frame.columns]
+
+    def __len__(self):
+        return len(self.time)
+
+    def position(self, tst=None) -> int:
+        # the last row at or before the timestamp, clicks between two rows show the earlier one
+        if tst is None:
+            return len(self.time) - 1
+
+        tst = pd.Timestamp(tst)
+        if self.index.tz is not None and tst.tz is None:
+            tst = tst.tz_localize(self.index.tz)
+
+        return max(int(np.searchsorted(self.time, tst.value, side='right')) - 1, 0)
+
+    def row(self, position: int) -> List[float]:
+        return np.round(np.nan_to_num(np.abs(self.values[position])), PIE_DECIMALS).tolist()
+
+
+class PositionPies(object):
+    """
+    Serves the (serialized) figure of the position weights and values pies at a timestamp. The subplot layout is
+    built once, every figure only fills in the rows of the two frames and the last `cache_size` figures are kept.
+    """
+
+    def __init__(self, position_weights: pd.DataFrame, position_values: pd.DataFrame, cache_size: int = 64):
+        self.weights = PositionRows(position_weights)
+        self.values = PositionRows(position_values)
+        self._figures = LRUCache(cache_size)
+        self._template = _pies_template()
+
+    def figure(self, tst=None) -> Dict[str, Any]:
+        key = (self.weights.position(tst), self.values.position(tst))
+        return self._figures.get_or_compute(key, lambda: self._figure(*key))
+
+    def _figure(self, weights_position: int, values_position: int) -> Dict[str, Any]:
+        data = []
+        for trace, rows, position in zip(self._template["data"], (self.weights, self.values), (weights_position, values_position)):
+            if len(rows) <= 0: continue
+            data.append({**trace, "labels": rows.labels, "values": rows.row(position), "marker": {"colors": rows.colors}})
+
+        return {"data": data, "layout": self._template["layout"]}
+
+
+def _pies_template() -> Dict[str, Any]:
+    specs = [[{"type": "pie"}], [{"type": "pie"}]]
+    fig = make_subplots(rows=2, cols=1, vertical_spacing=0.03, subplot_titles=PIE_TITLES, specs=specs)
+    fig.add_trace(go.Pie(sort=False), row=1, col=1)
+    fig.add_trace(go.Pie(sort=False), row=2, col=1)
+    return fig.to_dict()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+LOG = logging.getLogger(__name__)
+RASTER_SIZE = (1200, 400)
+RASTER_COLORMAP = ['#d9d9d9', '#555555']
+
+
+def datashader_available() -> bool:
+    # datashader (and its xarray) is heavy and optional, hence only imported once a raster is needed
+    try:
+        import datashader
+        return True
+    except Exception as e:
+        LOG.warning(f"datashader not usable, falling back to vector traces: {e}")
+        return False
+
+
+@dataclass(frozen=True)
+class RasterLayer:
+    """
+    A server side rendered image of many lines or points. The image spans `x_range` (ns since epoch) and `y_range`
+    in data coordinates and gets stretched over these ranges of the subplot axes it is added to.
+    """
+    image: Any  # PIL.Image
+    x_range: Tuple[int, int]
+    y_range: Tuple[float, float]
+
+    def layout_image(self) -> Dict[str, Any]:
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        return dict(
+            source=self.image,
+            x=pd.Timestamp(x0), y=y1, sizex=(x1 - x0) / 1e6, sizey=y1 - y0,  # date axes are measured in ms
+            xanchor='left', yanchor='top', sizing='stretch', layer='below',
+        )
+
+    def bounds_trace(self, name: str) -> go.Scatter:
+        # layout images do not take part in the autorange of the axes, an invisible trace at the corners does
+        return go.Scatter(
+            x=pd.to_datetime(list(self.x_range)), y=list(self.y_range), mode='markers', name=name,
+            marker=dict(opacity=0), showlegend=False, hoverinfo='skip'
+        )
+
+
+def rasterize_lines(df: pd.DataFrame, size: Tuple[int, int] = RASTER_SIZE, how: str = 'eq_hist') -> RasterLayer | None:
+    """
+    Rasterizes every column of a time indexed frame as a line and shades the pixels by the number of lines
+    crossing them. Gaps (nan) interrupt the lines.
+    """
+    import datashader as ds
+    import datashader.transfer_functions as tf
+
+    df = df.dropna(axis=1, how='all')
+    if len(df) <= 1 or df.shape[1] <= 0:
+        return None
+
+    columns = [f"c{i}" for i in range(df.shape[1])]
+    frame = pd.DataFrame(df.values.astype(float), columns=columns)
+    frame["time"] = df.index.values.astype('datetime64[ns]').astype(np.int64).astype(float)
+
+    x_range, y_range = _ranges(frame["time"].values, frame[columns].values)
+    canvas = ds.Canvas(plot_width=size[0], plot_height=size[1], x_range=x_range, y_range=y_range)
+    agg = canvas.line(frame, x="time", y=columns, agg=ds.count(), axis=0)
+    return RasterLayer(tf.shade(agg, cmap=RASTER_COLORMAP, how=how).to_pil(), _ns_range(x_range), y_range)
+
+
+def rasterize_points(time: pd.Series, y: pd.Series, size: Tuple[int, int] = RASTER_SIZE, how: str = 'eq_hist') -> RasterLayer | None:
+    """
+    Rasterizes points (i.e. executed orders) and shades the pixels by the number of points falling into them.
+    """
+    import datashader as ds
+    import datashader.transfer_functions as tf
+
+    frame = pd.DataFrame({"time": pd.to_datetime(time).values.astype('datetime64[ns]').astype(np.int64).astype(float), "y": np.asarray(y, dtype=float)})
+    frame = frame.dropna()
+    if len(frame) <= 0:
+        return None
+
+    x_range, y_range = _ranges(frame["time"].values, frame["y"].values)
+    canvas = ds.Canvas(plot_width=size[0], plot_height=size[1], x_range=x_range, y_range=y_range)
+    agg = canvas.points(frame, "time", "y", agg=ds.count())
+    return RasterLayer(tf.spread(tf.shade(agg, cmap=RASTER_COLORMAP, how=how), px=1).to_pil(), _ns_range(x_range), y_range)
+
+
+def _ranges(x: np.ndarray, y: np.ndarray) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    # datashader needs non empty ranges
+    x0, x1 = float(np.nanmin(x)), float(np.nanmax(x))
+    y0, y1 = float(np.nanmin(y)), float(np.nanmax(y))
+    if x1 <= x0: x1 = x0 + 1
+    if y1 <= y0: y0, y1 = y0 - 0.5, y1 + 0.5
+    return (x0, x1), (y0, y1)
+
+
+def _ns_range(x_range: Tuple[float, float]) -> Tuple[int, int]:
+    return int(x_range[0]), int(x_range[1])
@@ -1,19 +1,33 @@
+import os
+
 import click
 
-from tradeengine.backtest import Backtest
-from tradeengine.dashboard.backtest import backtest_layout
+from tradeengine.dashboard import MAX_POINTS
 
 
 @click.command()
 @click.option('-p', '--port', default=8050, help="port dash server listens to (default 8050)")
-@click.argument('filename', nargs=1, required=False, default=None)
-def cli(filename, port):
-    run(filename, port)
+@click.option('-m', '--max-points', default=MAX_POINTS, help=f"points per trace of the visible window (default {MAX_POINTS})")
+@click.option('-c', '--cache-mb', default=None, type=int, help="memory budget of the frames shared by compared backtests (MB)")
+@click.option('-l', '--live', is_flag=True, default=False, help="follow the portfolio feed given as filename")
+@click.argument('filenames', nargs=-1, required=False)
+def cli(filenames, port, max_points, cache_mb, live):
+    from tradeengine.storage import is_artifact
+
+    # several files (or a directory of backtests) open the comparison of all of them
+    if live:
+        follow(filenames[0], port)
+    elif len(filenames) > 1 or (len(filenames) == 1 and os.path.isdir(filenames[0]) and not is_artifact(filenames[0])):
+        compare(filenames, port, max_points, None if cache_mb is None else cache_mb << 20)
+    else:
+        run(filenames[0] if len(filenames) > 0 else None, port, max_points)
 
 
-def run(filename: str, port: int | None = None):
+def run(filename: str, port: int | None = None, max_points: int = MAX_POINTS):
     import dash
     import dash_bootstrap_components as dbc
+    from tradeengine.backtest import Backtest
+    from tradeengine.dashboard.backtest import backtest_layout
     from tradeengine.plot.plot_backtest import PlotBacktest
 
     if filename is None:
@@ -27,7 +41,35 @@ def run(filename: str, port: int | None = None):
     plot_bt = PlotBacktest(backtest)
 
     app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-    app.layout = backtest_layout(app, plot_bt)
+    app.layout = backtest_layout(app, plot_bt, max_points)
+    app.run_server(debug=True, port=8050 if port is None else port)
+
+
+def compare(filenames, port: int | None = None, max_points: int = MAX_POINTS, cache_bytes: int | None = None):
+    import dash
+    import dash_bootstrap_components as dbc
+    from tradeengine.comparison import BacktestComparison
+    from tradeengine.dashboard.comparison import comparison_layout
+    from tradeengine.storage import FRAME_CACHE
+
+    if cache_bytes is not None:
+        FRAME_CACHE.max_bytes = cache_bytes
+
+    comparison = BacktestComparison(filenames)
+
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+    app.layout = comparison_layout(app, comparison, max_points)
+    app.run_server(debug=True, port=8050 if port is None else port)
+
+
+def follow(feed: str, port: int | None = None):
+    import dash
+    import dash_bootstrap_components as dbc
+    from tradeengine.dashboard.live import LivePortfolio, live_layout
+    from tradeengine.messages.feed import PortfolioFeedReader
+
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+    app.layout = live_layout(app, LivePortfolio(PortfolioFeedReader(feed)))
     app.run_server(debug=True, port=8050 if port is None else port)
 
 
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import html
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict
+
+import click
+import pandas as pd
+
+from tradeengine.backtest import Backtest
+from tradeengine.comparison import find_backtests, summary_statistics, SUMMARY_COLUMNS
+from tradeengine.storage import is_artifact
+
+LOG = logging.getLogger(__name__)
+
+REPORT_MAX_POINTS = 2000
+PLOTLY_JS = 'plotly.min.js'
+INDEX = 'index.html'
+
+# the benchmark returns of the worker processes, they are sent once per worker by the pool initializer
+_benchmark: pd.Series | None = None
+
+
+@click.command()
+@click.option('-b', '--benchmark', type=str, default=None, help="benchmark: an asset of the market data, a csv file of prices or a ticker (downloaded once)")
+@click.option('-w', '--workers', type=int, default=None, help="number of processes rendering the reports")
+@click.option('-m', '--max-points', default=REPORT_MAX_POINTS, help=f"points per trace of the backtest figures (default {REPORT_MAX_POINTS})")
+@click.option('--no-figures', is_flag=True, default=False, help="only render the tear sheets")
+@click.argument('out_dir', nargs=1)
+@click.argument('backtests', nargs=-1, required=True)
+def cli(out_dir: str, backtests, benchmark: str | None, workers: int | None, max_points: int, no_figures: bool):
+    summary = render_reports(find_backtests(backtests), out_dir, benchmark, workers, not no_figures, max_points)
+    print(summary.to_string())
+
+
+def render_reports(
+        runs: Dict[str, str],
+        out_dir: str,
+        benchmark: str | pd.Series | None = None,
+        workers: int | None = None,
+        figures: bool = True,
+        max_points: int = REPORT_MAX_POINTS,
+) -> pd.DataFrame:
+    """
+    Renders a static html quantstats tear sheet (`<name>.html`) and the `PlotBacktest` figure (`<name>.figure.html`)
+    of every backtest into `out_dir`, distributed over a process pool, plus an `index.html` with the summary
+    statistics of all runs. Everything the runs share is prepared once up front: the benchmark returns and the
+    plotly.js bundle all figures refer to. Failing runs are logged and listed with their error in the index.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    benchmark = benchmark_returns(benchmark, runs) if not isinstance(benchmark, pd.Series) else benchmark
+
+    if figures:
+        from plotly.offline import get_plotlyjs
+        with open(os.path.join(out_dir, PLOTLY_JS), 'w', encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+
+    rows = {}
+    if len(runs) <= 1 or workers == 1:
+        _init_worker(benchmark)
+        for name, path in runs.items():
+            rows[name] = _result(name, lambda: _render_report(name, path, out_dir, figures, max_points))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(benchmark,)) as pool:
+            futures = {pool.submit(_render_report, name, path, out_dir, figures, max_points): name for name, path in runs.items()}
+            for future in as_completed(futures):
+                rows[futures[future]] = _result(futures[future], future.result)
+
+    summary = pd.DataFrame.from_dict({name: rows[name] for name in runs}, orient='index')
+    summary = summary.reindex(columns=SUMMARY_COLUMNS + [c for c in summary.columns if c not in SUMMARY_COLUMNS])
+    summary.index.name = "backtest"
+    write_index(out_dir, summary, figures)
+    return summary
+
+
+def benchmark_returns(benchmark: str | None, runs: Dict[str, str]) -> pd.Series | None:
+    """
+    Resolves the benchmark once for all reports: the close prices of an asset found in the market data of the
+    runs, a csv file of prices (first column) or a ticker downloaded by quantstats.
+    """
+    if benchmark is None:
+        return None
+
+    if os.path.isfile(benchmark):
+        prices = pd.read_csv(benchmark, index_col=0, parse_dates=True).iloc[:, 0]
+        return prices.pct_change().dropna().rename(os.path.basename(benchmark))
+
+    for path in runs.values():
+        try:
+            market_data = Backtest.load(path).frame('market_data') if is_artifact(path) else pd.read_hdf(path, key='market_data')
+        except Exception as e:
+            # broken runs get reported by their worker
+            LOG.warning(f"can not read the market data of {path}: {e}")
+            continue
+
+        if benchmark in set(c[0] for c in market_data.columns):
+            prices = market_data[benchmark]
+            prices = prices[prices.columns[3] if len(prices.columns) >= 4 else prices.columns[-1]]
+            return prices.pct_change().dropna().rename(benchmark)
+
+    import quantstats as qs
+    return qs.utils.download_returns(benchmark).rename(benchmark)
+
+
+def strategy_returns(performance: pd.DataFrame) -> pd.Series:
+    # the first row of the performance is the funding
+    return performance["performance"].pct_change().iloc[1:].rename("Strategy")
+
+
+def write_index(out_dir: str, summary: pd.DataFrame, figures: bool = True):
+    links = summary.copy()
+    links.index = [
+        f'<a href="{html.escape(n)}.html">{html.escape(n)}</a>' + (f' (<a href="{html.escape(n)}.figure.html">figure</a>)' if figures else '')
+        for n in summary.index
+    ]
+    links.index.name = summary.index.name
+
+    with open(os.path.join(out_dir, INDEX), 'w', encoding="utf-8") as f:
+        f.write(f"<html><head><meta charset='utf-8'><title>Backtests</title></head><body>\n")
+        f.write(links.to_html(escape=False, float_format=lambda x: f"{x:.4f}", na_rep=""))
+        f.write("\n</body></html>\n")
+
+
+def _result(name: str, result) -> Dict[str, Any]:
+    try:
+        return result()
+    except Exception as e:
+        LOG.error(f"failed to render the report of {name}: {e}")
+        return dict(error=str(e))
+
+
+def _init_worker(benchmark: pd.Series | None):
+    global _benchmark
+    _benchmark = benchmark
+
+
+def _render_report(name: str, path: str, out_dir: str, figures: bool, max_points: int) -> Dict[str, Any]:
+    import quantstats as qs
+
+    backtest = Backtest.load(path)
+    performance = backtest.porfolio_performance
+    qs.reports.html(
+        strategy_returns(performance), benchmark=_benchmark, output=os.path.join(out_dir, f"{name}.html"),
+        title=name, download_filename=f"{name}.html"
+    )
+
+    if figures:
+        from tradeengine.plot.plot_backtest import PlotBacktest
+        fig = PlotBacktest(backtest).plot_performance(max_points=max_points).update_layout(height=1000, title=name)
+        fig.write_html(os.path.join(out_dir, f"{name}.figure.html"), include_plotlyjs=PLOTLY_JS)
+
+    stats = summary_statistics(performance)
+    stats["orders"] = len(backtest.frame('orders'))
+    return stats
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import Type
+
+import pykka
+
+from .sync import SyncRuntime, SyncActorRef
+from .async_runtime import AsyncRuntime, AsyncActorRef
+
+
+def runtime_of(actor_ref: pykka.ActorRef):
+    # the runtime an actor was started in, None for regular (threading) actors
+    return getattr(actor_ref, "runtime", None)
+
+
+def start_actor(actor_class: Type[pykka.Actor], *args, runtime=None, **kwargs) -> pykka.ActorRef:
+    """
+    Starts an actor either in the given runtime or (if no runtime is given) as regular threading actor. Within the
+    event loop of an `AsyncRuntime` the returned coroutine needs to be awaited, any other thread gets the actor ref.
+    """
+    if runtime is None:
+        return actor_class.start(*args, **kwargs)
+    elif isinstance(runtime, AsyncRuntime) and not runtime.in_loop():
+        return runtime.start_threadsafe(actor_class, *args, **kwargs)
+    else:
+        return runtime.start(actor_class, *args, **kwargs)
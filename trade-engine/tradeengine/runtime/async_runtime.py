@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterable, Deque, List, Set, Tuple, Type
+
+import pykka
+from pykka import ActorDeadError, ActorRegistry, ThreadingFuture
+from pykka.messages import _ActorStop
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncRuntime(object):
+    """
+    Runs the unchanged actor classes on one asyncio event loop. Each actor is a coroutine consuming its own mailbox
+    and coroutines talk to actors via `tell` and `await ref.ask_async(message, timeout)`.
+
+    The (synchronous) actor logic itself runs on one dedicated actor thread such that blocking persistence (i.e. sql)
+    never blocks the event loop which stays free for non-blocking I/O like streaming quote feeds. Since all actors
+    share this one thread, an ask from within an actor (i.e. the orderbook asking the portfolio for its value) is
+    dispatched directly after the pending messages of the asked actor got processed.
+
+    The runtime needs to be created and used from within a running event loop, actors are started with
+    `await runtime.start(..)` (or `runtime.start_threadsafe(..)` from other threads).
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.actor_thread: threading.Thread | None = None
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="tradeengine-actors", initializer=self._set_actor_thread)
+        self.actor_refs: List[AsyncActorRef] = []
+        self.busy: Set[str] = set()
+
+    def _set_actor_thread(self):
+        # runs once when the executor creates the actor thread, everything else checks against it
+        self.actor_thread = threading.current_thread()
+
+    def in_actor_thread(self) -> bool:
+        return threading.current_thread() is self.actor_thread
+
+    def in_loop(self) -> bool:
+        return _in_loop(self.loop)
+
+    async def start(self, actor_class: Type[pykka.Actor], *args, **kwargs) -> AsyncActorRef:
+        # actors are constructed and started on the actor thread (i.e. sql sessions) while the loop keeps running
+        actor = await self.loop.run_in_executor(self.executor, partial(actor_class, *args, **kwargs))
+        actor_ref = actor._actor_ref = AsyncActorRef(self, actor)
+        self.actor_refs.append(actor_ref)
+
+        # registered like threading actors such that `ActorRegistry.stop_all()` (from any thread but the event loop
+        # thread) stops them as well
+        ActorRegistry.register(actor_ref)
+        await self.loop.run_in_executor(self.executor, self._start_actor, actor)
+        actor_ref.task = self.loop.create_task(self._consume(actor_ref), name=str(actor_ref))
+        return actor_ref
+
+    def start_threadsafe(self, actor_class: Type[pykka.Actor], *args, **kwargs) -> AsyncActorRef:
+        # starts an actor from any thread but the event loop thread, i.e. from a strategy running in an executor
+        assert not self.in_loop(), "use `await runtime.start(..)` in the event loop"
+        return asyncio.run_coroutine_threadsafe(self.start(actor_class, *args, **kwargs), self.loop).result()
+
+    @staticmethod
+    def _start_actor(actor: pykka.Actor):
+        try:
+            actor.on_start()
+        except Exception:
+            actor._handle_failure(*sys.exc_info())
+
+    async def feed(self, source: AsyncIterable[Any], actor_ref: AsyncActorRef, timeout: float | None = None) -> int:
+        """
+        Forwards all messages of an asynchronous source (i.e. a streaming quote feed) to an actor. Each message is
+        asked such that a slow actor applies backpressure to the source. Returns the number of forwarded messages.
+        """
+        nr_of_messages = 0
+        async for message in source:
+            await actor_ref.ask_async(message, timeout=timeout)
+            nr_of_messages += 1
+
+        return nr_of_messages
+
+    async def stop_all(self):
+        # stop in reverse order of starting, last started first stopped
+        for actor_ref in reversed(self.actor_refs):
+            if actor_ref.is_alive():
+                try:
+                    await actor_ref.ask_async(_ActorStop())
+                except ActorDeadError:
+                    pass
+
+            actor_ref.task.cancel()
+
+        await asyncio.gather(*[r.task for r in self.actor_refs], return_exceptions=True)
+        self.actor_refs.clear()
+        self.executor.shutdown(wait=True)
+
+    async def _consume(self, actor_ref: AsyncActorRef):
+        while actor_ref.is_alive() or len(actor_ref.mailbox) > 0:
+            await actor_ref.wakeup.wait()
+            actor_ref.wakeup.clear()
+            await self.loop.run_in_executor(self.executor, self.process_pending, actor_ref)
+
+    def process_pending(self, actor_ref: AsyncActorRef):
+        # runs on the actor thread
+        while len(actor_ref.mailbox) > 0 and actor_ref.actor_urn not in self.busy:
+            message, future = actor_ref.mailbox.popleft()
+            try:
+                result = self.dispatch(actor_ref, message)
+                if future is not None:
+                    self.loop.call_soon_threadsafe(_set_result, future, result)
+            except BaseException as e:
+                if future is not None:
+                    self.loop.call_soon_threadsafe(_set_exception, future, e)
+                elif not isinstance(e, ActorDeadError):
+                    # same as the threading runtime, a failing tell stops the actor
+                    actor_ref.actor._handle_failure(*sys.exc_info())
+                    actor_ref.actor.on_failure(*sys.exc_info())
+
+    def dispatch(self, actor_ref: AsyncActorRef, message: Any) -> Any:
+        # runs on the actor thread
+        actor = actor_ref.actor
+        if actor.actor_stopped.is_set():
+            raise ActorDeadError(f"{actor_ref} not found")
+
+        assert actor_ref.actor_urn not in self.busy, f"{actor_ref} would deadlock asking itself"
+        self.busy.add(actor_ref.actor_urn)
+        try:
+            return actor._handle_receive(message)
+        finally:
+            self.busy.discard(actor_ref.actor_urn)
+
+
+class AsyncActorRef(pykka.ActorRef):
+    """
+    An `ActorRef` of an actor running in an `AsyncRuntime`. Coroutines use `tell` and `await ask_async(..)`, the
+    blocking `ask` (and the `proxy`) work from within actors and from any thread but the event loop thread.
+    """
+
+    def __init__(self, runtime: AsyncRuntime, actor: pykka.Actor):
+        super().__init__(actor)
+        self.runtime = runtime
+        self.actor = actor
+        self.mailbox: Deque[Tuple[Any, asyncio.Future | None]] = deque()
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def tell(self, message: Any) -> None:
+        if not self.is_alive():
+            raise ActorDeadError(f"{self} not found")
+
+        self._post(message, None)
+
+    async def ask_async(self, message: Any, timeout: float | None = None) -> Any:
+        if not self.is_alive():
+            raise ActorDeadError(f"{self} not found")
+
+        future = self.runtime.loop.create_future()
+        self._post(message, future)
+        return await asyncio.wait_for(future, timeout)
+
+    def ask(self, message: Any, *, block: bool = True, timeout: float | None = None) -> Any:
+        runtime = self.runtime
+        if runtime.in_actor_thread():
+            # asked from within an actor: process what was sent to the actor before and then dispatch directly
+            future = ThreadingFuture()
+            try:
+                runtime.process_pending(self)
+                future.set(runtime.dispatch(self, message))
+            except Exception:
+                if block: raise
+                future.set_exception()
+
+            return future.get() if block else future
+
+        assert not _in_loop(runtime.loop), "blocking ask in the event loop, use `await actor_ref.ask_async(..)`"
+        concurrent_future = asyncio.run_coroutine_threadsafe(self.ask_async(message, timeout), runtime.loop)
+        if block:
+            return concurrent_future.result()
+
+        future = ThreadingFuture()
+        future.set_get_hook(lambda t: concurrent_future.result(t))
+        return future
+
+    def _post(self, message: Any, future: asyncio.Future | None):
+        self.mailbox.append((message, future))
+        if _in_loop(self.runtime.loop):
+            self.wakeup.set()
+        else:
+            self.runtime.loop.call_soon_threadsafe(self.wakeup.set)
+
+
+def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _set_result(future: asyncio.Future, result: Any):
+    # the future might have been cancelled by a timeout
+    if not future.done(): future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exception: BaseException):
+    if not future.done(): future.set_exception(exception)
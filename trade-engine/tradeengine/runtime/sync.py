@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import logging
+import sys
+from collections import deque
+from typing import Any, Deque, Set, Tuple, Type
+
+import pykka
+from pykka import ActorDeadError, ActorRegistry, ThreadingFuture
+
+LOG = logging.getLogger(__name__)
+
+
+class SyncRuntime(object):
+    """
+    Runs the very same actor classes without any threads: messages are dispatched directly to `on_receive` in the
+    calling thread. An `ask` is a plain method call, a `tell` is queued and processed in FIFO order as soon as the
+    current message is handled (or before the next ask), so a backtest is deterministic and free of thread handoffs.
+
+    Like in the threading runtime an actor never processes two messages at the same time, tells to an actor which is
+    busy are deferred until it finished its current message.
+    """
+
+    def __init__(self):
+        self.pending: Deque[Tuple[SyncActorRef, Any]] = deque()
+        self.busy: Set[str] = set()
+
+    def start(self, actor_class: Type[pykka.Actor], *args, **kwargs) -> SyncActorRef:
+        actor = actor_class(*args, **kwargs)
+        actor_ref = actor._actor_ref = SyncActorRef(self, actor)
+        ActorRegistry.register(actor_ref)
+
+        try:
+            actor.on_start()
+        except Exception:
+            actor._handle_failure(*sys.exc_info())
+
+        return actor_ref
+
+    def tell(self, actor_ref: SyncActorRef, message: Any):
+        self.pending.append((actor_ref, message))
+        if len(self.busy) <= 0:
+            self.process_pending()
+
+    def ask(self, actor_ref: SyncActorRef, message: Any) -> Any:
+        # everything told before this ask needs to be processed first
+        self.process_pending()
+        return self._dispatch(actor_ref, message)
+
+    def process_pending(self):
+        deferred = deque()
+        while len(self.pending) > 0:
+            actor_ref, message = self.pending.popleft()
+            if actor_ref.actor_urn in self.busy:
+                deferred.append((actor_ref, message))
+                continue
+
+            try:
+                self._dispatch(actor_ref, message)
+            except ActorDeadError:
+                LOG.warning(f"dropped message {type(message).__name__} to dead actor {actor_ref}")
+            except Exception:
+                # same as the threading runtime, a failing tell stops the actor
+                actor = actor_ref.actor
+                actor._handle_failure(*sys.exc_info())
+                actor.on_failure(*sys.exc_info())
+
+        self.pending.extendleft(reversed(deferred))
+
+    def _dispatch(self, actor_ref: SyncActorRef, message: Any) -> Any:
+        actor = actor_ref.actor
+        if actor.actor_stopped.is_set():
+            raise ActorDeadError(f"{actor_ref} not found")
+
+        self.busy.add(actor_ref.actor_urn)
+        try:
+            return actor._handle_receive(message)
+        finally:
+            self.busy.discard(actor_ref.actor_urn)
+            if len(self.busy) <= 0:
+                self.process_pending()
+
+
+class SyncActorRef(pykka.ActorRef):
+    """
+    An `ActorRef` of an actor running in a `SyncRuntime`. It supports `tell`, `ask`, `proxy` and `stop` (also via
+    `ActorRegistry.stop_all`) such that actors and strategies can not tell the difference.
+    """
+
+    def __init__(self, runtime: SyncRuntime, actor: pykka.Actor):
+        super().__init__(actor)
+        self.runtime = runtime
+        # there is no thread keeping the actor alive
+        self.actor = actor
+
+    def tell(self, message: Any) -> None:
+        if not self.is_alive():
+            raise ActorDeadError(f"{self} not found")
+
+        self.runtime.tell(self, message)
+
+    def ask(self, message: Any, *, block: bool = True, timeout: float | None = None) -> Any:
+        future = ThreadingFuture()
+        try:
+            future.set(self.runtime.ask(self, message))
+        except Exception:
+            if block: raise
+            future.set_exception()
+
+        return future.get(timeout=timeout) if block else future
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import List, Tuple, Dict, Hashable, Type
+
+import numpy as np
+import pandas as pd
+
+import tradeengine.dto.order
+from tradeengine.dto import Asset, Order, TargetWeightOrder
+
+_ORDER_CLASSES: Dict[str, Type[Order]] = {}
+SIGNAL_COLUMNS = ["time", "asset", "order_type", "size", "limit", "stop_limit", "valid_from", "valid_until", "order_id"]
+
+
+def generate_orders(
+        signals: Dict[Hashable, pd.Series] | pd.DataFrame,
+        calendars: Dict[Hashable, pd.DatetimeIndex],
+        market_data_interval: timedelta,
+) -> List[Tuple[datetime, Order]]:
+    """
+    Generates the orders of all signals at once. The signals are either a series per asset of
+    `Dict[str | Type[<Order], kwargs]` or a wide matrix of target weights (index time, one column per asset where
+    NaN means no order). Orders are valid from the signal time plus the market data interval (no lookahead bias)
+    until the next trading timestamp of the asset's calendar. Returns the signal time and order tuples.
+    """
+    if isinstance(signals, pd.DataFrame):
+        return target_weight_orders(signals, calendars, market_data_interval)
+
+    orders = []
+    for h, s in signals.items():
+        s = s[s.notna()]
+        if len(s) <= 0: continue
+
+        tst = pd.DatetimeIndex(s.index)
+        valid_from, valid_until = order_validity(tst, calendars[h], market_data_interval)
+        asset = Asset(h)
+
+        for t, vf, vu, order_description in zip(tst.to_pydatetime(), valid_from, valid_until, s.values):
+            for order_type, order_kwargs in order_description.items():
+                order = _order_class(order_type)(asset, **{"size": None, "valid_until": vu, **order_kwargs, "valid_from": vf})
+                orders.append((t, order))
+
+    return orders
+
+
+def target_weight_orders(
+        weights: pd.DataFrame,
+        calendars: Dict[Hashable, pd.DatetimeIndex],
+        market_data_interval: timedelta,
+) -> List[Tuple[datetime, Order]]:
+    orders = []
+    for h, w in weights.items():
+        w = w.dropna()
+        if len(w) <= 0: continue
+
+        tst = pd.DatetimeIndex(w.index)
+        valid_from, valid_until = order_validity(tst, calendars[h], market_data_interval)
+        asset = Asset(h)
+
+        orders.extend(
+            (t, TargetWeightOrder(asset, size, vf, valid_until=vu))
+                for t, size, vf, vu in zip(tst.to_pydatetime(), w.values.tolist(), valid_from, valid_until)
+        )
+
+    return orders
+
+
+def order_validity(tst: pd.DatetimeIndex, calendar: pd.DatetimeIndex, market_data_interval: timedelta) -> Tuple[np.ndarray, np.ndarray]:
+    # prevent lookahead bias!! the order is valid from the signal time on plus one market data interval and until
+    # the next trading timestamp of the asset
+    calendar = pd.DatetimeIndex(calendar)
+    if not calendar.is_monotonic_increasing: calendar = calendar.sort_values()
+
+    next_trading_tst = np.append(calendar.to_pydatetime(), datetime.max)[calendar.searchsorted(tst, side='right')]
+    valid_from = (tst + market_data_interval).to_pydatetime()
+    return valid_from, next_trading_tst
+
+
+def _order_class(order_type: str | Type[Order]) -> Type[Order]:
+    if not isinstance(order_type, str): return order_type
+    if order_type not in _ORDER_CLASSES: _ORDER_CLASSES[order_type] = getattr(tradeengine.dto.order, order_type)
+    return _ORDER_CLASSES[order_type]
+
+
+def signal_frame(placed_orders: List[Tuple[datetime, Order]]) -> pd.DataFrame:
+    """
+    Builds the flat signal table (one row per placed order) from the signal timestamps and the orders the
+    orderbook accepted.
+    """
+    placed_orders = [(tst, o) for tst, o in placed_orders if o is not None]
+
+    df = pd.DataFrame({
+        "time": pd.to_datetime([tst for tst, _ in placed_orders]),
+        "asset": [str(o.asset) for _, o in placed_orders],
+        "order_type": [o.__class__.__name__ for _, o in placed_orders],
+        "size": pd.array([o.size for _, o in placed_orders], dtype=float),
+        "limit": pd.array([o.limit for _, o in placed_orders], dtype=float),
+        "stop_limit": pd.array([o.stop_limit for _, o in placed_orders], dtype=float),
+        "valid_from": pd.to_datetime([o.valid_from for _, o in placed_orders]),
+        "valid_until": pd.to_datetime([o.valid_until for _, o in placed_orders], errors='coerce'),
+        "order_id": pd.array([o.id for _, o in placed_orders], dtype="Int64"),
+    }, columns=SIGNAL_COLUMNS)
+
+    return df.sort_values("time", kind="stable", ignore_index=True)
+
+
+def is_signal_frame(signals: pd.DataFrame) -> bool:
+    return set(SIGNAL_COLUMNS).issubset(signals.columns)
+
+
+def nested_signals(signals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derives the nested view of the signals: a frame indexed by time with one column per asset where each
+    cell holds the list of order dicts placed at this time. Legacy (already nested) frames are returned as is.
+    """
+    if not is_signal_frame(signals):
+        return signals
+
+    def to_dict(row) -> dict:
+        order = _order_class(row.order_type)(
+            Asset(row.asset), _none(row.size), row.valid_from.to_pydatetime(), _none(row.limit),
+            _none(row.stop_limit), None if pd.isna(row.valid_until) else row.valid_until.to_pydatetime(),
+            _none(row.order_id)
+        )
+        return order.todict()
+
+    cells = pd.Series([to_dict(row) for row in signals.itertuples(index=False)], index=signals.index, dtype=object)
+    nested = cells.groupby([signals["time"], signals["asset"]], sort=True).agg(list).unstack("asset")
+    return nested.applymap(lambda c: c if isinstance(c, list) else [])
+
+
+def signal_markers(signals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the flat table of plot markers (time, asset, marker) of the signals. The marker of an order only depends
+    on its class and the sign of its size, so it is evaluated once per distinct pair. Legacy (nested) frames are
+    flattened cell by cell.
+    """
+    if not is_signal_frame(signals):
+        rows = [(time, str(asset), o["marker"]) for asset, cells in signals.items() for time, orders in cells.items() if isinstance(orders, list) for o in orders if o is not None]
+        return pd.DataFrame(rows, columns=["time", "asset", "marker"]).sort_values("time", kind="stable", ignore_index=True)
+
+    sign = np.sign(signals["size"].fillna(0).values)
+    keys = pd.MultiIndex.from_arrays([signals["order_type"].values, sign])
+    markers = {(t, s): _order_class(t)(None, s, None).marker for t, s in keys.unique()}
+
+    return pd.DataFrame({
+        "time": signals["time"].values,
+        "asset": signals["asset"].values,
+        "marker": keys.map(markers.get).values,
+    })
+
+
+def _none(value):
+    return None if pd.isna(value) else value
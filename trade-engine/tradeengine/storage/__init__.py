@@ -0,0 +1,4 @@
+from .artifact import LazyFrame, save_frames, open_frames, read_manifest, is_artifact
+from .csv_cache import read_csv_files
+from .compact import compact_frame, compaction_report, memory_usage
+from .frame_cache import FrameCache, CachedFrame, FRAME_CACHE
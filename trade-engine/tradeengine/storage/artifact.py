@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Hashable, List
+
+import pandas as pd
+
+from tradeengine.storage.compact import compact_frame
+from tradeengine.storage.columnar import write_frame, read_frame, frame_columns
+
+MANIFEST = 'manifest.json'
+VERSION = 1
+
+
+class LazyFrame(object):
+    """
+    A handle to a table of a stored artifact. Nothing is read from disk until the frame gets loaded, and
+    selecting columns (i.e. `lazy_frame["AAPL"]`) only reads the column chunks of the selected columns.
+    """
+
+    def __init__(self, directory: str, meta: Dict[str, Any]):
+        self.directory = directory
+        self.meta = meta
+
+    @property
+    def columns(self) -> pd.Index:
+        return frame_columns(self.meta)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def __getitem__(self, key):
+        keys = key if isinstance(key, list) else [key]
+        columns = [c for c in self.columns if c in keys or (isinstance(c, tuple) and c[0] in keys)]
+        return self.load(columns)[key]
+
+    def load(self, columns: List[Hashable] | None = None) -> pd.DataFrame:
+        return read_frame(os.path.join(self.directory, self.meta["file"]), self.meta, columns)
+
+    def __repr__(self):
+        return f"LazyFrame({self.directory}/{self.meta['file']}, rows={len(self)}, columns={len(self.meta['columns'])})"
+
+
+def save_frames(directory: str, frames: Dict[str, pd.DataFrame], kind: str, compact: bool = False, **extra) -> Dict[str, Any]:
+    """
+    Saves a set of frames as a directory of compressed columnar tables plus a manifest. The manifest is written
+    last such that an interrupted save never looks like a complete artifact. In `compact` mode the frames are
+    stored as float32 with categorical strings and delta encoded timestamps.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    manifest_file = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
+
+    tables = {
+        name: write_frame(compact_frame(df) if compact else df, os.path.join(directory, f"{name}.parquet"), delta_timestamps=compact)
+        for name, df in frames.items()
+    }
+    manifest = dict(kind=kind, version=VERSION, tables=tables, compact=compact, **extra)
+
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    return manifest
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+
+    assert manifest["version"] <= VERSION, f"artifact {directory} was written by a newer version: {manifest['version']}"
+    return manifest
+
+
+def open_frames(directory: str) -> Dict[str, LazyFrame]:
+    manifest = read_manifest(directory)
+    return {name: LazyFrame(directory, meta) for name, meta in manifest["tables"].items()}
+
+
+def is_artifact(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import importlib
+import os
+from enum import Enum
+from typing import Any, Dict, List, Hashable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COMPRESSION = 'zstd'
+
+
+def write_frame(df: pd.DataFrame, path: str, compression: str = COMPRESSION, delta_timestamps: bool = False) -> Dict[str, Any]:
+    """
+    Writes a DataFrame as a compressed parquet file and returns the table description which is needed to read
+    back only a subset of the columns (without touching the file). With `delta_timestamps` all timestamp columns
+    (including the index) are delta encoded which shrinks regular time series to a few bits per row.
+    """
+    df, enums = _encode_enums(df)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+
+    encoding = {}
+    if delta_timestamps:
+        # delta encoded columns must not use dictionary encoding
+        delta = [f.name for f in table.schema if pa.types.is_timestamp(f.type)]
+        encoding = dict(
+            use_dictionary=[n for n in table.schema.names if n not in delta],
+            column_encoding={n: 'DELTA_BINARY_PACKED' for n in delta},
+        )
+
+    pq.write_table(table, path, compression=compression, **encoding)
+
+    return dict(
+        file=os.path.basename(path),
+        rows=len(df),
+        columns=[list(c) if isinstance(c, tuple) else c for c in df.columns],
+        fields=table.schema.names[:len(df.columns)],
+        enums=enums,
+    )
+
+
+def read_frame(path: str, meta: Dict[str, Any], columns: List[Hashable] | None = None) -> pd.DataFrame:
+    """
+    Reads a (memory mapped) parquet file written by `write_frame`. If columns are given only the
+    needed column chunks are read from disk.
+    """
+    fields = None
+    if columns is not None:
+        field_of = dict(zip(map(_label, meta["columns"]), meta["fields"]))
+        fields = [field_of[c] for c in columns]
+
+    df = pq.read_table(path, columns=fields, memory_map=True, use_pandas_metadata=True).to_pandas()
+    return _decode_enums(df, meta.get("enums", {}))
+
+
+def frame_columns(meta: Dict[str, Any]) -> pd.Index:
+    labels = [_label(c) for c in meta["columns"]]
+    if len(labels) > 0 and all(isinstance(l, tuple) for l in labels):
+        return pd.MultiIndex.from_tuples(labels)
+
+    return pd.Index(labels)
+
+
+def _label(c):
+    return tuple(c) if isinstance(c, list) else c
+
+
+def _encode_enums(df: pd.DataFrame):
+    # arrow does not know about python enums, so we store the names and remember the enum class
+    enums = {}
+    for col, values in df.items():
+        if values.dtype != object: continue
+
+        first = values.first_valid_index()
+        if first is not None and isinstance(values[first], Enum):
+            enum_class = type(values[first])
+            enums[str(col)] = f"{enum_class.__module__}:{enum_class.__qualname__}"
+
+    if len(enums) <= 0:
+        return df, enums
+
+    df = df.copy()
+    for col in df.columns:
+        if str(col) in enums:
+            df[col] = df[col].apply(lambda e: None if e is None else e.name)
+
+    return df, enums
+
+
+def _decode_enums(df: pd.DataFrame, enums: Dict[str, str]):
+    for col in df.columns:
+        if str(col) not in enums: continue
+
+        module, qualname = enums[str(col)].split(":")
+        enum_class = getattr(importlib.import_module(module), qualname)
+        df[col] = df[col].apply(lambda n: None if n is None else enum_class[n])
+
+    return df
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def compact_frame(df: pd.DataFrame, float_dtype=np.float32) -> pd.DataFrame:
+    """
+    Returns a compact copy of a frame: float64 columns are stored as `float_dtype` and string columns (like assets
+    or strategy ids) as categoricals. All other columns (timestamps, enums, ints) are left untouched.
+    """
+    dtypes = {}
+    for col, values in df.items():
+        if values.dtype == np.float64:
+            dtypes[col] = float_dtype
+        elif values.dtype == object and _is_string_column(values):
+            dtypes[col] = 'category'
+
+    return df.astype(dtypes) if len(dtypes) > 0 else df
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def max_relative_error(original: pd.DataFrame, compact: pd.DataFrame) -> float:
+    """
+    The largest relative deviation of any float column of the compact frame from the original (float64) frame.
+    """
+    errors = [0.0]
+    for col, values in original.items():
+        if values.dtype != np.float64: continue
+
+        expected = values.values
+        actual = compact[col].values.astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = np.abs(actual - expected) / np.maximum(np.abs(expected), np.finfo(np.float64).tiny)
+
+        if np.any(~np.isnan(error)):
+            errors.append(float(np.nanmax(error)))
+
+    return max(errors)
+
+
+def compaction_report(frames: Dict[str, pd.DataFrame], compact_frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Reports the memory of each frame before and after compaction, the saved bytes and the precision loss.
+    """
+    report = pd.DataFrame(
+        [
+            (memory_usage(df), memory_usage(compact_frames[name]), max_relative_error(df, compact_frames[name]))
+            for name, df in frames.items()
+        ],
+        index=list(frames.keys()),
+        columns=["bytes", "compact_bytes", "max_relative_error"],
+    )
+
+    report.loc["total"] = [report["bytes"].sum(), report["compact_bytes"].sum(), report["max_relative_error"].max()]
+    report["saved"] = 1 - report["compact_bytes"] / report["bytes"].replace(0, np.nan)
+    return report
+
+
+def _is_string_column(values: pd.Series) -> bool:
+    valid = values.dropna()
+    return len(valid) > 0 and isinstance(valid.iloc[0], str)
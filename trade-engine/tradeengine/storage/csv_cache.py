@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+LOG = logging.getLogger(__name__)
+CACHE_METADATA_KEY = b'tradeengine.csv_cache'
+
+
+def read_csv_files(
+        files: Iterable[str | Path],
+        max_workers: int | None = None,
+        use_cache: bool = True,
+        **read_csv_kwargs,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Reads many csv files keyed by their file name. Text parsing is distributed over a process pool and every
+    parsed file gets a binary (parquet) sidecar cache `.<name>.parquet` next to it. The sidecar is only used as
+    long as the modification time and size of the csv file (and the read_csv arguments) did not change, so repeated
+    runs over the same universe skip the text parsing entirely.
+    """
+    files = [Path(f) for f in files]
+    frames: Dict[Path, pd.DataFrame] = {}
+
+    # cached frames are memory mapped, arrow releases the GIL so threads are enough
+    cached = [f for f in files if use_cache and _is_cache_valid(f, read_csv_kwargs)]
+    with ThreadPoolExecutor(max_workers) as pool:
+        frames.update(zip(cached, pool.map(_read_cache, cached)))
+
+    stale = [f for f in files if f not in frames]
+    if len(stale) > 0:
+        LOG.info(f"parse {len(stale)} csv files ({len(cached)} cached)")
+        if len(stale) <= 1 or max_workers == 1:
+            frames.update({f: _parse_csv(f, use_cache, read_csv_kwargs) for f in stale})
+        else:
+            with ProcessPoolExecutor(max_workers) as pool:
+                parsed = pool.map(_parse_csv, stale, [use_cache] * len(stale), [read_csv_kwargs] * len(stale), chunksize=16)
+                frames.update(zip(stale, parsed))
+
+    return {f.name: frames[f] for f in files}
+
+
+def cache_file(file: Path) -> Path:
+    return file.with_name(f".{file.name}.parquet")
+
+
+def _source_signature(file: Path, read_csv_kwargs: Dict[str, Any]) -> bytes:
+    stat = os.stat(file)
+    return json.dumps(
+        dict(mtime_ns=stat.st_mtime_ns, size=stat.st_size, read_csv=read_csv_kwargs), sort_keys=True, default=str
+    ).encode("utf-8")
+
+
+def _is_cache_valid(file: Path, read_csv_kwargs: Dict[str, Any]) -> bool:
+    cache = cache_file(file)
+    if not cache.exists():
+        return False
+
+    try:
+        metadata = pq.read_schema(cache).metadata or {}
+        return metadata.get(CACHE_METADATA_KEY) == _source_signature(file, read_csv_kwargs)
+    except Exception as e:
+        LOG.warning(f"ignore broken cache {cache}: {e}")
+        return False
+
+
+def _read_cache(file: Path) -> pd.DataFrame:
+    return pq.read_table(cache_file(file), memory_map=True).to_pandas()
+
+
+def _parse_csv(file: Path, use_cache: bool, read_csv_kwargs: Dict[str, Any]) -> pd.DataFrame:
+    # the signature of the file as it was before parsing, a file rewritten meanwhile invalidates the cache
+    signature = _source_signature(file, read_csv_kwargs) if use_cache else None
+    df = pd.read_csv(file, **read_csv_kwargs)
+
+    if use_cache:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                CACHE_METADATA_KEY: signature
+            })
+
+            # write to a temporary file first, concurrent runs must never see a half written cache
+            tmp_file = cache_file(file).with_suffix(f".{os.getpid()}.tmp")
+            pq.write_table(table, tmp_file, compression='zstd')
+            os.replace(tmp_file, cache_file(file))
+        except Exception as e:
+            LOG.warning(f"could not write cache for {file}: {e}")
+
+    return df
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List
+
+import pandas as pd
+
+from tradeengine.storage.artifact import LazyFrame
+from tradeengine.storage.compact import memory_usage
+
+DEFAULT_CACHE_BYTES = 2 << 30
+
+
+class FrameCache(object):
+    """
+    A process wide cache of loaded frames (i.e. keyed by artifact directory and table) which evicts the least
+    recently used frames as soon as all frames together exceed `max_bytes`. A single frame larger than the budget
+    is returned but not kept. Evicted frames are freed once nobody else holds a reference to them.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.frames: OrderedDict[Hashable, pd.DataFrame] = OrderedDict()
+        self.sizes: Dict[Hashable, int] = {}
+        self.nbytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable):
+        return key in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get(self, key: Hashable, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        with self._lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return self.frames[key]
+
+        # dash callbacks run threaded, we do not block other readers while loading from disk
+        df = load()
+        size = memory_usage(df)
+
+        with self._lock:
+            if key not in self.frames and size <= self.max_bytes:
+                self.frames[key] = df
+                self.sizes[key] = size
+                self.nbytes += size
+                self._evict()
+
+            return self.frames.get(key, df)
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self.frames) > 1:
+            key, _ = self.frames.popitem(last=False)
+            self.nbytes -= self.sizes.pop(key)
+
+    def keys(self) -> List[Hashable]:
+        return list(self.frames.keys())
+
+    def clear(self):
+        with self._lock:
+            self.frames.clear()
+            self.sizes.clear()
+            self.nbytes = 0
+
+
+class CachedFrame(LazyFrame):
+    """
+    A `LazyFrame` whose full loads go through a `FrameCache`, column selections are still read from disk.
+    """
+
+    def __init__(self, frame: LazyFrame, cache: FrameCache):
+        super().__init__(frame.directory, frame.meta)
+        self.cache = cache
+
+    @property
+    def key(self):
+        return str(self.directory), self.meta["file"]
+
+    def load(self, columns: List[Hashable] | None = None) -> pd.DataFrame:
+        if columns is not None:
+            return super().load(columns)
+
+        return self.cache.get(self.key, lambda: super(CachedFrame, self).load())
+
+
+# one cache shared by all comparisons (and dashboards) of the process
+FRAME_CACHE = FrameCache()